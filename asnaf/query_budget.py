@@ -0,0 +1,94 @@
+# asnaf/query_budget.py
+"""
+ابزار تست «بودجه کوئری» برای endpointها
+
+هر اپ یک کلاس تست با QueryBudgetMixin می‌سازد که برای هر نام URL اپ یک
+بودجه (حداکثر تعداد کوئری) یا دلیل معاف بودن اعلام می‌کند. سپس:
+- test_every_url_is_declared: هر URL جدید بدون بودجه یا معافیت باعث شکست تست می‌شود
+- test_query_budgets: داده‌ها یک بار با اندازه ۱ و یک بار با اندازه ۱۰۰ ساخته
+  می‌شوند؛ تعداد کوئری هر endpoint نباید با حجم داده تغییر کند و نباید از
+  بودجه‌اش بیشتر شود (N+1)
+"""
+from dataclasses import dataclass, field
+from importlib import import_module
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+from rest_framework.test import APIClient
+
+
+@dataclass
+class Call:
+    """یک درخواست به endpoint با نام URL"""
+    url_name: str
+    kwargs: dict = field(default_factory=dict)
+    user: object = None
+    method: str = 'get'
+    data: dict = None
+    params: dict = None
+
+
+def url_names(urlpatterns, namespace=None):
+    """نام تمام URLهای یک urlconf (شامل include ها و routerها)"""
+    names = set()
+    for pattern in urlpatterns:
+        if isinstance(pattern, URLResolver):
+            inner = namespace
+            if pattern.namespace:
+                inner = f"{namespace}:{pattern.namespace}" if namespace else pattern.namespace
+            names |= url_names(pattern.url_patterns, inner)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(f"{namespace}:{pattern.name}" if namespace else pattern.name)
+    return names
+
+
+class QueryBudgetMixin:
+    """
+    urls_module: ماژول urls اپ (مثلاً 'festival.urls')
+    url_namespace: app_name اپ در صورت وجود
+    budgets: {نام URL: حداکثر تعداد کوئری}
+    exempt: {نام URL: دلیل} برای endpointهایی که اندازه‌گیری نمی‌شوند
+    build_calls(size): داده با اندازه size می‌سازد و درخواست‌ها را برمی‌گرداند
+    """
+    urls_module = None
+    url_namespace = None
+    budgets = {}
+    exempt = {}
+    sizes = (1, 100)
+
+    def build_calls(self, size):
+        raise NotImplementedError
+
+    def count_queries(self, call):
+        client = APIClient()
+        if call.user is not None:
+            client.force_authenticate(call.user)
+        path = reverse(call.url_name, kwargs=call.kwargs)
+        # کش بین اندازه‌گیری‌ها پاک می‌شود تا همیشه مسیر سرد اندازه‌گیری شود
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            if call.method == 'get':
+                response = client.get(path, call.params or {})
+            else:
+                response = getattr(client, call.method)(path, call.data or {}, format='json')
+        self.assertLess(response.status_code, 400, f"{call.url_name}: {getattr(response, 'data', response)}")
+        return len(ctx.captured_queries)
+
+    def test_every_url_is_declared(self):
+        names = url_names(import_module(self.urls_module).urlpatterns, self.url_namespace)
+        undeclared = names - set(self.budgets) - set(self.exempt)
+        self.assertFalse(undeclared, f"URLs without a query budget: {sorted(undeclared)}")
+        self.assertFalse(set(self.budgets) & set(self.exempt))
+
+    def test_query_budgets(self):
+        counts = {}
+        for size in self.sizes:
+            counts[size] = {call.url_name: self.count_queries(call) for call in self.build_calls(size)}
+
+        small, large = counts[min(self.sizes)], counts[max(self.sizes)]
+        for name, budget in self.budgets.items():
+            with self.subTest(url=name):
+                self.assertIn(name, large, f"{name} has a budget but is never called")
+                self.assertEqual(small[name], large[name], f"{name}: queries grow with data size")
+                self.assertLessEqual(large[name], budget, f"{name}: over query budget")
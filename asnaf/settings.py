@@ -56,6 +56,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'lms.middleware.QueryCountMiddleware',
 ]
 
 ROOT_URLCONF = 'asnaf.urls'
@@ -127,6 +128,33 @@ USE_L10N = True
 USE_TZ = False
 
 
+# بافر پاسخ‌های آزمون (write-behind) - پاسخ‌ها در پایان آزمون یا با دستور flush_answer_buffer ذخیره می‌شوند
+# نیازمند کش مشترک بین workerها (CACHES، system check lms.E001) و پوشه‌ای که همه سرورهای
+# برنامه به آن دسترسی دارند (یک سرور یا mount شبکه‌ای، system check lms.E002)؛ قبل از
+# غیرفعال کردن بافر دستور flush_answer_buffer اجرا شود
+LMS_ANSWER_BUFFER_ENABLED = os.getenv('LMS_ANSWER_BUFFER_ENABLED') == '1'
+LMS_ANSWER_BUFFER_DIR = os.getenv('LMS_ANSWER_BUFFER_DIR', os.path.join(BASE_DIR, 'answer_buffer'))
+LMS_ANSWER_BUFFER_DIR_SHARED = os.getenv('LMS_ANSWER_BUFFER_DIR_SHARED') == '1'
+# ذخیره فشرده پاسخ‌های تلاش‌های پایان یافته در ExamAttempt به جای StudentAnswer
+LMS_COMPACT_ANSWERS_ENABLED = os.getenv('LMS_COMPACT_ANSWERS_ENABLED') == '1'
+# هدر تعداد کوئری‌های هر درخواست برای دستور run_load_test (فقط در محیط بنچمارک)
+LMS_QUERY_COUNT_HEADER = os.getenv('LMS_QUERY_COUNT_HEADER') == '1'
+# کارهای زمان‌بندی شده LMS با cron (هر دقیقه): بستن تلاش‌های منقضی شده و ساخت سوالات آزمون‌های منتشر شده
+# * * * * * cd /path/to/project && python manage.py expire_overdue_attempts
+# * * * * * cd /path/to/project && python manage.py pregenerate_exam_papers
+
+# خطاهای کارهای پس‌زمینه LMS (مثل ساخت سوالات) در خروجی پروسه ثبت می‌شوند
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'lms': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
 CELERY_BEAT_SCHEDULE = {
     'sync_tirpark_every_hour': {
         'task': 'tirpark.tasks.sync_parking_queue',
@@ -108,7 +108,7 @@ class Room(models.Model):
 
     def get_active_reservation(self):
         """دریافت رزرو فعال برای این غرفه"""
-        return self.reservations.filter(status__in=[0, 1]).first()
+        return self.reservations.select_related('user').filter(status__in=[0, 1]).first()
 
     def is_reserved(self):
         """آیا غرفه رزرو شده است؟"""
@@ -53,7 +53,7 @@ class RoomSerializer(serializers.ModelSerializer):
 
 
 class FestivalSerializer(serializers.ModelSerializer):
-    rooms_count = serializers.IntegerField(source='rooms.count', read_only=True)
+    rooms_count = serializers.SerializerMethodField()
     available_rooms_count = serializers.SerializerMethodField()
     matrix_dimensions = serializers.SerializerMethodField()
     total_cells = serializers.IntegerField(source='get_total_cells', read_only=True)
@@ -67,7 +67,15 @@ class FestivalSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'create_time']
 
+    def get_rooms_count(self, obj):
+        # در لیست‌ها از مقدار annotate شده (with_room_counts) استفاده می‌شود
+        if hasattr(obj, 'rooms_total'):
+            return obj.rooms_total
+        return obj.rooms.count()
+
     def get_available_rooms_count(self, obj):
+        if hasattr(obj, 'available_rooms_total'):
+            return obj.available_rooms_total
         return obj.rooms.filter(status=0).count()
 
     def get_matrix_dimensions(self, obj):
@@ -98,13 +106,13 @@ class FestivalDetailSerializer(FestivalSerializer):
 
     def get_matrix_visualization(self, obj):
         """ویژوالایز کردن ماتریس برای API"""
-        rooms = obj.rooms.all()
+        rooms = {room.get_position(): room for room in obj.rooms.all()}
         matrix = []
 
         for h in range(obj.number_height):
             row = []
             for w in range(obj.number_width):
-                room = rooms.filter(w_i=w, h_i=h).first()
+                room = rooms.get((w, h))
                 if room:
                     room_data = {
                         'id': room.id,
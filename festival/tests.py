@@ -1,3 +1,60 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-# Create your tests here.
+from asnaf.query_budget import Call, QueryBudgetMixin
+from .models import Festival, Room, Reserve
+
+MyUser = get_user_model()
+
+
+class FestivalQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """تعداد کوئری endpointهای نمایشگاه نباید به تعداد غرفه‌ها و رزروها وابسته باشد"""
+
+    urls_module = 'festival.urls'
+    budgets = {
+        'festival-list': 1,
+        'festival-detail': 2,
+        'room-list': 2,
+        'room-detail': 1,
+        'festival-matrix': 2,
+        'available-rooms': 2,
+        'user-reservations': 1,
+        'reservation-detail': 1,
+        'room-reservation-info': 2,
+    }
+    exempt = {
+        'room-reservation': 'ثبت رزرو (تک ردیفی)',
+        'reservation-status-update': 'تغییر وضعیت یک رزرو (تک ردیفی)',
+    }
+
+    def build_calls(self, size):
+        user = MyUser.objects.create_user(mobile=f'0915{size:07d}')
+        admin = MyUser.objects.create_user(mobile=f'0916{size:07d}', is_staff=True)
+        width = min(size, 10)
+        festival = Festival.objects.create(
+            name=f'نمایشگاه {size}', number_room=size, number_width=width, number_height=-(-size // width)
+        )
+        rooms = Room.objects.bulk_create([
+            Room(festival=festival, name=f'غرفه {i}', metraj=Decimal('12'), price=Decimal('1000'),
+                 status=i % 2, w_i=i % width, h_i=i // width)
+            for i in range(size)
+        ])
+        reservations = Reserve.objects.bulk_create([
+            Reserve(user=user, room=room, first_name='نام', last_name='خانوادگی', national_code='0012345678',
+                    phone='02100000000', address='تهران', receipt_image='receipts/test.jpg')
+            for room in rooms
+        ])
+
+        return [
+            Call('festival-list'),
+            Call('festival-detail', {'festival_id': festival.id}),
+            Call('room-list', {'festival_id': festival.id}),
+            Call('room-detail', {'festival_id': festival.id, 'room_id': rooms[0].id}),
+            Call('festival-matrix', {'festival_id': festival.id}),
+            Call('available-rooms', {'festival_id': festival.id}),
+            Call('user-reservations', user=user),
+            Call('reservation-detail', {'reservation_id': reservations[0].id}, user=user),
+            Call('room-reservation-info', {'room_id': rooms[0].id}, user=admin),
+        ]
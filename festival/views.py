@@ -3,6 +3,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
@@ -11,10 +12,22 @@ from .serializers import FestivalSerializer, FestivalDetailSerializer, RoomSeria
     ReserveCreateSerializer
 
 
+def with_room_counts(festivals):
+    """تعداد کل و آزاد غرفه‌ها با یک کوئری (برای FestivalSerializer)"""
+    return festivals.annotate(
+        rooms_total=Count('rooms'),
+        available_rooms_total=Count('rooms', filter=Q(rooms__status=0))
+    )
+
+
+def reservations_with_relations():
+    return Reserve.objects.select_related('user', 'room__festival')
+
+
 class FestivalView(APIView):
     def get(self, request):
         """دریافت لیست همه نمایشگاه‌ها"""
-        festivals = Festival.objects.all()
+        festivals = with_room_counts(Festival.objects.all())
         serializer = FestivalSerializer(festivals, many=True)
         return Response(serializer.data)
 
@@ -30,7 +43,7 @@ class FestivalView(APIView):
 class FestivalDetailView(APIView):
     def get(self, request, festival_id):
         """دریافت جزئیات یک نمایشگاه به همراه غرفه‌هایش"""
-        festival = get_object_or_404(Festival, id=festival_id)
+        festival = get_object_or_404(with_room_counts(Festival.objects.prefetch_related('rooms')), id=festival_id)
         serializer = FestivalDetailSerializer(festival)
         return Response(serializer.data)
 
@@ -76,8 +89,7 @@ class RoomView(APIView):
 class RoomDetailView(APIView):
     def get(self, request, festival_id, room_id):
         """دریافت جزئیات یک غرفه"""
-        festival = get_object_or_404(Festival, id=festival_id)
-        room = get_object_or_404(Room, id=room_id, festival=festival)
+        room = get_object_or_404(Room.objects.select_related('festival'), id=room_id, festival_id=festival_id)
         serializer = RoomSerializer(room)
         return Response(serializer.data)
 
@@ -103,14 +115,15 @@ class RoomDetailView(APIView):
 class FestivalRoomsMatrixView(APIView):
     def get(self, request, festival_id):
         """دریافت ماتریس کامل غرفه‌های یک نمایشگاه"""
-        festival = get_object_or_404(Festival, id=festival_id)
+        festival = get_object_or_404(with_room_counts(Festival.objects.all()), id=festival_id)
+        rooms = {room.get_position(): room for room in festival.rooms.all()}
 
         # ایجاد ماتریس
         matrix = []
         for h in range(festival.number_height):
             row = []
             for w in range(festival.number_width):
-                room = Room.objects.filter(festival=festival, w_i=w, h_i=h).first()
+                room = rooms.get((w, h))
                 if room:
                     room_data = RoomSerializer(room).data
                     row.append(room_data)
@@ -185,7 +198,7 @@ class UserReservationsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        reservations = Reserve.objects.filter(user=request.user).order_by('-created_at')
+        reservations = reservations_with_relations().filter(user=request.user).order_by('-created_at')
         serializer = ReserveSerializer(reservations, many=True)
         return Response(serializer.data)
 
@@ -196,7 +209,7 @@ class ReservationDetailView(APIView):
 
     def get(self, request, reservation_id):
         reservation = get_object_or_404(
-            Reserve,
+            reservations_with_relations(),
             id=reservation_id,
             user=request.user
         )
@@ -234,7 +247,7 @@ class RoomReservationInfoView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, room_id):
-        room = get_object_or_404(Room, id=room_id)
+        room = get_object_or_404(Room.objects.select_related('festival'), id=room_id)
 
         # فقط ادمین‌ها می‌توانند اطلاعات رزرو را ببینند
         if not request.user.is_staff and not request.user.is_superuser:
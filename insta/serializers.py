@@ -31,6 +31,8 @@ class PostSerializer(serializers.ModelSerializer):
 
     def get_is_liked(self, obj):
         request = self.context.get('request')
+        if hasattr(obj, 'liked_by_me'):
+            return obj.liked_by_me
         if request and request.user.is_authenticated:
             return Like.objects.filter(post=obj, user=request.user).exists()
         return False
@@ -58,6 +60,8 @@ class CommentSerializer(serializers.ModelSerializer):
 
     def get_is_liked(self, obj):
         request = self.context.get('request')
+        if hasattr(obj, 'liked_by_me'):
+            return obj.liked_by_me
         if request and request.user.is_authenticated:
             return CommentLike.objects.filter(comment=obj, user=request.user).exists()
         return False
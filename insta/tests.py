@@ -1,3 +1,58 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+
+from asnaf.query_budget import Call, QueryBudgetMixin
+from .models import Post, Like, Comment, CommentLike, Story
+
+MyUser = get_user_model()
+
+
+class InstaQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """تعداد کوئری لیست پست‌ها، کامنت‌ها و استوری‌ها نباید به تعداد ردیف‌ها وابسته باشد"""
+
+    urls_module = 'insta.urls'
+    budgets = {
+        'api-root': 0,
+        'post-list': 1,
+        'post-detail': 1,
+        'post-comments': 2,
+        'comment-list': 1,
+        'comment-detail': 1,
+        'comment-pending-comments': 1,
+        'story-list': 1,
+        'story-detail': 1,
+    }
+    exempt = {
+        'post-like': 'لایک/آنلایک یک پست (تک ردیفی)',
+        'post-add-comment': 'ثبت یک کامنت (تک ردیفی)',
+        'comment-like': 'لایک/آنلایک یک کامنت (تک ردیفی)',
+        'comment-approve': 'تایید یک کامنت (تک ردیفی)',
+    }
+
+    def build_calls(self, size):
+        users = MyUser.objects.bulk_create([MyUser(mobile=f'0917{size:03d}{i:04d}') for i in range(size)])
+        admin = MyUser.objects.create_user(mobile=f'0918{size:07d}', is_staff=True)
+        posts = Post.objects.bulk_create([Post(user=user, caption=f'پست {i}') for i, user in enumerate(users)])
+        Like.objects.bulk_create([Like(post=post, user=admin) for post in posts[::2]])
+        comments = Comment.objects.bulk_create([
+            Comment(post=posts[0], user=user, text='کامنت', status='approved' if i % 2 else 'pending')
+            for i, user in enumerate(users)
+        ])
+        CommentLike.objects.bulk_create([CommentLike(comment=comment, user=admin) for comment in comments[::2]])
+        expires_at = timezone.now() + timedelta(hours=24)
+        stories = Story.objects.bulk_create([Story(user=user, expires_at=expires_at) for user in users])
 
-# Create your tests here.
+        return [
+            Call('api-root'),
+            Call('post-list', user=admin),
+            Call('post-detail', {'pk': posts[0].pk}, user=admin),
+            Call('post-comments', {'pk': posts[0].pk}, user=admin),
+            Call('comment-list', user=admin),
+            Call('comment-detail', {'pk': comments[0].pk}, user=admin),
+            Call('comment-pending-comments', user=admin),
+            Call('story-list'),
+            Call('story-detail', {'pk': stories[0].pk}),
+        ]
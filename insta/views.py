@@ -2,6 +2,7 @@
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db.models import Exists, OuterRef
 from django.shortcuts import get_object_or_404
 from .models import Post, Like, Comment, CommentLike, Story
 from .serializers import (
@@ -13,13 +14,27 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 
+def with_comment_relations(queryset, user):
+    """نویسنده و لایک کاربر جاری در همان کوئری لیست کامنت‌ها"""
+    queryset = queryset.select_related('user')
+    if user.is_authenticated:
+        queryset = queryset.annotate(
+            liked_by_me=Exists(CommentLike.objects.filter(comment=OuterRef('pk'), user=user))
+        )
+    return queryset
+
+
 class PostViewSet(viewsets.ModelViewSet):
     """ViewSet برای مدیریت پست‌ها"""
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
-        queryset = Post.objects.filter(is_active=True)
+        queryset = Post.objects.filter(is_active=True).select_related('user')
+        if self.request.user.is_authenticated:
+            queryset = queryset.annotate(
+                liked_by_me=Exists(Like.objects.filter(post=OuterRef('pk'), user=self.request.user))
+            )
         return queryset
 
     def perform_create(self, serializer):
@@ -45,7 +60,7 @@ class PostViewSet(viewsets.ModelViewSet):
     def comments(self, request, pk=None):
         """دریافت کامنت‌های تایید شده یک پست"""
         post = self.get_object()
-        comments = post.comments.filter(status='approved')
+        comments = with_comment_relations(post.comments.filter(status='approved'), request.user)
         serializer = CommentSerializer(comments, many=True, context={'request': request})
         return Response(serializer.data)
 
@@ -71,8 +86,10 @@ class CommentViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         # ادمین همه کامنت‌ها را می‌بیند، کاربر فقط کامنت‌های خودش
         if self.request.user.is_staff:
-            return Comment.objects.all()
-        return Comment.objects.filter(user=self.request.user)
+            queryset = Comment.objects.all()
+        else:
+            queryset = Comment.objects.filter(user=self.request.user)
+        return with_comment_relations(queryset, self.request.user)
 
     @action(detail=True, methods=['post'])
     def like(self, request, pk=None):
@@ -96,7 +113,7 @@ class CommentViewSet(viewsets.ModelViewSet):
         if not request.user.is_staff:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
 
-        comments = Comment.objects.filter(status='pending')
+        comments = with_comment_relations(Comment.objects.filter(status='pending'), request.user)
         serializer = self.get_serializer(comments, many=True)
         return Response(serializer.data)
 
@@ -120,4 +137,4 @@ class StoryViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         # فقط استوری‌های منقضی نشده
         from django.utils import timezone
-        return Story.objects.filter(expires_at__gt=timezone.now()).order_by('-created_at')
\ No newline at end of file
+        return Story.objects.filter(expires_at__gt=timezone.now()).select_related('user').order_by('-created_at')
\ No newline at end of file
@@ -1,11 +1,31 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from . import models
+from .services.question_counters import apply_question_changes, question_state, record_question_change
+from .services.question_payload import touch_question
+from .services.question_pool import invalidate_teacher_pool
+from .services.taxonomy import invalidate_taxonomy
+
+
+class TaxonomyCacheMixin:
+    """هر تغییر از طریق پنل ادمین درخت کش شده پایه/درس/فصل را باطل می‌کند"""
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_taxonomy()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_taxonomy()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        invalidate_taxonomy()
 
 
 # ========== 1. مدیریت پایه تحصیلی ==========
 @admin.register(models.Grade)
-class GradeAdmin(admin.ModelAdmin):
+class GradeAdmin(TaxonomyCacheMixin, admin.ModelAdmin):
     list_display = ['id', 'name', 'level', 'order', 'is_active']
     list_editable = ['order', 'is_active']
     list_filter = ['level', 'is_active']
@@ -14,8 +34,8 @@ class GradeAdmin(admin.ModelAdmin):
 
 # ========== 2. مدیریت درس ==========
 @admin.register(models.Subject)
-class SubjectAdmin(admin.ModelAdmin):
-    list_display = ['id', 'name', 'grade', 'is_active']
+class SubjectAdmin(TaxonomyCacheMixin, admin.ModelAdmin):
+    list_display = ['id', 'name', 'grade', 'question_count', 'is_active']
     list_editable = ['is_active']
     list_filter = ['grade', 'is_active']
     search_fields = ['name']
@@ -23,8 +43,8 @@ class SubjectAdmin(admin.ModelAdmin):
 
 # ========== 3. مدیریت فصل ==========
 @admin.register(models.Chapter)
-class ChapterAdmin(admin.ModelAdmin):
-    list_display = ['id', 'name', 'subject', 'grade', 'is_active']
+class ChapterAdmin(TaxonomyCacheMixin, admin.ModelAdmin):
+    list_display = ['id', 'name', 'subject', 'grade', 'question_count', 'is_active']
     list_editable = ['is_active']
     list_filter = ['subject', 'grade', 'is_active']
     search_fields = ['name']
@@ -47,7 +67,7 @@ class QuestionOptionInline(admin.TabularInline):
 
 
 @admin.register(models.Question)
-class QuestionAdmin(admin.ModelAdmin):
+class QuestionAdmin(TaxonomyCacheMixin, admin.ModelAdmin):
     list_display = ['id', 'short_text', 'teacher', 'subject', 'difficulty', 'estimated_time', 'is_active']
     list_editable = ['is_active']
     list_filter = ['subject', 'difficulty', 'grade', 'is_active']
@@ -59,6 +79,33 @@ class QuestionAdmin(admin.ModelAdmin):
 
     short_text.short_description = 'متن سوال'
 
+    def save_model(self, request, obj, form, change):
+        previous = models.Question.objects.filter(pk=obj.pk).first() if change else None
+        super().save_model(request, obj, form, change)
+        record_question_change(question_state(previous), question_state(obj))
+        # ایندکس سوالات معلم قبلی (در صورت تغییر معلم) و فعلی باطل می‌شود
+        for teacher_id in {previous.teacher_id if previous else obj.teacher_id, obj.teacher_id}:
+            invalidate_teacher_pool(teacher_id)
+
+    def delete_model(self, request, obj):
+        before = question_state(obj)
+        super().delete_model(request, obj)
+        record_question_change(before, None)
+        invalidate_teacher_pool(obj.teacher_id)
+
+    def delete_queryset(self, request, queryset):
+        removed = [question_state(question) for question in queryset.filter(is_active=True)]
+        teacher_ids = set(queryset.values_list('teacher_id', flat=True))
+        super().delete_queryset(request, queryset)
+        apply_question_changes(removed=removed)
+        for teacher_id in teacher_ids:
+            invalidate_teacher_pool(teacher_id)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # تغییر گزینه‌ها نسخه داده کش شده سوال را تغییر می‌دهد
+        touch_question(form.instance.id)
+
 
 # ========== 6. مدیریت گزینه سوال ==========
 @admin.register(models.QuestionOption)
@@ -73,6 +120,25 @@ class QuestionOptionAdmin(admin.ModelAdmin):
 
     short_text.short_description = 'متن گزینه'
 
+    # تغییر گزینه‌ها نسخه داده کش شده سوال را تغییر می‌دهد (مانند QuestionAdmin.save_related)
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        touch_question(obj.question_id)
+        invalidate_teacher_pool(obj.question.teacher_id)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        touch_question(obj.question_id)
+        invalidate_teacher_pool(obj.question.teacher_id)
+
+    def delete_queryset(self, request, queryset):
+        questions = set(queryset.values_list('question_id', 'question__teacher_id'))
+        super().delete_queryset(request, queryset)
+        for question_id, _ in questions:
+            touch_question(question_id)
+        for teacher_id in {teacher_id for _, teacher_id in questions}:
+            invalidate_teacher_pool(teacher_id)
+
 
 # ========== 7. مدیریت دانش‌آموز ==========
 @admin.register(models.Student)
@@ -84,12 +150,13 @@ class StudentAdmin(admin.ModelAdmin):
 # ========== 8. مدیریت آزمون ==========
 @admin.register(models.Exam)
 class ExamAdmin(admin.ModelAdmin):
-    list_display = ['id', 'title', 'teacher', 'duration_minutes', 'total_questions_count', 'is_published']
+    list_display = ['id', 'title', 'teacher', 'duration_minutes', 'total_questions_count', 'is_published',
+                    'pregeneration_status', 'pregenerated_count']
     list_editable = ['is_published']
-    list_filter = ['is_published', 'teacher']
+    list_filter = ['is_published', 'selection_mode', 'pregeneration_status', 'teacher']
     search_fields = ['title', 'teacher__first_name']
     filter_horizontal = ['invited_students']
-    readonly_fields = ['created_at']
+    readonly_fields = ['created_at', 'pregeneration_status', 'pregenerated_count', 'pregeneration_updated_at']
 
 
 # ========== 9. مدیریت سوالات انتخابی آزمون ==========
@@ -106,7 +173,23 @@ class ExamAttemptAdmin(admin.ModelAdmin):
     list_display = ['id', 'student', 'exam', 'score', 'total_correct', 'total_questions', 'status', 'start_time']
     list_filter = ['status', 'exam']
     search_fields = ['student__first_name', 'student__last_name', 'exam__title']
-    readonly_fields = ['start_time']
+    readonly_fields = ['start_time', 'selection_seed', 'pool_snapshot', 'slot_question_ids', 'answer_slots', 'correct_bitmap']
+
+
+# ========== مدیریت نسخه‌های بانک سوالات آزمون ==========
+@admin.register(models.QuestionPoolSnapshot)
+class QuestionPoolSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['id', 'exam', 'grade', 'pool_version', 'created_at']
+    list_filter = ['exam']
+    readonly_fields = ['created_at']
+
+
+# ========== مدیریت آمار آزمون‌ها ==========
+@admin.register(models.ExamStatistics)
+class ExamStatisticsAdmin(admin.ModelAdmin):
+    list_display = ['id', 'exam', 'completed_count', 'in_progress_count', 'timeout_count', 'pass_count',
+                    'fail_count', 'updated_at']
+    readonly_fields = ['updated_at']
 
 
 # ========== 11. مدیریت پاسخ‌ها ==========
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from lms.models import Exam, ExamAttempt
+from lms.services.compact_answers import pack_attempts
+
+
+class Command(BaseCommand):
+    help = 'Convert answers of finished exam attempts into the compact per-attempt representation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', type=int, help='Only compact attempts of this exam')
+        parser.add_argument('--keep-rows', action='store_true', help='Do not delete the StudentAnswer rows')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        attempts = ExamAttempt.objects.filter(status__in=['completed', 'timeout'], answer_slots__isnull=True)
+        if options['exam']:
+            attempts = attempts.filter(exam_id=options['exam'])
+
+        exam_ids = attempts.values_list('exam_id', flat=True).distinct().order_by('exam_id')
+        total = 0
+        for exam in Exam.objects.filter(id__in=list(exam_ids)):
+            pending = attempts.filter(exam=exam).select_related('pool_snapshot').order_by('id')
+            packed = 0
+            while True:
+                # تلاش‌های فشرده شده از صف خارج می‌شوند
+                batch = list(pending[:options['batch_size']])
+                if not batch:
+                    break
+                packed += pack_attempts(exam, batch, delete_rows=not options['keep_rows'])
+            total += packed
+            self.stdout.write(f"  ✓ {exam.title}: {packed} تلاش فشرده شد")
+
+        self.stdout.write(f"  ✓ مجموع: {total} تلاش")
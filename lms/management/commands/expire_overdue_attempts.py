@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from lms.services.attempt_expiry import expire_overdue_attempts
+
+
+class Command(BaseCommand):
+    help = (
+        'Finalise in-progress exam attempts whose time is over and mark them as timeout. '
+        'Run it every minute from cron: * * * * * python manage.py expire_overdue_attempts'
+    )
+
+    def handle(self, *args, **options):
+        expired = expire_overdue_attempts()
+        self.stdout.write(f"  ✓ {expired} تلاش به دلیل اتمام زمان بسته شد")
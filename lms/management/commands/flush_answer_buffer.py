@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from lms.services import answer_buffer
+
+
+class Command(BaseCommand):
+    help = 'Flush buffered student answers into StudentAnswer'
+
+    def handle(self, *args, **options):
+        flushed = answer_buffer.flush_all()
+        self.stdout.write(f"  ✓ {flushed} پاسخ در دیتابیس ذخیره شد")
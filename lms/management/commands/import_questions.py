@@ -0,0 +1,54 @@
+import csv
+import time
+from django.core.management.base import BaseCommand, CommandError
+from lms.models import Teacher
+from lms.services import question_import
+
+
+class Command(BaseCommand):
+    help = 'Bulk import questions for a teacher from a CSV or JSON-lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON-lines file')
+        parser.add_argument('--teacher', required=True, help='Teacher id or mobile')
+        parser.add_argument('--format', choices=question_import.FORMATS,
+                            help='File format (detected from the extension by default)')
+        parser.add_argument('--batch-size', type=int, default=question_import.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Validate rows without saving them')
+
+    def handle(self, *args, **options):
+        lookup = {'id': options['teacher']} if options['teacher'].isdigit() and len(options['teacher']) < 11 \
+            else {'mobile': options['teacher']}
+        teacher = Teacher.objects.filter(**lookup).first()
+        if teacher is None:
+            raise CommandError(f"Teacher {options['teacher']} not found")
+
+        fmt = options['format'] or question_import.detect_format(options['path'])
+        if fmt is None:
+            raise CommandError('Unknown file format; pass --format csv or --format jsonl')
+
+        started = time.monotonic()
+        try:
+            with open(options['path'], 'rb') as fileobj:
+                report = question_import.import_questions(
+                    teacher,
+                    question_import.iter_rows(question_import.open_text(fileobj), fmt),
+                    batch_size=options['batch_size'],
+                    dry_run=options['dry_run'],
+                )
+        except OSError as exc:
+            raise CommandError(str(exc))
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise CommandError(f'File is not readable (encoding must be UTF-8): {exc}')
+
+        for error in report['errors']:
+            messages = '، '.join(f"{field}: {message}" for field, message in error['errors'].items())
+            self.stdout.write(self.style.WARNING(f"  ✗ ردیف {error['row']}: {messages}"))
+        if report['failed'] > len(report['errors']):
+            self.stdout.write(f"  … و {report['failed'] - len(report['errors'])} خطای دیگر")
+
+        verb = 'معتبر' if options['dry_run'] else 'وارد شد'
+        self.stdout.write(self.style.SUCCESS(
+            f"  ✓ {report['created']} سوال {verb}، {report['failed']} ردیف نامعتبر "
+            f"از {report['total']} ردیف در {time.monotonic() - started:.1f} ثانیه"
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from lms.services.paper_generation import claim_pregeneration, pending_exams, pregenerate_exam_papers
+
+
+class Command(BaseCommand):
+    help = (
+        'Pre-generate personalised question papers for published exams that are pending, failed or stalled. '
+        'Run it every minute from cron: * * * * * python manage.py pregenerate_exam_papers'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', type=int, help='Only generate papers for this exam id')
+
+    def handle(self, *args, **options):
+        if options['exam']:
+            exam_ids = [options['exam']]
+        else:
+            exam_ids = list(pending_exams().values_list('id', flat=True))
+
+        for exam_id in exam_ids:
+            # هر آزمون درست قبل از ساخت برداشته می‌شود تا اجرای همزمان cron آن را تکرار نکند
+            if not options['exam'] and not claim_pregeneration(exam_id):
+                continue
+            try:
+                generated = pregenerate_exam_papers(exam_id)
+            except Exception:
+                # جزئیات خطا در لاگ lms.services.paper_generation ثبت شده است
+                self.stderr.write(self.style.ERROR(f"  ✗ آزمون {exam_id}: ساخت سوالات ناموفق بود"))
+                continue
+            self.stdout.write(f"  ✓ آزمون {exam_id}: سوالات {generated} دانش‌آموز آماده شد")
@@ -0,0 +1,43 @@
+import math
+from django.core.management.base import BaseCommand
+from lms.models import Exam, ExamStatistics
+from lms.services.exam_statistics import compute_exam_statistics, rebuild_exam_statistics
+
+
+def _differs(current, expected):
+    # مجموع درصدها اعشاری است و ترتیب جمع زدن می‌تواند خطای گرد کردن ایجاد کند
+    if isinstance(expected, float):
+        return not math.isclose(current, expected, abs_tol=1e-6)
+    return current != expected
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the ExamStatistics table from exam attempts and report drifted rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', type=int, help='Only rebuild statistics for this exam id')
+        parser.add_argument('--check', action='store_true', help='Only report mismatches without writing')
+
+    def handle(self, *args, **options):
+        exam_ids = [options['exam']] if options['exam'] else Exam.objects.values_list('id', flat=True)
+        existing = ExamStatistics.objects.in_bulk(field_name='exam_id')
+
+        mismatched = 0
+        for exam_id in exam_ids:
+            expected = compute_exam_statistics(exam_id)
+            stats = existing.get(exam_id)
+            drifted = [
+                field for field, value in expected.items()
+                if stats is not None and _differs(getattr(stats, field), value)
+            ]
+            if drifted:
+                mismatched += 1
+                self.stdout.write(self.style.WARNING(f"  ✗ آزمون {exam_id}: اختلاف در {', '.join(drifted)}"))
+
+            if not options['check']:
+                rebuild_exam_statistics(exam_id)
+
+        if options['check']:
+            self.stdout.write(f"  {mismatched} آزمون دارای اختلاف آماری است")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"  ✓ آمار آزمون‌ها بازسازی شد ({mismatched} مورد اصلاح شد)"))
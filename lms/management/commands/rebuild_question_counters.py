@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from lms.services.question_counters import reconcile_question_counters
+from lms.services.taxonomy import invalidate_taxonomy
+
+
+class Command(BaseCommand):
+    help = 'Recompute subject, chapter and teacher question counters from the question table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report mismatches without writing')
+
+    def handle(self, *args, **options):
+        drift = reconcile_question_counters(check=options['check'])
+        mismatched = sum(drift.values())
+        details = f"درس: {drift['subjects']}، فصل: {drift['chapters']}، معلم/درجه سختی: {drift['teachers']}"
+
+        if options['check']:
+            self.stdout.write(f"  {mismatched} شمارنده دارای اختلاف است ({details})")
+            return
+
+        if mismatched:
+            invalidate_taxonomy()
+        self.stdout.write(self.style.SUCCESS(f"  ✓ شمارنده‌های سوالات بازسازی شد ({mismatched} مورد اصلاح شد: {details})"))
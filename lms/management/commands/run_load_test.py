@@ -0,0 +1,64 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from lms.models import Exam
+from lms.services import load_test
+
+
+class Command(BaseCommand):
+    help = 'Simulate students starting an exam at the same time and report latency percentiles and queries per endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', type=int, help='Open exam id (default: the open exam with most invitations)')
+        parser.add_argument('--students', type=int, default=50, help='Number of concurrent virtual students')
+        parser.add_argument('--base-url', help='Send requests to a running server instead of in-process')
+        parser.add_argument('--answer-interval', type=float, default=0.0,
+                            help='Mean seconds between answers of a student')
+        parser.add_argument('--dashboard-polls', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--reset', action='store_true',
+                            help='Delete previous attempts and stored question papers of the exam first')
+        parser.add_argument('--keep-papers', action='store_true',
+                            help='With --reset, keep stored (e.g. pregenerated) question papers')
+        parser.add_argument('--json', dest='json_path', help='Also write the report to this file')
+
+    def handle(self, *args, **options):
+        if options['exam']:
+            exam = Exam.objects.filter(pk=options['exam']).first()
+        else:
+            exam = load_test.pick_exam()
+        if exam is None:
+            raise CommandError('No open exam found; run seed_lms_scale or pass --exam')
+
+        if options['reset']:
+            load_test.reset_exam(exam, keep_papers=options['keep_papers'])
+
+        students = load_test.pick_students(exam, options['students'])
+        if not students:
+            raise CommandError('No invited student without an attempt; run again with --reset')
+
+        self.stdout.write(f"  ✓ آزمون {exam.id} با {len(students)} دانش‌آموز همزمان")
+        result = load_test.run_load_test(
+            exam, students,
+            base_url=options['base_url'],
+            answer_interval=options['answer_interval'],
+            dashboard_polls=options['dashboard_polls'],
+            seed=options['seed'],
+        )
+
+        header = f"{'endpoint':<10} {'requests':>8} {'errors':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'queries':>8}"
+        self.stdout.write(header)
+        for endpoint, stats in result['endpoints'].items():
+            self.stdout.write(
+                f"{endpoint:<10} {stats['requests']:>8} {stats['errors']:>6} {stats['p50_ms']:>8} "
+                f"{stats['p95_ms']:>8} {stats['p99_ms']:>8} {stats['max_ms']:>8} {str(stats['queries_avg']):>8}"
+            )
+        self.stdout.write(f"  ✓ مدت اجرا: {result['duration_s']} ثانیه")
+        for endpoint, stats in result['endpoints'].items():
+            for message, count in stats['error_messages'].items():
+                self.stdout.write(self.style.WARNING(f"  ✗ {endpoint}: {count} × {message}"))
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f"  ✗ {error}"))
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as report_file:
+                json.dump({'exam_id': exam.id, **result}, report_file, ensure_ascii=False, indent=2)
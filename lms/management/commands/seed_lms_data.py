@@ -2,6 +2,8 @@ from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
 from lms.models import Grade, Subject, Chapter, Teacher, Student, Question, QuestionOption, Skill
 from django.utils import timezone
+from lms.services.question_counters import reconcile_question_counters
+from lms.services.taxonomy import invalidate_taxonomy
 
 User = get_user_model()
 
@@ -177,6 +179,8 @@ class Command(BaseCommand):
             ])
 
         self.stdout.write(f"  ✓ {Question.objects.filter(teacher=teacher).count()} سوال نمونه ایجاد شد")
+        reconcile_question_counters()
+        invalidate_taxonomy()
 
         # ========== 6. ایجاد دانش‌آموزان نمونه ==========
         students_data = [
@@ -0,0 +1,47 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from lms.services import synthetic_data
+
+
+class Command(BaseCommand):
+    help = 'Generate a large deterministic LMS dataset with bulk inserts for benchmarking (DEBUG only)'
+
+    def add_arguments(self, parser):
+        defaults = synthetic_data.DEFAULT_COUNTS
+        parser.add_argument('--teachers', type=int, default=defaults['teachers'])
+        parser.add_argument('--questions', type=int, default=defaults['questions'])
+        parser.add_argument('--students', type=int, default=defaults['students'])
+        parser.add_argument('--exams', type=int, default=defaults['exams'])
+        parser.add_argument('--invites-per-exam', type=int, default=defaults['invites_per_exam'])
+        parser.add_argument('--seed', type=int, default=synthetic_data.DEFAULT_SEED)
+        parser.add_argument('--batch-size', type=int, default=synthetic_data.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--flush', action='store_true', help='Delete previously generated data first')
+        parser.add_argument('--i-know-this-is-not-prod', action='store_true', dest='not_prod',
+                            help='Allow running with DEBUG off (benchmark databases only)')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['not_prod']:
+            raise CommandError(
+                'Refusing to generate or flush synthetic data with DEBUG off; '
+                'pass --i-know-this-is-not-prod on a benchmark database'
+            )
+
+        if options['flush']:
+            synthetic_data.flush_synthetic_data()
+            self.stdout.write("  ✓ داده‌های قبلی حذف شد")
+        elif synthetic_data.synthetic_users().exists():
+            raise CommandError('Synthetic data already exists; run again with --flush to regenerate it')
+
+        started = time.monotonic()
+        created = synthetic_data.generate(
+            counts={key: options[key] for key in synthetic_data.DEFAULT_COUNTS},
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            log=lambda message: self.stdout.write(f"  ✓ {message}")
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"  ✓ ساخت داده‌ها در {time.monotonic() - started:.1f} ثانیه: "
+            + ', '.join(f"{key}={value}" for key, value in created.items())
+        ))
@@ -0,0 +1,40 @@
+# lms/middleware.py
+import time
+from django.conf import settings
+from django.db import connection
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+class QueryCountMiddleware:
+    """
+    تعداد و زمان کوئری‌های هر درخواست در هدرهای X-DB-Queries و X-DB-Time-Ms
+
+    فقط با LMS_QUERY_COUNT_HEADER فعال می‌شود (برای تست بار و بنچمارک).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'LMS_QUERY_COUNT_HEADER', False):
+            return self.get_response(request)
+
+        counter = _QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        response['X-DB-Queries'] = str(counter.count)
+        response['X-DB-Time-Ms'] = f"{counter.duration * 1000:.1f}"
+        return response
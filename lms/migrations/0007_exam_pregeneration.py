@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-17 06:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0006_exam_chapter_exam_grade_exam_subject'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='pregenerated_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='تعداد دانش\u200cآموزان آماده شده'),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='pregeneration_status',
+            field=models.CharField(choices=[('not_started', 'شروع نشده'), ('pending', 'در صف'), ('running', 'در حال ساخت'), ('completed', 'تکمیل شده'), ('failed', 'ناموفق')], default='not_started', max_length=20, verbose_name='وضعیت ساخت سوالات'),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='pregeneration_updated_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='آخرین پیشرفت ساخت سوالات'),
+        ),
+        migrations.AddField(
+            model_name='examquestionselection',
+            name='option_order',
+            field=models.JSONField(blank=True, default=list, verbose_name='ترتیب گزینه\u200cها'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2 on 2026-10-17 06:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0007_exam_pregeneration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='selection_mode',
+            field=models.CharField(choices=[('stored', 'ذخیره سوالات هر دانش\u200cآموز'), ('seeded', 'ساخت مجدد سوالات از روی seed')], default='stored', max_length=10, verbose_name='روش نگهداری سوالات دانش\u200cآموز'),
+        ),
+        migrations.AddField(
+            model_name='examattempt',
+            name='selection_seed',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='seed انتخاب سوالات'),
+        ),
+        migrations.CreateModel(
+            name='QuestionPoolSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pool_version', models.BigIntegerField(verbose_name='نسخه بانک سوالات')),
+                ('question_ids', models.JSONField(default=dict, verbose_name='شناسه سوالات')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pool_snapshots', to='lms.exam')),
+                ('grade', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='lms.grade', verbose_name='پایه تحصیلی')),
+            ],
+            options={
+                'verbose_name': 'نسخه بانک سوالات آزمون',
+                'verbose_name_plural': 'نسخه\u200cهای بانک سوالات آزمون',
+                'unique_together': {('exam', 'grade', 'pool_version')},
+            },
+        ),
+        migrations.AddField(
+            model_name='examattempt',
+            name='pool_snapshot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attempts', to='lms.questionpoolsnapshot', verbose_name='نسخه بانک سوالات'),
+        ),
+    ]
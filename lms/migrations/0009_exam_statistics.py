@@ -0,0 +1,43 @@
+# Generated by Django 4.2 on 2026-10-17 06:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0008_seeded_question_selection'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_count', models.PositiveIntegerField(default=0, verbose_name='تعداد تکمیل شده')),
+                ('in_progress_count', models.PositiveIntegerField(default=0, verbose_name='تعداد در حال انجام')),
+                ('timeout_count', models.PositiveIntegerField(default=0, verbose_name='تعداد زمان تمام شده')),
+                ('score_sum', models.PositiveBigIntegerField(default=0, verbose_name='مجموع نمرات')),
+                ('percentage_sum', models.FloatField(default=0, verbose_name='مجموع درصدها')),
+                ('pass_count', models.PositiveIntegerField(default=0, verbose_name='تعداد قبولی')),
+                ('fail_count', models.PositiveIntegerField(default=0, verbose_name='تعداد مردودی')),
+                ('bucket_0', models.PositiveIntegerField(default=0)),
+                ('bucket_1', models.PositiveIntegerField(default=0)),
+                ('bucket_2', models.PositiveIntegerField(default=0)),
+                ('bucket_3', models.PositiveIntegerField(default=0)),
+                ('bucket_4', models.PositiveIntegerField(default=0)),
+                ('bucket_5', models.PositiveIntegerField(default=0)),
+                ('bucket_6', models.PositiveIntegerField(default=0)),
+                ('bucket_7', models.PositiveIntegerField(default=0)),
+                ('bucket_8', models.PositiveIntegerField(default=0)),
+                ('bucket_9', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('exam', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='lms.exam')),
+            ],
+            options={
+                'verbose_name': 'آمار آزمون',
+                'verbose_name_plural': 'آمار آزمون\u200cها',
+            },
+        ),
+    ]
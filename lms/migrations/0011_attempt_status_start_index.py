@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-17 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0010_question_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['status', 'start_time'], name='lms_attempt_status_start_idx'),
+        ),
+    ]
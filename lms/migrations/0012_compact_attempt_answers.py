@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-17 06:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0011_attempt_status_start_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examattempt',
+            name='answer_slots',
+            field=models.BinaryField(blank=True, null=True, verbose_name='شماره گزینه انتخابی هر سوال'),
+        ),
+        migrations.AddField(
+            model_name='examattempt',
+            name='correct_bitmap',
+            field=models.BinaryField(blank=True, null=True, verbose_name='بیت\u200cهای پاسخ صحیح'),
+        ),
+        migrations.AddField(
+            model_name='examattempt',
+            name='slot_question_ids',
+            field=models.JSONField(blank=True, null=True, verbose_name='شناسه سوالات برگه'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# جستجوی متن کامل بانک سوالات (فقط PostgreSQL)
+#
+# - تابع lms_normalize_fa: یکسان‌سازی ي/ى -> ی، ك -> ک، ارقام فارسی و عربی -> لاتین،
+#   نیم‌فاصله -> فاصله (همان NORMALIZE_MAP در lms/services/question_search.py)
+# - ستون تولیدی search_vector روی متن و توضیح سوال با ایندکس GIN
+# - در صورت موجود بودن افزونه pg_trgm، ایندکس trigram روی متن یکسان شده
+#
+# روی SQLite کاری انجام نمی‌شود و جستجو با LIKE روی متن یکسان شده انجام می‌شود.
+
+from django.db import DatabaseError, migrations, transaction
+
+NORMALIZE_FUNCTION = """
+CREATE OR REPLACE FUNCTION lms_normalize_fa(value text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT translate(lower(coalesce(value, '')),
+                     'يىك' || chr(8204) || '۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩',
+                     'ییک ' || '01234567890123456789')
+$$
+"""
+
+SEARCH_VECTOR_COLUMN = """
+ALTER TABLE lms_question ADD COLUMN search_vector tsvector
+GENERATED ALWAYS AS (
+    to_tsvector('simple'::regconfig, lms_normalize_fa(text) || ' ' || lms_normalize_fa(explanation))
+) STORED
+"""
+
+SEARCH_VECTOR_INDEX = "CREATE INDEX lms_question_search_idx ON lms_question USING gin (search_vector)"
+
+TRIGRAM_INDEX = """
+CREATE INDEX lms_question_text_trgm_idx ON lms_question USING gin (lms_normalize_fa(text) gin_trgm_ops)
+"""
+
+
+def create_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(NORMALIZE_FUNCTION)
+    schema_editor.execute(SEARCH_VECTOR_COLUMN)
+    schema_editor.execute(SEARCH_VECTOR_INDEX)
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    try:
+        # ساخت افزونه ممکن است به دسترسی بیشتری نیاز داشته باشد؛ جستجو بدون آن هم کار می‌کند
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DatabaseError:
+        return
+    schema_editor.execute(TRIGRAM_INDEX)
+
+
+def drop_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute("DROP INDEX IF EXISTS lms_question_text_trgm_idx")
+    schema_editor.execute("DROP INDEX IF EXISTS lms_question_search_idx")
+    schema_editor.execute("ALTER TABLE lms_question DROP COLUMN IF EXISTS search_vector")
+    schema_editor.execute("DROP FUNCTION IF EXISTS lms_normalize_fa(text)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0012_compact_attempt_answers'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search, drop_search),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-17 06:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0013_question_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['teacher', 'created_at', 'id'], name='lms_exam_teacher_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['student', 'start_time', 'id'], name='lms_attempt_student_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['exam', 'score', 'id'], name='lms_attempt_exam_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['teacher', 'is_active', 'created_at', 'id'], name='lms_question_teacher_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['created_by', 'registered_at', 'id'], name='lms_student_creator_list_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2 on 2026-10-17 06:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    Question = apps.get_model('lms', 'Question')
+    Subject = apps.get_model('lms', 'Subject')
+    Chapter = apps.get_model('lms', 'Chapter')
+    TeacherQuestionCounter = apps.get_model('lms', 'TeacherQuestionCounter')
+    active = Question.objects.filter(is_active=True).order_by()
+
+    for subject_id, total in active.values('subject_id').annotate(total=models.Count('id')).values_list(
+        'subject_id', 'total'
+    ):
+        Subject.objects.filter(id=subject_id).update(question_count=total)
+    for chapter_id, total in active.exclude(chapter_id=None).values('chapter_id').annotate(
+        total=models.Count('id')
+    ).values_list('chapter_id', 'total'):
+        Chapter.objects.filter(id=chapter_id).update(question_count=total)
+    TeacherQuestionCounter.objects.bulk_create([
+        TeacherQuestionCounter(teacher_id=teacher_id, difficulty=difficulty, count=total)
+        for teacher_id, difficulty, total in active.values('teacher_id', 'difficulty').annotate(
+            total=models.Count('id')
+        ).values_list('teacher_id', 'difficulty', 'total')
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0014_list_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chapter',
+            name='question_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='تعداد سوالات فعال'),
+        ),
+        migrations.AddField(
+            model_name='subject',
+            name='question_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='تعداد سوالات فعال'),
+        ),
+        migrations.CreateModel(
+            name='TeacherQuestionCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('difficulty', models.CharField(choices=[('easy', 'آسان'), ('medium', 'متوسط'), ('hard', 'سخت')], max_length=10, verbose_name='درجه سختی')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='تعداد سوالات فعال')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_counters', to='lms.teacher')),
+            ],
+            options={
+                'verbose_name': 'تعداد سوالات معلم',
+                'verbose_name_plural': 'تعداد سوالات معلم\u200cها',
+                'unique_together': {('teacher', 'difficulty')},
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
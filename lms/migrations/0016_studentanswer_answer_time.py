@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-17 07:24
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0015_question_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='studentanswer',
+            name='answer_time',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
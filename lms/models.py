@@ -48,6 +48,8 @@ class Subject(models.Model):
     grade = models.ForeignKey(Grade, on_delete=models.CASCADE, related_name='subjects')
     name = models.CharField(max_length=100, verbose_name='نام درس')
     is_active = models.BooleanField(default=True)
+    # تعداد سوالات فعال (با services/question_counters نگهداری می‌شود)
+    question_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='تعداد سوالات فعال')
 
     class Meta:
         verbose_name = 'درس'
@@ -63,6 +65,9 @@ class Chapter(models.Model):
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='chapters')
     name = models.CharField(max_length=100, verbose_name='عنوان فصل')
     is_active = models.BooleanField(default=True)
+    # تعداد سوالات فعال (با services/question_counters نگهداری می‌شود)
+    question_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='تعداد سوالات فعال')
+
     class Meta:
         verbose_name = 'فصل'
         verbose_name_plural = 'فصل‌ها'
@@ -195,15 +200,37 @@ class Question(models.Model):
     # وضعیت
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # نسخه سوال برای کش داده نمایشی (با تغییر سوال یا گزینه‌ها تغییر می‌کند)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'سوال'
         verbose_name_plural = 'بانک سوالات'
+        indexes = [
+            # صفحه‌بندی keyset لیست سوالات معلم (جدیدترین‌ها اول)
+            models.Index(fields=['teacher', 'is_active', 'created_at', 'id'], name='lms_question_teacher_list_idx'),
+        ]
 
     def __str__(self):
         return f"{self.text[:50]}..."
 
 
+# ========== مدل تعداد سوالات فعال هر معلم به تفکیک درجه سختی ==========
+class TeacherQuestionCounter(models.Model):
+    """با ایجاد، ویرایش و حذف سوال در همان تراکنش بروزرسانی می‌شود (services/question_counters)"""
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='question_counters')
+    difficulty = models.CharField(max_length=10, choices=Question.DIFFICULTY_CHOICES, verbose_name='درجه سختی')
+    count = models.PositiveIntegerField(default=0, verbose_name='تعداد سوالات فعال')
+
+    class Meta:
+        verbose_name = 'تعداد سوالات معلم'
+        verbose_name_plural = 'تعداد سوالات معلم‌ها'
+        unique_together = ['teacher', 'difficulty']
+
+    def __str__(self):
+        return f"{self.teacher} - {self.difficulty}: {self.count}"
+
+
 # ========== مدل گزینه‌های سوال (دقیقا ۴ گزینه) ==========
 class QuestionOption(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='options')
@@ -253,12 +280,29 @@ class Student(models.Model):
     class Meta:
         verbose_name = 'دانش‌آموز'
         verbose_name_plural = 'دانش‌آموزان'
+        indexes = [
+            # صفحه‌بندی keyset لیست دانش‌آموزان معلم
+            models.Index(fields=['created_by', 'registered_at', 'id'], name='lms_student_creator_list_idx'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
 # ========== مدل آزمون (با تمام شرایط برگزاری) ==========
 class Exam(models.Model):
+    SELECTION_MODE_CHOICES = (
+        ('stored', 'ذخیره سوالات هر دانش‌آموز'),
+        ('seeded', 'ساخت مجدد سوالات از روی seed'),
+    )
+
+    PREGENERATION_STATUS_CHOICES = (
+        ('not_started', 'شروع نشده'),
+        ('pending', 'در صف'),
+        ('running', 'در حال ساخت'),
+        ('completed', 'تکمیل شده'),
+        ('failed', 'ناموفق'),
+    )
+
     # اطلاعات پایه
     teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='exams')
     title = models.CharField(max_length=200, verbose_name='عنوان آزمون')
@@ -288,6 +332,10 @@ class Exam(models.Model):
     # تنظیمات رندوم
     randomize_questions = models.BooleanField(default=True, verbose_name='آزمون به صورت رندم ایجاد شود')
     randomize_options = models.BooleanField(default=False, verbose_name='پاسخ‌ها به صورت رندوم گزینه‌ها جابجا شوند')
+    # در حالت seeded فقط seed و نسخه بانک سوالات برای هر تلاش ذخیره می‌شود
+    # (برای آزمون‌هایی که بانک سوالاتشان در طول آزمون تغییر می‌کند حالت stored مناسب‌تر است)
+    selection_mode = models.CharField(max_length=10, choices=SELECTION_MODE_CHOICES, default='stored',
+                                      verbose_name='روش نگهداری سوالات دانش‌آموز')
 
     # نمایش نتایج
     show_answer_key_immediately = models.BooleanField(default=False,
@@ -298,6 +346,13 @@ class Exam(models.Model):
     is_published = models.BooleanField(default=False, verbose_name='منتشر شده')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # ساخت پیش‌از‌موعد سوالات هر دانش‌آموز (بعد از انتشار)
+    pregeneration_status = models.CharField(max_length=20, choices=PREGENERATION_STATUS_CHOICES,
+                                            default='not_started', verbose_name='وضعیت ساخت سوالات')
+    pregenerated_count = models.PositiveIntegerField(default=0, verbose_name='تعداد دانش‌آموزان آماده شده')
+    # با هر دسته ساخته شده بروز می‌شود؛ اجرای running بدون پیشرفت متوقف شده محسوب می‌شود
+    pregeneration_updated_at = models.DateTimeField(null=True, blank=True, verbose_name='آخرین پیشرفت ساخت سوالات')
+
     # دانش‌آموزان دعوت شده (بر اساس موبایل)
     invited_students = models.ManyToManyField(Student, related_name='invited_exams', blank=True,
                                               verbose_name='دانش‌آموزان شرکت‌کننده')
@@ -305,6 +360,10 @@ class Exam(models.Model):
     class Meta:
         verbose_name = 'آزمون'
         verbose_name_plural = 'آزمون‌ها'
+        indexes = [
+            # صفحه‌بندی keyset لیست آزمون‌های معلم
+            models.Index(fields=['teacher', 'created_at', 'id'], name='lms_exam_teacher_list_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -340,6 +399,8 @@ class ExamQuestionSelection(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='exam_questions')
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     order = models.PositiveIntegerField(default=0, verbose_name='ترتیب سوال در آزمون این دانش‌آموز')
+    # ترتیب شناسه گزینه‌ها برای این دانش‌آموز (خالی = ترتیب پیش‌فرض)
+    option_order = models.JSONField(default=list, blank=True, verbose_name='ترتیب گزینه‌ها')
 
     class Meta:
         unique_together = ['exam', 'student', 'question']
@@ -349,6 +410,24 @@ class ExamQuestionSelection(models.Model):
         return f"{self.student} - {self.exam.title} - Q{self.order}"
 
 
+# ========== مدل نسخه ثابت بانک سوالات یک آزمون (برای حالت seeded) ==========
+class QuestionPoolSnapshot(models.Model):
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='pool_snapshots')
+    grade = models.ForeignKey(Grade, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='پایه تحصیلی')
+    pool_version = models.BigIntegerField(verbose_name='نسخه بانک سوالات')
+    # شناسه سوالات به تفکیک درجه سختی: {'easy': [...], 'medium': [...], 'hard': [...]}
+    question_ids = models.JSONField(default=dict, verbose_name='شناسه سوالات')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'نسخه بانک سوالات آزمون'
+        verbose_name_plural = 'نسخه‌های بانک سوالات آزمون'
+        unique_together = ['exam', 'grade', 'pool_version']
+
+    def __str__(self):
+        return f"{self.exam.title} - v{self.pool_version}"
+
+
 # ========== مدل تلاش دانش‌آموز در آزمون ==========
 class ExamAttempt(models.Model):
     STATUS_CHOICES = (
@@ -370,9 +449,26 @@ class ExamAttempt(models.Model):
     end_time = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
 
+    # حالت seeded: سوالات و ترتیب گزینه‌ها از روی seed و نسخه بانک سوالات دوباره ساخته می‌شوند
+    selection_seed = models.BigIntegerField(null=True, blank=True, verbose_name='seed انتخاب سوالات')
+    pool_snapshot = models.ForeignKey(QuestionPoolSnapshot, on_delete=models.SET_NULL, null=True, blank=True,
+                                      related_name='attempts', verbose_name='نسخه بانک سوالات')
+
+    # نسخه فشرده پاسخ‌ها پس از پایان تلاش (جایگزین ردیف‌های StudentAnswer، خالی = ذخیره نشده)
+    slot_question_ids = models.JSONField(null=True, blank=True, verbose_name='شناسه سوالات برگه')
+    answer_slots = models.BinaryField(null=True, blank=True, verbose_name='شماره گزینه انتخابی هر سوال')
+    correct_bitmap = models.BinaryField(null=True, blank=True, verbose_name='بیت‌های پاسخ صحیح')
+
     class Meta:
         verbose_name = 'شرکت در آزمون'
         verbose_name_plural = 'شرکت‌های در آزمون'
+        indexes = [
+            # پیدا کردن تلاش‌های منقضی شده توسط attempt_expiry
+            models.Index(fields=['status', 'start_time'], name='lms_attempt_status_start_idx'),
+            # صفحه‌بندی keyset تلاش‌های دانش‌آموز و نتایج آزمون
+            models.Index(fields=['student', 'start_time', 'id'], name='lms_attempt_student_list_idx'),
+            models.Index(fields=['exam', 'score', 'id'], name='lms_attempt_exam_score_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student} - {self.exam.title}"
@@ -390,7 +486,8 @@ class StudentAnswer(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     selected_option = models.ForeignKey(QuestionOption, on_delete=models.CASCADE, null=True, blank=True)
     is_correct = models.BooleanField(default=False)
-    answer_time = models.DateTimeField(auto_now_add=True)
+    # زمان ثبت پاسخ؛ برای پاسخ‌های بافر شده زمان ارسال پاسخ (نه زمان ذخیره دسته‌ای)
+    answer_time = models.DateTimeField(default=timezone.now)
 
     class Meta:
         verbose_name = 'پاسخ دانش‌آموز'
@@ -398,4 +495,46 @@ class StudentAnswer(models.Model):
         unique_together = ['attempt', 'question']
 
     def __str__(self):
-        return f"{self.attempt.student} - {self.question.text[:30]}"
\ No newline at end of file
+        return f"{self.attempt.student} - {self.question.text[:30]}"
+
+# ========== مدل آمار تجمیعی آزمون ==========
+class ExamStatistics(models.Model):
+    """آمار هر آزمون که با پایان هر تلاش به صورت افزایشی بروزرسانی می‌شود"""
+    HISTOGRAM_BUCKETS = 10
+
+    exam = models.OneToOneField(Exam, on_delete=models.CASCADE, related_name='statistics')
+    completed_count = models.PositiveIntegerField(default=0, verbose_name='تعداد تکمیل شده')
+    in_progress_count = models.PositiveIntegerField(default=0, verbose_name='تعداد در حال انجام')
+    timeout_count = models.PositiveIntegerField(default=0, verbose_name='تعداد زمان تمام شده')
+    score_sum = models.PositiveBigIntegerField(default=0, verbose_name='مجموع نمرات')
+    percentage_sum = models.FloatField(default=0, verbose_name='مجموع درصدها')
+    pass_count = models.PositiveIntegerField(default=0, verbose_name='تعداد قبولی')
+    fail_count = models.PositiveIntegerField(default=0, verbose_name='تعداد مردودی')
+    # توزیع درصد تلاش‌های تکمیل شده در بازه‌های ۱۰ درصدی (آخرین بازه شامل ۱۰۰ است)؛
+    # ستون جدا برای هر بازه تا بروزرسانی با UPDATE ... SET bucket_n = bucket_n + 1 انجام شود
+    bucket_0 = models.PositiveIntegerField(default=0)
+    bucket_1 = models.PositiveIntegerField(default=0)
+    bucket_2 = models.PositiveIntegerField(default=0)
+    bucket_3 = models.PositiveIntegerField(default=0)
+    bucket_4 = models.PositiveIntegerField(default=0)
+    bucket_5 = models.PositiveIntegerField(default=0)
+    bucket_6 = models.PositiveIntegerField(default=0)
+    bucket_7 = models.PositiveIntegerField(default=0)
+    bucket_8 = models.PositiveIntegerField(default=0)
+    bucket_9 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'آمار آزمون'
+        verbose_name_plural = 'آمار آزمون‌ها'
+
+    def __str__(self):
+        return f"آمار {self.exam.title}"
+
+    @staticmethod
+    def bucket_field(index):
+        return f"bucket_{index}"
+
+    @property
+    def histogram(self):
+        return [getattr(self, self.bucket_field(i)) for i in range(self.HISTOGRAM_BUCKETS)]
@@ -36,6 +36,7 @@ from .exam_attempt_serializers import (
     StartExamRequestSerializer,
     StartExamResponseSerializer,
     SubmitAnswerSerializer,
+    SubmitAnswersBatchSerializer,
     FinishExamResponseSerializer,
     ExamQuestionSerializer,
 )
@@ -81,6 +82,7 @@ __all__ = [
     'StartExamRequestSerializer',
     'StartExamResponseSerializer',
     'SubmitAnswerSerializer',
+    'SubmitAnswersBatchSerializer',
     'FinishExamResponseSerializer',
     'ExamQuestionSerializer',
 ]
\ No newline at end of file
@@ -1,6 +1,6 @@
 # lms/serializers/common_serializers.py
 from rest_framework import serializers
-from ..models import Grade, Subject, Chapter, Question
+from ..models import Grade, Subject, Chapter
 
 
 class GradeSerializer(serializers.ModelSerializer):
@@ -17,6 +17,8 @@ class GradeSerializer(serializers.ModelSerializer):
         ]
 
     def get_subject_count(self, obj):
+        if hasattr(obj, 'subject_total'):
+            return obj.subject_total
         return obj.subjects.filter(is_active=True).count()
 
 
@@ -26,7 +28,6 @@ class SubjectSerializer(serializers.ModelSerializer):
     grade_name = serializers.CharField(source='grade.name', read_only=True)
     grade_level = serializers.CharField(source='grade.level', read_only=True)
     chapter_count = serializers.SerializerMethodField(read_only=True)
-    question_count = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Subject
@@ -34,22 +35,19 @@ class SubjectSerializer(serializers.ModelSerializer):
             'id', 'name', 'grade', 'grade_name', 'grade_level',
             'is_active', 'chapter_count', 'question_count'
         ]
+        read_only_fields = ['question_count']
 
     def get_chapter_count(self, obj):
+        if hasattr(obj, 'chapter_total'):
+            return obj.chapter_total
         return obj.chapters.filter(is_active=True).count()
 
-    def get_question_count(self, obj):
-        # اصلاح: استفاده از related_name صحیح
-        # در مدل Question، فیلد subject داریم و related_name پیش‌فرض 'question_set' است
-        return Question.objects.filter(subject=obj, is_active=True).count()
-
 
 class ChapterSerializer(serializers.ModelSerializer):
     """سریالایزر فصل"""
 
     subject_name = serializers.CharField(source='subject.name', read_only=True)
     grade_name = serializers.CharField(source='grade.name', read_only=True)
-    question_count = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Chapter
@@ -57,7 +55,4 @@ class ChapterSerializer(serializers.ModelSerializer):
             'id', 'name', 'subject', 'subject_name', 'grade', 'grade_name',
             'is_active', 'question_count'
         ]
-
-    def get_question_count(self, obj):
-        # اصلاح: استفاده از related_name صحیح
-        return Question.objects.filter(chapter=obj, is_active=True).count()
\ No newline at end of file
+        read_only_fields = ['question_count']
\ No newline at end of file
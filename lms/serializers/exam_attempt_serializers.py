@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.utils import timezone
 from ..models import ExamAttempt, StudentAnswer, Question, QuestionOption, Exam, Student
+from ..services.compact_answers import is_compact, load_answer_sheet
 
 
 class ExamQuestionOptionSerializer(serializers.ModelSerializer):
@@ -106,7 +107,7 @@ class ExamAttemptDetailSerializer(serializers.ModelSerializer):
 
     student_name = serializers.SerializerMethodField(read_only=True)
     exam_title = serializers.CharField(source='exam.title', read_only=True)
-    answers = StudentAnswerSerializer(many=True, read_only=True)
+    answers = serializers.SerializerMethodField(read_only=True)
     score_percentage = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
@@ -120,6 +121,25 @@ class ExamAttemptDetailSerializer(serializers.ModelSerializer):
     def get_student_name(self, obj):
         return f"{obj.student.first_name} {obj.student.last_name}"
 
+    def get_answers(self, obj):
+        if not is_compact(obj):
+            answers = obj.answers.select_related('question', 'selected_option')
+            return StudentAnswerSerializer(answers, many=True).data
+
+        # پاسخ‌های فشرده شناسه و زمان ثبت جداگانه ندارند
+        return [
+            {
+                'id': None,
+                'question': answer['question'].id,
+                'question_text': answer['question'].text,
+                'selected_option': answer['selected_option'].id if answer['selected_option'] else None,
+                'selected_option_text': answer['selected_option'].text if answer['selected_option'] else None,
+                'is_correct': answer['is_correct'],
+                'answer_time': None,
+            }
+            for answer in load_answer_sheet(obj)
+        ]
+
     def get_score_percentage(self, obj):
         if obj.total_questions == 0:
             return 0
@@ -194,6 +214,31 @@ class SubmitAnswerSerializer(serializers.Serializer):
         return data
 
 
+class BatchAnswerItemSerializer(serializers.Serializer):
+    """یک پاسخ از مجموعه پاسخ‌های ارسال شده"""
+
+    question_id = serializers.IntegerField(required=True)
+    option_id = serializers.IntegerField(required=True)
+    # زمان پاسخ در دستگاه دانش‌آموز (برای پاسخ‌هایی که آفلاین صف شده‌اند)
+    client_timestamp = serializers.DateTimeField(required=False)
+
+
+class SubmitAnswersBatchSerializer(serializers.Serializer):
+    """سریالایزر ثبت دسته‌ای پاسخ‌ها"""
+
+    MAX_ANSWERS = 200
+
+    attempt_id = serializers.IntegerField(required=True)
+    answers = BatchAnswerItemSerializer(many=True)
+
+    def validate_answers(self, value):
+        if not value:
+            raise serializers.ValidationError("حداقل یک پاسخ باید ارسال شود")
+        if len(value) > self.MAX_ANSWERS:
+            raise serializers.ValidationError(f"حداکثر {self.MAX_ANSWERS} پاسخ در هر درخواست مجاز است")
+        return value
+
+
 class FinishExamResponseSerializer(serializers.Serializer):
     """سریالایزر پاسخ پایان آزمون"""
 
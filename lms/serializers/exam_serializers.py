@@ -29,16 +29,17 @@ class ExamSerializer(serializers.ModelSerializer):
             'duration_minutes', 'allowed_entry_start', 'allowed_entry_end',
             'entry_window_display', 'is_limited', 'allow_go_back',
             'total_questions_count', 'easy_percent', 'medium_percent', 'hard_percent',
-            'randomize_questions', 'randomize_options',
+            'randomize_questions', 'randomize_options', 'selection_mode',
             'show_answer_key_immediately', 'show_score_immediately',
             'is_published', 'created_at', 'invited_students_count',
             'invited_students_detail', 'status_display',
+            'pregeneration_status', 'pregenerated_count',
             # اضافه کردن فیلدهای جدید
             'grade', 'grade_id', 'grade_name',
             'subject', 'subject_id', 'subject_name',
             'chapter', 'chapter_id', 'chapter_name'
         ]
-        read_only_fields = ['id', 'teacher', 'created_at']
+        read_only_fields = ['id', 'teacher', 'created_at', 'pregeneration_status', 'pregenerated_count']
 
     def get_teacher_name(self, obj):
         if obj.teacher:
@@ -46,6 +47,8 @@ class ExamSerializer(serializers.ModelSerializer):
         return ''
 
     def get_invited_students_count(self, obj):
+        if hasattr(obj, 'invited_total'):
+            return obj.invited_total
         return obj.invited_students.count()
 
     def get_invited_students_detail(self, obj):
@@ -97,7 +100,7 @@ class ExamListSerializer(serializers.ModelSerializer):
             'id', 'title', 'teacher', 'teacher_name', 'duration_minutes',
             'total_questions_count', 'is_published', 'created_at',
             'invited_count', 'status_display', 'easy_percent', 'medium_percent', 'hard_percent',
-            'allowed_entry_start', 'allowed_entry_end',
+            'allowed_entry_start', 'allowed_entry_end', 'pregeneration_status',
             'grade', 'grade_name', 'subject', 'subject_name', 'chapter', 'chapter_name'
         ]
 
@@ -118,6 +121,8 @@ class ExamListSerializer(serializers.ModelSerializer):
 
     def get_invited_count(self, obj):
         """تعداد دانش‌آموزان دعوت شده به آزمون"""
+        if hasattr(obj, 'invited_total'):
+            return obj.invited_total
         return obj.invited_students.count()
 
 
@@ -136,7 +141,7 @@ class ExamCreateSerializer(serializers.ModelSerializer):
             'allowed_entry_start', 'allowed_entry_end', 'is_limited',
             'allow_go_back', 'total_questions_count', 'easy_percent',
             'medium_percent', 'hard_percent', 'randomize_questions',
-            'randomize_options', 'show_answer_key_immediately',
+            'randomize_options', 'selection_mode', 'show_answer_key_immediately',
             'show_score_immediately', 'is_published',
             'grade', 'subject', 'chapter',  # اضافه کردن این سه فیلد
             'invited_students_mobiles'
@@ -201,7 +206,7 @@ class ExamUpdateSerializer(serializers.ModelSerializer):
             'allowed_entry_start', 'allowed_entry_end', 'is_limited',
             'allow_go_back', 'total_questions_count', 'easy_percent',
             'medium_percent', 'hard_percent', 'randomize_questions',
-            'randomize_options', 'show_answer_key_immediately',
+            'randomize_options', 'selection_mode', 'show_answer_key_immediately',
             'show_score_immediately', 'is_published',
             'grade', 'subject', 'chapter',  # فیلدهای جدید
             'invited_students_mobiles'  # اضافه شده
@@ -204,17 +204,22 @@ class QuestionUpdateSerializer(serializers.ModelSerializer):
         if image is not None:
             instance.image = image
 
-        instance.save()
-
-        # بروزرسانی گزینه‌ها
+        # بروزرسانی گزینه‌ها در جای خود؛ شناسه و شماره گزینه‌ها ثابت می‌ماند تا پاسخ‌های
+        # ثبت شده (StudentAnswer و پاسخ‌های فشرده که شماره گزینه را نگه می‌دارند) عوض نشوند
         if options_data is not None:
-            instance.options.all().delete()
+            existing = list(instance.options.order_by('order', 'id'))
+            changed, created = [], []
             for idx, opt_data in enumerate(options_data):
-                QuestionOption.objects.create(
-                    question=instance,
-                    text=opt_data.get('text', ''),
-                    order=idx + 1,
-                    is_correct=opt_data.get('is_correct', False)
-                )
+                option = existing[idx] if idx < len(existing) else QuestionOption(question=instance)
+                option.text = opt_data.get('text', '')
+                option.order = idx + 1
+                option.is_correct = opt_data.get('is_correct', False)
+                (changed if option.pk else created).append(option)
+            QuestionOption.objects.bulk_update(changed, ['text', 'order', 'is_correct'])
+            QuestionOption.objects.bulk_create(created)
+            QuestionOption.objects.filter(id__in=[option.id for option in existing[len(options_data):]]).delete()
+
+        # ذخیره سوال بعد از گزینه‌ها تا نسخه جدید (updated_at) شامل گزینه‌های جدید باشد
+        instance.save()
 
         return instance
\ No newline at end of file
@@ -0,0 +1,299 @@
+# lms/services/answer_buffer.py
+"""
+بافر پاسخ‌های دانش‌آموزان (write-behind)
+
+در حالت فعال، پاسخ‌ها به جای درج مستقیم در StudentAnswer در یک فایل
+append-only برای هر تلاش نوشته می‌شوند و تکراری بودن پاسخ در کش بررسی می‌شود.
+پاسخ‌ها هنگام پایان آزمون یا با دستور flush_answer_buffer به صورت دسته‌ای
+در دیتابیس ذخیره می‌شوند.
+
+بررسی تکراری بودن پاسخ و فایل‌های پاسخ باید بین همه workerها و سرورها مشترک
+باشند؛ بنابراین بافر فقط با کش مشترک (Redis، Memcached، دیتابیس یا فایل) و
+LMS_ANSWER_BUFFER_DIR_SHARED (پوشه روی یک سرور یا mount شبکه‌ای مشترک) فعال
+می‌شود. flush با قفل سطری روی تلاش انجام می‌شود تا پایان آزمون و انقضای تلاش
+منتظر flush همزمان بمانند.
+"""
+import fcntl
+import glob
+import json
+import os
+import uuid
+from django.conf import settings
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from ..models import ExamAttempt, StudentAnswer, QuestionOption
+from .scoring import POINTS_PER_QUESTION
+
+ATTEMPT_TIMEOUT = 60 * 60 * 6
+QUESTION_TIMEOUT = 60 * 60
+INSERT_BATCH_SIZE = 500
+# کش‌هایی که بین پروسه‌ها مشترک نیستند
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def _has_shared_cache():
+    return settings.CACHES[DEFAULT_CACHE_ALIAS]['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+def _has_shared_dir():
+    # پوشه محلی فقط وقتی مشترک است که همه درخواست‌ها روی یک سرور اجرا شوند
+    return getattr(settings, 'LMS_ANSWER_BUFFER_DIR_SHARED', False)
+
+
+def is_enabled():
+    return getattr(settings, 'LMS_ANSWER_BUFFER_ENABLED', False) and _has_shared_cache() and _has_shared_dir()
+
+
+def check_answer_buffer_settings(app_configs=None, **kwargs):
+    """system check: بافر بدون کش و پوشه مشترک فعال نمی‌شود"""
+    if not getattr(settings, 'LMS_ANSWER_BUFFER_ENABLED', False):
+        return []
+    errors = []
+    if not _has_shared_cache():
+        errors.append(checks.Error(
+            'LMS_ANSWER_BUFFER_ENABLED requires a cache backend shared between workers.',
+            hint='Configure CACHES["default"] with Redis, Memcached, database or file-based cache.',
+            id='lms.E001',
+        ))
+    if not _has_shared_dir():
+        errors.append(checks.Error(
+            'LMS_ANSWER_BUFFER_ENABLED requires LMS_ANSWER_BUFFER_DIR on storage shared by every app server.',
+            hint='Point LMS_ANSWER_BUFFER_DIR at a shared mount (or run on a single host) '
+                 'and set LMS_ANSWER_BUFFER_DIR_SHARED = True.',
+            id='lms.E002',
+        ))
+    return errors
+
+
+def _log_dir():
+    return getattr(settings, 'LMS_ANSWER_BUFFER_DIR', os.path.join(settings.BASE_DIR, 'answer_buffer'))
+
+
+def _log_path(attempt_id):
+    return os.path.join(_log_dir(), f"{attempt_id}.log")
+
+
+def _attempt_key(attempt_id):
+    return f"lms_answer_buffer_attempt_{attempt_id}"
+
+
+def _answered_key(attempt_id, question_id):
+    return f"lms_answer_buffer_answered_{attempt_id}_{question_id}"
+
+
+def _question_key(question_id):
+    return f"lms_answer_buffer_question_{question_id}"
+
+
+def get_attempt_context(attempt_id):
+    """اطلاعات تلاش در حال انجام (از کش، در صورت نبود با یک کوئری)"""
+    context = cache.get(_attempt_key(attempt_id))
+    if context is not None:
+        return context
+
+    row = ExamAttempt.objects.filter(id=attempt_id, status='in_progress').values(
+        'student_id', 'exam__show_answer_key_immediately'
+    ).first()
+    if not row:
+        return None
+
+    context = {
+        'student_id': row['student_id'],
+        'show_answer_key': row['exam__show_answer_key_immediately'],
+    }
+    cache.set(_attempt_key(attempt_id), context, ATTEMPT_TIMEOUT)
+
+    # پاسخ‌هایی که قبلاً در دیتابیس ثبت شده‌اند هم تکراری محسوب می‌شوند
+    answered = StudentAnswer.objects.filter(attempt_id=attempt_id).values_list('question_id', flat=True)
+    cache.set_many({_answered_key(attempt_id, qid): True for qid in answered}, ATTEMPT_TIMEOUT)
+
+    return context
+
+
+def forget_attempt(attempt_id):
+    cache.delete(_attempt_key(attempt_id))
+
+
+def get_question_answer_key(question_id):
+    """کلید پاسخ سوال: {'options': {option_id: is_correct}, 'explanation': ...}"""
+    answer_key = cache.get(_question_key(question_id))
+    if answer_key is not None:
+        return answer_key
+
+    rows = list(QuestionOption.objects.filter(question_id=question_id).values_list(
+        'id', 'is_correct', 'question__explanation'
+    ))
+    if not rows:
+        return None
+
+    answer_key = {
+        'options': {option_id: is_correct for option_id, is_correct, _ in rows},
+        'explanation': rows[0][2],
+    }
+    cache.set(_question_key(question_id), answer_key, QUESTION_TIMEOUT)
+    return answer_key
+
+
+def forget_question(question_id):
+    cache.delete(_question_key(question_id))
+
+
+def _append(attempt_id, *entries):
+    """افزودن خطوط به فایل تلاش (با قفل تا با flush همزمان تداخل نکند)"""
+    os.makedirs(_log_dir(), exist_ok=True)
+    path = _log_path(attempt_id)
+    line = ''.join(json.dumps(entry) + '\n' for entry in entries)
+    while True:
+        with open(path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            # اگر فایل در همین لحظه برای flush جابجا شده باشد، دوباره باز می‌کنیم
+            try:
+                if os.fstat(f.fileno()).st_ino != os.stat(path).st_ino:
+                    continue
+            except FileNotFoundError:
+                continue
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+            return
+
+
+def record_answer(attempt_id, question_id, option_id, is_correct):
+    """
+    ثبت پاسخ در بافر
+
+    اگر این سوال قبلاً پاسخ داده شده باشد False برمی‌گرداند.
+    """
+    if not cache.add(_answered_key(attempt_id, question_id), True, ATTEMPT_TIMEOUT):
+        return False
+
+    _append(attempt_id, {
+        'question_id': question_id,
+        'option_id': option_id,
+        'is_correct': is_correct,
+        'answer_time': timezone.now().isoformat(),
+    })
+    return True
+
+
+def record_answers(attempt_id, answers):
+    """
+    ثبت چند پاسخ در بافر با یک بار نوشتن در فایل
+
+    answers: [(question_id, option_id, is_correct)]. شناسه سوالاتی که ثبت شدند
+    (پاسخ تکراری نبودند) برگردانده می‌شود.
+    """
+    now = timezone.now().isoformat()
+    entries = [
+        {'question_id': question_id, 'option_id': option_id, 'is_correct': is_correct, 'answer_time': now}
+        for question_id, option_id, is_correct in answers
+        if cache.add(_answered_key(attempt_id, question_id), True, ATTEMPT_TIMEOUT)
+    ]
+    if entries:
+        _append(attempt_id, *entries)
+    return {entry['question_id'] for entry in entries}
+
+
+def buffered_question_ids(attempt_id, question_ids):
+    """سوالاتی از لیست داده شده که پاسخشان در بافر ثبت شده است"""
+    keys = {_answered_key(attempt_id, qid): qid for qid in question_ids}
+    return {keys[key] for key in cache.get_many(keys.keys())}
+
+
+def _claim_logs(attempt_id):
+    """جابجا کردن فایل تلاش برای flush (به همراه فایل‌های نیمه‌کاره قبلی)"""
+    path = _log_path(attempt_id)
+    claimed = glob.glob(f"{path}.*.flushing")
+    if os.path.exists(path):
+        target = f"{path}.{uuid.uuid4().hex}.flushing"
+        os.replace(path, target)
+        claimed.append(target)
+    return claimed
+
+
+def _read_entries(paths):
+    entries = {}
+    for path in paths:
+        try:
+            f = open(path)
+        except FileNotFoundError:
+            # بعد از commit یک flush دیگر حذف شده است
+            continue
+        with f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                # فقط اولین پاسخ هر سوال معتبر است
+                entries.setdefault(entry['question_id'], entry)
+    return list(entries.values())
+
+
+def _remove_logs(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # flush دیگری قبلاً همین فایل را ذخیره و حذف کرده است
+            pass
+
+
+@transaction.atomic
+def flush_attempt(attempt_id):
+    """
+    ذخیره پاسخ‌های بافر شده یک تلاش در دیتابیس و بروزرسانی نمره
+
+    ردیف تلاش قفل می‌شود؛ پایان آزمون و انقضای تلاش که همین قفل را دارند
+    منتظر flush همزمان می‌مانند یا خودشان آن را انجام می‌دهند. فایل‌ها بعد از
+    commit حذف می‌شوند تا با rollback پاسخ‌ها از دست نروند. پاسخ‌هایی که بعد
+    از پایان تلاش رسیده‌اند ذخیره نمی‌شوند.
+    """
+    status = ExamAttempt.objects.select_for_update().filter(id=attempt_id).values_list('status', flat=True).first()
+    paths = _claim_logs(attempt_id)
+    if not paths:
+        return 0
+    transaction.on_commit(lambda: _remove_logs(paths))
+    if status != 'in_progress':
+        return 0
+
+    entries = _read_entries(paths)
+    StudentAnswer.objects.bulk_create([
+        StudentAnswer(
+            attempt_id=attempt_id,
+            question_id=entry['question_id'],
+            selected_option_id=entry['option_id'],
+            is_correct=entry['is_correct'],
+            answer_time=parse_datetime(entry['answer_time']),
+        )
+        for entry in entries
+    ], batch_size=INSERT_BATCH_SIZE, ignore_conflicts=True)
+
+    total_correct = StudentAnswer.objects.filter(attempt_id=attempt_id, is_correct=True).count()
+    ExamAttempt.objects.filter(id=attempt_id, status='in_progress').update(
+        score=total_correct * POINTS_PER_QUESTION, total_correct=total_correct
+    )
+    return len(entries)
+
+
+def pending_attempt_ids():
+    """شناسه تلاش‌هایی که پاسخ flush نشده دارند"""
+    attempt_ids = set()
+    for path in glob.glob(os.path.join(_log_dir(), '*.log*')):
+        name = os.path.basename(path)
+        attempt_ids.add(int(name.split('.', 1)[0]))
+    return sorted(attempt_ids)
+
+
+def flush_all():
+    flushed = 0
+    for attempt_id in pending_attempt_ids():
+        flushed += flush_attempt(attempt_id)
+    return flushed
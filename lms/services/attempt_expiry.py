@@ -0,0 +1,108 @@
+# lms/services/attempt_expiry.py
+"""
+پایان خودکار تلاش‌هایی که زمانشان تمام شده است
+
+تلاش‌های در حال انجامی که start_time + duration_minutes آنها (به همراه کمی
+فرصت برای رسیدن درخواست پایان آزمون) گذشته است، با نمره پاسخ‌های ثبت شده
+نهایی و وضعیتشان به صورت دسته‌ای به timeout تغییر می‌کند.
+"""
+from collections import Counter
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, DateTimeField, DurationField, ExpressionWrapper, F, Func
+from django.utils import timezone
+from ..models import ExamAttempt, StudentAnswer
+from . import answer_buffer, compact_answers
+from .dashboard import invalidate_student_dashboard
+from .exam_statistics import record_attempts_timed_out
+from .scoring import POINTS_PER_QUESTION
+
+GRACE_PERIOD = timedelta(minutes=2)
+BATCH_SIZE = 500
+
+
+class _Minutes(Func):
+    """ستون عددی دقیقه به صورت بازه زمانی (برای جمع با start_time در SQL)"""
+    output_field = DurationField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='make_interval(mins => %(expressions)s)', **extra_context)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # DurationField در SQLite به صورت میکروثانیه ذخیره می‌شود
+        return self.as_sql(compiler, connection, template='(%(expressions)s * 60000000)', **extra_context)
+
+
+def overdue_attempt_ids(now=None):
+    """
+    شناسه تلاش‌های در حال انجامی که مهلتشان گذشته
+
+    مهلت (start_time + duration_minutes) در خود کوئری محاسبه می‌شود؛ شرط
+    start_time فقط روی بازه ایندکس status, start_time جستجو می‌کند.
+    """
+    now = now or timezone.now()
+    return list(
+        ExamAttempt.objects.filter(status='in_progress', start_time__lte=now - GRACE_PERIOD)
+        .annotate(deadline=ExpressionWrapper(
+            F('start_time') + _Minutes('exam__duration_minutes'),
+            output_field=DateTimeField(),
+        ))
+        .filter(deadline__lte=now - GRACE_PERIOD)
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+
+
+def _expire_batch(attempt_ids):
+    with transaction.atomic():
+        # تلاش‌هایی که همزمان در حال پایان یافتن هستند رد می‌شوند
+        attempts = list(
+            ExamAttempt.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(id__in=attempt_ids, status='in_progress')
+            .select_related('exam')
+        )
+        if not attempts:
+            return 0
+
+        buffered = answer_buffer.is_enabled()
+        if buffered:
+            for attempt in attempts:
+                answer_buffer.flush_attempt(attempt.id)
+
+        correct_counts = dict(
+            StudentAnswer.objects.filter(attempt__in=attempts, is_correct=True)
+            .values('attempt_id').annotate(total=Count('id')).values_list('attempt_id', 'total')
+        )
+
+        for attempt in attempts:
+            attempt.total_correct = correct_counts.get(attempt.id, 0)
+            attempt.score = attempt.total_correct * POINTS_PER_QUESTION
+            attempt.end_time = attempt.start_time + timedelta(minutes=attempt.exam.duration_minutes)
+            attempt.status = 'timeout'
+
+        ExamAttempt.objects.bulk_update(attempts, ['total_correct', 'score', 'end_time', 'status'])
+
+        if compact_answers.is_enabled():
+            by_exam = {}
+            for attempt in attempts:
+                by_exam.setdefault(attempt.exam_id, []).append(attempt)
+            for exam_attempts in by_exam.values():
+                compact_answers.pack_attempts(exam_attempts[0].exam, exam_attempts)
+
+        for exam_id, count in Counter(attempt.exam_id for attempt in attempts).items():
+            record_attempts_timed_out(exam_id, count)
+
+    if buffered:
+        for attempt in attempts:
+            answer_buffer.forget_attempt(attempt.id)
+    invalidate_student_dashboard(*{attempt.student_id for attempt in attempts})
+    return len(attempts)
+
+
+def expire_overdue_attempts(now=None):
+    """پایان تمام تلاش‌های منقضی شده؛ تعداد تلاش‌های بسته شده را برمی‌گرداند"""
+    attempt_ids = overdue_attempt_ids(now)
+    expired = 0
+    for start in range(0, len(attempt_ids), BATCH_SIZE):
+        expired += _expire_batch(attempt_ids[start:start + BATCH_SIZE])
+    return expired
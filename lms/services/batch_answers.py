@@ -0,0 +1,136 @@
+# lms/services/batch_answers.py
+"""
+ثبت دسته‌ای پاسخ‌ها
+
+دانش‌آموزانی که اینترنت ضعیفی دارند پاسخ‌ها را در دستگاه صف می‌کنند و یکجا
+ارسال می‌کنند. همه پاسخ‌ها با یک کوئری در برابر سوالات همین تلاش بررسی و با
+یک bulk insert ذخیره می‌شوند و نتیجه هر پاسخ جداگانه برگردانده می‌شود.
+"""
+from datetime import datetime
+from django.db import IntegrityError, transaction
+from ..models import ExamQuestionSelection, QuestionOption, StudentAnswer
+from . import answer_buffer
+from .scoring import POINTS_PER_QUESTION, add_correct_answers
+from .seeded_selection import seeded_question_ids
+
+STATUS_SAVED = 'saved'
+STATUS_DUPLICATE = 'already_answered'
+STATUS_INVALID = 'invalid'
+
+
+def _attempt_options(attempt, question_ids, option_ids):
+    """
+    گزینه‌های ارسال شده‌ای که متعلق به سوالات همین تلاش هستند (یک کوئری)
+
+    خروجی: {option_id: (question_id, is_correct, explanation)}
+    """
+    options = QuestionOption.objects.filter(id__in=option_ids, question_id__in=question_ids)
+
+    if attempt.selection_seed is not None and attempt.pool_snapshot_id:
+        paper = seeded_question_ids(attempt.exam, attempt.pool_snapshot, attempt.selection_seed)
+        options = options.filter(question_id__in=paper)
+    else:
+        options = options.filter(question_id__in=ExamQuestionSelection.objects.filter(
+            exam_id=attempt.exam_id, student_id=attempt.student_id
+        ).values('question_id'))
+
+    return {
+        option_id: (question_id, is_correct, explanation)
+        for option_id, question_id, is_correct, explanation
+        in options.values_list('id', 'question_id', 'is_correct', 'question__explanation')
+    }
+
+
+def _insert(attempt, answers):
+    """
+    درج پاسخ‌ها با یک bulk insert؛ شناسه سوالات ذخیره شده را برمی‌گرداند
+
+    اگر همزمان پاسخ یکی از سوالات از مسیر دیگری ثبت شده باشد، پاسخ‌ها یکی یکی
+    درج می‌شوند تا فقط همان سوال تکراری رد شود.
+    """
+    rows = [
+        StudentAnswer(attempt=attempt, question_id=question_id, selected_option_id=option_id, is_correct=is_correct)
+        for question_id, option_id, is_correct in answers
+    ]
+    try:
+        with transaction.atomic():
+            StudentAnswer.objects.bulk_create(rows)
+        return {row.question_id for row in rows}
+    except IntegrityError:
+        pass
+
+    saved = set()
+    for row in rows:
+        try:
+            with transaction.atomic():
+                row.save()
+            saved.add(row.question_id)
+        except IntegrityError:
+            continue
+    return saved
+
+
+def submit_answers(attempt, items):
+    """
+    ثبت پاسخ‌های یک تلاش
+
+    items: [{'question_id', 'option_id', 'client_timestamp'?}] به ترتیب درخواست.
+    نتیجه هر پاسخ به همان ترتیب برگردانده می‌شود. اگر یک سوال چند بار در درخواست
+    آمده باشد، پاسخی که زودتر در دستگاه ثبت شده معتبر است.
+    """
+    question_ids = {item['question_id'] for item in items}
+    options = _attempt_options(attempt, question_ids, {item['option_id'] for item in items})
+
+    buffered = answer_buffer.is_enabled()
+    if buffered:
+        answer_buffer.get_attempt_context(attempt.id)
+        answered = answer_buffer.buffered_question_ids(attempt.id, question_ids)
+    else:
+        answered = set(StudentAnswer.objects.filter(
+            attempt=attempt, question_id__in=question_ids
+        ).values_list('question_id', flat=True))
+
+    statuses = [STATUS_INVALID] * len(items)
+    accepted = {}  # question_id -> index
+    order = sorted(range(len(items)), key=lambda i: items[i].get('client_timestamp') or datetime.max)
+    for index in order:
+        item = items[index]
+        option = options.get(item['option_id'])
+        if option is None or option[0] != item['question_id']:
+            continue
+        if item['question_id'] in answered or item['question_id'] in accepted:
+            statuses[index] = STATUS_DUPLICATE
+            continue
+        accepted[item['question_id']] = index
+
+    answers = [
+        (question_id, items[index]['option_id'], options[items[index]['option_id']][1])
+        for question_id, index in accepted.items()
+    ]
+    if buffered:
+        saved = answer_buffer.record_answers(attempt.id, answers)
+    else:
+        saved = _insert(attempt, answers)
+        add_correct_answers(attempt.id, sum(1 for question_id, _, is_correct in answers
+                                            if is_correct and question_id in saved))
+
+    for question_id, index in accepted.items():
+        statuses[index] = STATUS_SAVED if question_id in saved else STATUS_DUPLICATE
+
+    show_answer_key = attempt.exam.show_answer_key_immediately
+    results = []
+    for index, item in enumerate(items):
+        result = {
+            'question_id': item['question_id'],
+            'option_id': item['option_id'],
+            'status': statuses[index],
+        }
+        if statuses[index] == STATUS_SAVED:
+            _, is_correct, explanation = options[item['option_id']]
+            result.update({
+                'is_correct': is_correct,
+                'points_earned': POINTS_PER_QUESTION if is_correct else 0,
+                'explanation': explanation if show_answer_key else None,
+            })
+        results.append(result)
+    return results
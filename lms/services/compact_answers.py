@@ -0,0 +1,181 @@
+# lms/services/compact_answers.py
+"""
+ذخیره فشرده پاسخ‌های تلاش‌های پایان یافته
+
+به جای یک ردیف StudentAnswer برای هر سوال، پاسخ‌های تلاش در خود ExamAttempt
+نگهداری می‌شوند:
+- slot_question_ids: شناسه سوال هر خانه (به ترتیب برگه دانش‌آموز)
+- answer_slots: یک بایت برای هر خانه؛ 0 یعنی بدون پاسخ و k یعنی گزینه k ام
+  (به ترتیب پیش‌فرض گزینه‌های سوال؛ ویرایش سوال گزینه‌ها را در جای خود بروز
+  می‌کند تا شماره گزینه‌ها و در نتیجه پاسخ‌های فشرده شده ثابت بمانند)
+- correct_bitmap: بیت i (از کم‌ارزش‌ترین بیت هر بایت) یعنی پاسخ خانه i صحیح است
+
+در حالت فعال (LMS_COMPACT_ANSWERS_ENABLED) پاسخ‌ها هنگام پایان تلاش فشرده و
+ردیف‌های StudentAnswer حذف می‌شوند. دستور compact_attempt_answers تلاش‌های
+قدیمی را تبدیل می‌کند.
+"""
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from ..models import ExamAttempt, ExamQuestionSelection, Question, QuestionOption, StudentAnswer
+from .scoring import POINTS_PER_QUESTION
+from .seeded_selection import seeded_question_ids
+
+COMPACT_FIELDS = ['slot_question_ids', 'answer_slots', 'correct_bitmap', 'total_correct', 'score']
+
+
+def is_enabled():
+    return getattr(settings, 'LMS_COMPACT_ANSWERS_ENABLED', False)
+
+
+def is_compact(attempt):
+    return attempt.answer_slots is not None
+
+
+def _option_positions(question_ids):
+    """{option_id: شماره گزینه} و {(question_id, شماره گزینه): option_id} با یک کوئری"""
+    positions, option_ids = {}, {}
+    counters = defaultdict(int)
+    options = QuestionOption.objects.filter(question_id__in=question_ids).order_by(
+        'question_id', 'order', 'id'
+    ).values_list('question_id', 'id')
+    for question_id, option_id in options:
+        counters[question_id] += 1
+        positions[option_id] = counters[question_id]
+        option_ids[(question_id, counters[question_id])] = option_id
+    return positions, option_ids
+
+
+def _papers(exam, attempts):
+    """شناسه سوالات برگه هر تلاش به ترتیب نمایش: {attempt_id: [question_id, ...]}"""
+    papers = {attempt.id: [] for attempt in attempts}
+    attempt_by_student = {}
+
+    for attempt in attempts:
+        if attempt.selection_seed is not None and attempt.pool_snapshot_id:
+            papers[attempt.id] = seeded_question_ids(exam, attempt.pool_snapshot, attempt.selection_seed)
+        else:
+            attempt_by_student[attempt.student_id] = attempt.id
+
+    if attempt_by_student:
+        selections = ExamQuestionSelection.objects.filter(
+            exam_id=exam.id, student_id__in=list(attempt_by_student)
+        ).order_by('student_id', 'order').values_list('student_id', 'question_id')
+        for student_id, question_id in selections:
+            papers[attempt_by_student[student_id]].append(question_id)
+
+    return papers
+
+
+def pack_attempts(exam, attempts, delete_rows=True):
+    """
+    فشرده کردن پاسخ‌های تلاش‌های پایان یافته یک آزمون
+
+    نمره و تعداد پاسخ صحیح از روی بیت‌های درستی دوباره محاسبه می‌شود.
+    """
+    attempts = [attempt for attempt in attempts if not is_compact(attempt)]
+    if not attempts:
+        return 0
+
+    papers = _papers(exam, attempts)
+    answers = defaultdict(dict)
+    rows = StudentAnswer.objects.filter(attempt__in=attempts).values_list(
+        'attempt_id', 'question_id', 'selected_option_id', 'is_correct'
+    )
+    for attempt_id, question_id, option_id, is_correct in rows:
+        answers[attempt_id][question_id] = (option_id, is_correct)
+
+    all_question_ids = {qid for paper in papers.values() for qid in paper}
+    all_question_ids |= {qid for sheet in answers.values() for qid in sheet}
+    positions, _ = _option_positions(all_question_ids)
+
+    for attempt in attempts:
+        sheet = answers.get(attempt.id, {})
+        paper = list(papers[attempt.id])
+        # پاسخ سوالاتی که در برگه نیستند هم از دست نمی‌رود
+        on_paper = set(paper)
+        paper.extend(qid for qid in sheet if qid not in on_paper)
+
+        slots = bytearray(len(paper))
+        bitmap = bytearray((len(paper) + 7) // 8)
+        for slot, question_id in enumerate(paper):
+            if question_id not in sheet:
+                continue
+            option_id, is_correct = sheet[question_id]
+            slots[slot] = positions.get(option_id, 0)
+            if is_correct:
+                bitmap[slot // 8] |= 1 << (slot % 8)
+
+        attempt.slot_question_ids = paper
+        attempt.answer_slots = bytes(slots)
+        attempt.correct_bitmap = bytes(bitmap)
+        attempt.total_correct = sum(bin(byte).count('1') for byte in bitmap)
+        attempt.score = attempt.total_correct * POINTS_PER_QUESTION
+
+    with transaction.atomic():
+        ExamAttempt.objects.bulk_update(attempts, COMPACT_FIELDS)
+        if delete_rows:
+            StudentAnswer.objects.filter(attempt__in=attempts).delete()
+
+    return len(attempts)
+
+
+def pack_attempt(attempt, delete_rows=True):
+    return pack_attempts(attempt.exam, [attempt], delete_rows=delete_rows)
+
+
+def unpack(attempt):
+    """پاسخ‌های فشرده: [(question_id, شماره گزینه یا None، is_correct)] برای خانه‌های پاسخ داده شده"""
+    slots = bytes(attempt.answer_slots)
+    bitmap = bytes(attempt.correct_bitmap)
+    return [
+        (question_id, slots[slot], bool(bitmap[slot // 8] >> (slot % 8) & 1))
+        for slot, question_id in enumerate(attempt.slot_question_ids)
+        if slots[slot]
+    ]
+
+
+def compact_answer_rows(attempts):
+    """(attempt_id, question_id, selected_option_id, is_correct) برای تلاش‌های فشرده شده"""
+    unpacked = [(attempt.id, unpack(attempt)) for attempt in attempts]
+    _, option_ids = _option_positions({qid for _, sheet in unpacked for qid, _, _ in sheet})
+    return [
+        (attempt_id, question_id, option_ids.get((question_id, position)), is_correct)
+        for attempt_id, sheet in unpacked
+        for question_id, position, is_correct in sheet
+    ]
+
+
+def load_answer_sheet(attempt):
+    """
+    پاسخ‌های یک تلاش برای نمایش نتیجه
+
+    [{'question': Question (با گزینه‌های prefetch شده), 'selected_option', 'correct_option', 'is_correct'}]
+    در حالت فشرده بدون خواندن StudentAnswer و در غیر این صورت با یک کوئری ساده روی آن.
+    """
+    if is_compact(attempt):
+        sheet = unpack(attempt)
+    else:
+        sheet = list(StudentAnswer.objects.filter(attempt=attempt).order_by('id').values_list(
+            'question_id', 'selected_option_id', 'is_correct'
+        ))
+
+    questions = Question.objects.prefetch_related('options').in_bulk([question_id for question_id, _, _ in sheet])
+
+    answers = []
+    for question_id, selected, is_correct in sheet:
+        question = questions.get(question_id)
+        if question is None:
+            continue
+        options = sorted(question.options.all(), key=lambda opt: (opt.order, opt.id))
+        if is_compact(attempt):
+            selected_option = options[selected - 1] if selected and selected <= len(options) else None
+        else:
+            selected_option = next((opt for opt in options if opt.id == selected), None)
+        answers.append({
+            'question': question,
+            'selected_option': selected_option,
+            'correct_option': next((opt for opt in options if opt.is_correct), None),
+            'is_correct': is_correct,
+        })
+    return answers
@@ -0,0 +1,138 @@
+# lms/services/dashboard.py
+"""
+داشبورد دانش‌آموز
+
+تمام آزمون‌های دعوت شده به همراه تلاش تکمیل شده دانش‌آموز با یک کوئری
+خوانده و در یک دور دسته‌بندی می‌شوند. نتیجه برای هر دانش‌آموز کش می‌شود؛
+مدت کش تا اولین تغییر وضعیت زمانی آزمون‌ها (شروع/پایان) محدود است و با
+پایان یک تلاش باطل می‌شود.
+"""
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from ..models import Exam, ExamAttempt
+
+DASHBOARD_TIMEOUT = 60
+
+
+def _dashboard_key(student_id):
+    return f"lms_student_dashboard_{student_id}"
+
+
+def invalidate_student_dashboard(*student_ids):
+    cache.delete_many([_dashboard_key(student_id) for student_id in student_ids])
+
+
+def _invited_exams(student):
+    completed = ExamAttempt.objects.filter(
+        student_id=student.id,
+        exam_id=OuterRef('pk'),
+        status__in=['completed', 'timeout']
+    ).order_by('id')
+
+    return Exam.objects.filter(
+        invited_students=student,
+        is_published=True
+    ).annotate(
+        attempt_id=Subquery(completed.values('id')[:1]),
+        attempt_score=Subquery(completed.values('score')[:1]),
+        attempt_total_correct=Subquery(completed.values('total_correct')[:1]),
+        attempt_total_questions=Subquery(completed.values('total_questions')[:1]),
+        attempt_end_time=Subquery(completed.values('end_time')[:1]),
+    ).values(
+        'id', 'title', 'description', 'duration_minutes', 'total_questions_count',
+        'allowed_entry_start', 'allowed_entry_end', 'created_at',
+        'attempt_id', 'attempt_score', 'attempt_total_correct', 'attempt_total_questions', 'attempt_end_time',
+    )
+
+
+def build_student_dashboard(student, now=None):
+    """دسته‌بندی آزمون‌های دانش‌آموز (قابل شرکت، در انتظار، منقضی، تکمیل شده)"""
+    now = now or timezone.now()
+
+    available_exams = []  # آزمون‌های قابل شرکت (زمانش رسیده و کامل نشده)
+    waiting_exams = []  # آزمون‌هایی که هنوز شروع نشده
+    expired_exams = []  # آزمون‌هایی که زمانشان تمام شده
+    completed_exams = []  # آزمون‌هایی که تکمیل شده با نمره
+
+    # اولین زمانی که وضعیت یکی از آزمون‌ها تغییر می‌کند (برای تعیین مدت کش)
+    next_change = None
+
+    for row in _invited_exams(student):
+        exam_data = {
+            'id': row['id'],
+            'title': row['title'],
+            'description': row['description'],
+            'duration_minutes': row['duration_minutes'],
+            'total_questions_count': row['total_questions_count'],
+            'allowed_entry_start': row['allowed_entry_start'],
+            'allowed_entry_end': row['allowed_entry_end'],
+            'created_at': row['created_at'],
+        }
+
+        if row['attempt_id'] is not None:
+            max_score = row['attempt_total_questions'] * 10
+            percentage = (row['attempt_score'] / max_score * 100) if max_score > 0 else 0
+            completed_exams.append({
+                **exam_data,
+                'attempt_id': row['attempt_id'],
+                'score': row['attempt_score'],
+                'max_score': max_score,
+                'percentage': round(percentage, 2),
+                'correct_count': row['attempt_total_correct'],
+                'wrong_count': row['attempt_total_questions'] - row['attempt_total_correct'],
+                'completed_at': row['attempt_end_time']
+            })
+            continue
+
+        if now < row['allowed_entry_start']:
+            waiting_exams.append(exam_data)
+            boundary = row['allowed_entry_start']
+        elif now > row['allowed_entry_end']:
+            expired_exams.append(exam_data)
+            boundary = None
+        else:
+            available_exams.append(exam_data)
+            boundary = row['allowed_entry_end']
+
+        if boundary and (next_change is None or boundary < next_change):
+            next_change = boundary
+
+    data = {
+        "student": {
+            "id": student.id,
+            "name": f"{student.first_name} {student.last_name}",
+            "first_name": student.first_name,
+            "last_name": student.last_name,
+            "mobile": student.mobile,
+        },
+        "available_exams": available_exams,
+        "waiting_exams": waiting_exams,
+        "expired_exams": expired_exams,
+        "completed_exams": completed_exams,
+        # آمار کلی
+        "stats": {
+            "total": len(available_exams) + len(waiting_exams) + len(expired_exams) + len(completed_exams),
+            "available": len(available_exams),
+            "waiting": len(waiting_exams),
+            "expired": len(expired_exams),
+            "completed": len(completed_exams)
+        }
+    }
+    return data, next_change
+
+
+def get_student_dashboard(student):
+    key = _dashboard_key(student.id)
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    now = timezone.now()
+    data, next_change = build_student_dashboard(student, now)
+
+    timeout = DASHBOARD_TIMEOUT
+    if next_change is not None:
+        timeout = max(1, min(timeout, int((next_change - now).total_seconds()) + 1))
+    cache.set(key, data, timeout)
+    return data
@@ -0,0 +1,86 @@
+# lms/services/exam_results.py
+"""
+نتایج آزمون برای معلم
+
+لیست نتایج به صورت keyset (بر اساس نمره و شناسه تلاش) صفحه‌بندی می‌شود تا برای
+آزمون‌هایی با هزاران شرکت‌کننده هم هزینه هر صفحه ثابت بماند.
+"""
+import csv
+from ..models import ExamAttempt
+from . import keyset
+from .keyset import DEFAULT_PAGE_SIZE
+
+PASS_PERCENTAGE = 60
+RESULTS_ORDERING = ('-score', '-id')
+EXPORT_CHUNK_SIZE = 2000
+
+CSV_COLUMNS = [
+    'attempt_id', 'student_id', 'student_name', 'mobile', 'grade', 'score', 'max_score', 'percentage',
+    'correct_count', 'wrong_count', 'total_questions', 'status', 'start_time', 'end_time', 'passed',
+]
+
+
+def results_queryset(exam):
+    return ExamAttempt.objects.filter(exam=exam).select_related('student__grade').order_by(*RESULTS_ORDERING)
+
+
+def get_results_page(exam, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """یک صفحه از نتایج به همراه cursor صفحه بعد (در صورت نامعتبر بودن cursor ValueError)"""
+    page, next_cursor = keyset.get_page(results_queryset(exam), RESULTS_ORDERING, cursor, page_size)
+    return {
+        'results': [attempt_result(attempt) for attempt in page],
+        'next_cursor': next_cursor,
+        'page_size': page_size
+    }
+
+
+def attempt_result(attempt):
+    max_score = attempt.total_questions * 10
+    percentage = (attempt.score / max_score * 100) if max_score > 0 else 0
+    student = attempt.student
+
+    return {
+        'attempt_id': attempt.id,
+        'student': {
+            'id': student.id,
+            'name': f"{student.first_name} {student.last_name}",
+            'mobile': student.mobile,
+            'grade': student.grade.name if student.grade else None
+        },
+        'score': attempt.score,
+        'max_score': max_score,
+        'percentage': round(percentage, 2),
+        'correct_count': attempt.total_correct,
+        'wrong_count': attempt.total_questions - attempt.total_correct,
+        'total_questions': attempt.total_questions,
+        'status': attempt.status,
+        'start_time': attempt.start_time,
+        'end_time': attempt.end_time,
+        'passed': percentage >= PASS_PERCENTAGE
+    }
+
+
+class _Echo:
+    """شبه فایل برای csv.writer که هر خط را مستقیماً برمی‌گرداند"""
+
+    def write(self, value):
+        return value
+
+
+def iter_results_csv(exam):
+    """تولید خط به خط CSV نتایج (بدون نگهداری همه ردیف‌ها در حافظه)"""
+    writer = csv.writer(_Echo())
+    # BOM برای نمایش درست حروف فارسی در اکسل
+    yield '\ufeff' + writer.writerow(CSV_COLUMNS)
+
+    for attempt in results_queryset(exam).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        result = attempt_result(attempt)
+        student = result['student']
+        yield writer.writerow([
+            result['attempt_id'], student['id'], student['name'], student['mobile'], student['grade'] or '',
+            result['score'], result['max_score'], result['percentage'], result['correct_count'],
+            result['wrong_count'], result['total_questions'], result['status'],
+            result['start_time'].isoformat() if result['start_time'] else '',
+            result['end_time'].isoformat() if result['end_time'] else '',
+            int(result['passed']),
+        ])
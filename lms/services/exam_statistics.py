@@ -0,0 +1,168 @@
+# lms/services/exam_statistics.py
+"""
+آمار تجمیعی آزمون‌ها (ExamStatistics)
+
+به جای محاسبه دوباره آمار از روی همه تلاش‌ها در هر بار مشاهده نتایج،
+ردیف آمار هر آزمون هنگام شروع، پایان یا اتمام زمان هر تلاش به صورت
+افزایشی بروزرسانی می‌شود. اگر ردیف آماری وجود نداشته باشد (آزمون‌های
+قدیمی یا پس از حذف دانش‌آموز) یک بار از روی ExamAttempt ساخته می‌شود.
+
+تغییرات بعد از commit تراکنش درخواست و با یک UPDATE ... SET x = x + n اعمال
+می‌شوند؛ ردیف آمار آزمون در طول درخواست قفل نمی‌ماند و شروع/پایان همزمان
+تلاش‌ها پشت سر هم صف نمی‌کشند. ساختن ردیف نبوده فقط داخل تراکنش همان
+درخواست (با get_or_create) انجام می‌شود و تغییر آن درخواست را شامل می‌شود؛
+بنابراین هیچ تغییری هم در ساخت ردیف و هم به صورت افزایشی شمرده نمی‌شود.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from ..models import ExamAttempt, ExamStatistics
+from .exam_results import PASS_PERCENTAGE
+
+
+def attempt_percentage(score, total_questions):
+    max_score = total_questions * 10
+    return (score / max_score * 100) if max_score > 0 else 0
+
+
+def _bucket(percentage):
+    return min(int(percentage // 10), ExamStatistics.HISTOGRAM_BUCKETS - 1)
+
+
+def compute_exam_statistics(exam_id):
+    """محاسبه کامل آمار یک آزمون از روی ExamAttempt"""
+    counts = ExamAttempt.objects.filter(exam_id=exam_id).aggregate(
+        in_progress_count=Count('id', filter=Q(status='in_progress')),
+        timeout_count=Count('id', filter=Q(status='timeout')),
+    )
+    values = {
+        **counts,
+        'completed_count': 0,
+        'score_sum': 0,
+        'percentage_sum': 0.0,
+        'pass_count': 0,
+        'fail_count': 0,
+        'histogram': [0] * ExamStatistics.HISTOGRAM_BUCKETS,
+    }
+
+    completed = ExamAttempt.objects.filter(exam_id=exam_id, status='completed').values_list('score', 'total_questions')
+    for score, total_questions in completed.iterator():
+        _add_completed(values, score, total_questions)
+    return values
+
+
+def _add_completed(values, score, total_questions):
+    percentage = attempt_percentage(score, total_questions)
+    values['completed_count'] += 1
+    values['score_sum'] += score
+    values['percentage_sum'] += percentage
+    if percentage >= PASS_PERCENTAGE:
+        values['pass_count'] += 1
+    else:
+        values['fail_count'] += 1
+    values['histogram'][_bucket(percentage)] += 1
+
+
+def _row_values(values):
+    """تبدیل خروجی compute_exam_statistics به ستون‌های مدل"""
+    values = dict(values)
+    for i, count in enumerate(values.pop('histogram')):
+        values[ExamStatistics.bucket_field(i)] = count
+    return values
+
+
+@transaction.atomic
+def rebuild_exam_statistics(exam_id):
+    """
+    بازنویسی ردیف آمار از روی ExamAttempt (دستور rebuild_exam_statistics)
+
+    تغییرات افزایشی درخواست‌هایی که حین بازسازی commit می‌شوند ممکن است دوباره
+    شمرده شوند؛ اختلاف باقی‌مانده با اجرای دوباره دستور برطرف می‌شود.
+    """
+    stats, _ = ExamStatistics.objects.update_or_create(
+        exam_id=exam_id, defaults=_row_values(compute_exam_statistics(exam_id))
+    )
+    return stats
+
+
+def _create_statistics(exam_id):
+    """
+    ساخت ردیف آمار از داده‌های قابل مشاهده در تراکنش جاری؛ (ردیف، ساخته شد یا نه)
+
+    اگر درخواست دیگری همزمان ردیف را ساخته باشد، ردیف او بدون تغییر برگردانده
+    می‌شود (برخلاف update_or_create که آن را با داده قدیمی‌تر بازنویسی می‌کند).
+    """
+    return ExamStatistics.objects.get_or_create(
+        exam_id=exam_id, defaults=_row_values(compute_exam_statistics(exam_id))
+    )
+
+
+def get_exam_statistics(exam_id):
+    """ردیف آمار آزمون (در صورت نبود، ساخته می‌شود)"""
+    stats = ExamStatistics.objects.filter(exam_id=exam_id).first()
+    return stats or _create_statistics(exam_id)[0]
+
+
+def _apply(exam_id, deltas):
+    """
+    ثبت تغییرات {ستون: مقدار} روی ردیف آمار؛ پس از ذخیره تغییر تلاش‌ها در همان تراکنش صدا زده شود
+
+    اگر ردیف وجود نداشته باشد، همین‌جا از روی ExamAttempt (شامل تغییر این
+    تراکنش) ساخته می‌شود و تغییر افزایشی لازم نیست. در غیر این صورت تغییر بعد
+    از commit با یک UPDATE اعمال می‌شود؛ اگر ردیف تا آن زمان حذف شده باشد،
+    ساخت دوباره آن از روی ExamAttempt این تغییر را هم شامل می‌شود.
+    """
+    if not ExamStatistics.objects.filter(exam_id=exam_id).exists() and _create_statistics(exam_id)[1]:
+        return
+
+    def update():
+        # شمارنده‌ها منفی نمی‌شوند حتی اگر قبلا اختلاف داشته باشند
+        changes = {field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items() if delta}
+        ExamStatistics.objects.filter(exam_id=exam_id).update(updated_at=timezone.now(), **changes)
+
+    transaction.on_commit(update)
+
+
+def record_attempt_started(exam_id):
+    _apply(exam_id, {'in_progress_count': 1})
+
+
+def record_attempt_completed(attempt):
+    """پس از ذخیره تلاش با وضعیت completed فراخوانی شود"""
+    percentage = attempt_percentage(attempt.score, attempt.total_questions)
+    _apply(attempt.exam_id, {
+        'in_progress_count': -1,
+        'completed_count': 1,
+        'score_sum': attempt.score,
+        'percentage_sum': percentage,
+        'pass_count' if percentage >= PASS_PERCENTAGE else 'fail_count': 1,
+        ExamStatistics.bucket_field(_bucket(percentage)): 1,
+    })
+
+
+def record_attempts_timed_out(exam_id, count=1):
+    """پس از تغییر وضعیت تلاش‌ها به timeout فراخوانی شود"""
+    _apply(exam_id, {'in_progress_count': -count, 'timeout_count': count})
+
+
+def forget_exam_statistics(exam_ids):
+    """حذف آمار تا در اولین مشاهده دوباره ساخته شود (مثلاً پس از حذف تلاش‌ها)"""
+    ExamStatistics.objects.filter(exam_id__in=list(exam_ids)).delete()
+
+
+def stats_summary(stats, total_students):
+    """خروجی آمار برای نمایش در نتایج آزمون"""
+    completed_count = stats.completed_count
+    return {
+        'total_students': total_students,
+        'completed_count': completed_count,
+        'in_progress_count': stats.in_progress_count,
+        'timeout_count': stats.timeout_count,
+        'not_started_count': total_students - completed_count - stats.in_progress_count - stats.timeout_count,
+        'avg_score': round(stats.score_sum / completed_count, 2) if completed_count else 0,
+        'avg_percentage': round(stats.percentage_sum / completed_count, 2) if completed_count else 0,
+        'pass_count': stats.pass_count,
+        'fail_count': stats.fail_count,
+        'histogram': stats.histogram,
+    }
@@ -0,0 +1,190 @@
+# lms/services/item_analysis.py
+"""
+تحلیل سوالات آزمون (item analysis)
+
+پاسخ‌های تلاش‌های تکمیل شده با یک کوئری خوانده و به ماتریس
+«تلاش × سوال» در NumPy تبدیل می‌شوند و همه شاخص‌ها به صورت برداری
+محاسبه می‌شوند:
+- ضریب دشواری: نسبت پاسخ صحیح به تعداد دفعاتی که سوال نمایش داده شده
+- ضریب تمیز: اختلاف ضریب دشواری در ۲۷٪ بالا و ۲۷٪ پایین شرکت‌کنندگان
+- درصد انتخاب هر گزینه و درصد بدون پاسخ
+- ضریب پایایی KR-20
+
+چون هر دانش‌آموز زیرمجموعه متفاوتی از سوالات را می‌بیند، سوالات نمایش
+داده نشده در محاسبات هر سوال لحاظ نمی‌شوند و در KR-20 مجموع واریانس
+سوالات برای برگه هر دانش‌آموز جداگانه محاسبه و میانگین گرفته می‌شود
+(برای آزمونی با سوالات یکسان همان فرمول استاندارد است).
+"""
+import numpy as np
+from django.core.cache import cache
+from ..models import ExamAttempt, ExamQuestionSelection, Question, QuestionOption, QuestionPoolSnapshot, StudentAnswer
+from .compact_answers import compact_answer_rows
+from .exam_statistics import get_exam_statistics
+from .seeded_selection import seeded_question_ids
+
+GROUP_RATIO = 0.27
+ANALYSIS_TIMEOUT = 60 * 60 * 24
+
+
+def _analysis_key(exam_id, completed_count):
+    return f"lms_item_analysis_{exam_id}_{completed_count}"
+
+
+def get_item_analysis(exam):
+    """تحلیل سوالات آزمون؛ تا پایان تلاش جدید از کش خوانده می‌شود"""
+    completed_count = get_exam_statistics(exam.id).completed_count
+    key = _analysis_key(exam.id, completed_count)
+
+    analysis = cache.get(key)
+    if analysis is None:
+        analysis = analyze_exam(exam)
+        cache.set(key, analysis, ANALYSIS_TIMEOUT)
+    return analysis
+
+
+def _presented_pairs(exam, attempts):
+    """(شناسه تلاش، شناسه سوال) برای سوالاتی که به هر تلاش نمایش داده شده"""
+    attempt_by_student = {student_id: attempt_id for attempt_id, student_id, _, _ in attempts}
+    pairs = []
+
+    stored = ExamQuestionSelection.objects.filter(exam=exam).values_list('student_id', 'question_id')
+    for student_id, question_id in stored.iterator():
+        attempt_id = attempt_by_student.get(student_id)
+        if attempt_id is not None:
+            pairs.append((attempt_id, question_id))
+
+    snapshot_ids = {snapshot_id for _, _, seed, snapshot_id in attempts if seed is not None and snapshot_id}
+    snapshots = QuestionPoolSnapshot.objects.in_bulk(snapshot_ids)
+    for attempt_id, _, seed, snapshot_id in attempts:
+        if seed is not None and snapshot_id in snapshots:
+            pairs.extend((attempt_id, qid) for qid in seeded_question_ids(exam, snapshots[snapshot_id], seed))
+
+    return pairs
+
+
+def _rate(numerator, denominator):
+    return np.divide(numerator, denominator, out=np.full(numerator.shape, np.nan), where=denominator > 0)
+
+
+def _value(number):
+    return None if np.isnan(number) else round(float(number), 4)
+
+
+def analyze_exam(exam):
+    attempts = list(ExamAttempt.objects.filter(exam=exam, status='completed').values_list(
+        'id', 'student_id', 'selection_seed', 'pool_snapshot_id'
+    ))
+    # ردیف‌های تلاش فشرده شده (compact_attempt_answers --keep-rows) کنار گذاشته می‌شوند تا دوبار شمرده نشوند
+    rows = list(StudentAnswer.objects.filter(
+        attempt__exam=exam, attempt__status='completed', attempt__answer_slots__isnull=True
+    ).values_list('attempt_id', 'question_id', 'selected_option_id', 'is_correct'))
+    # پاسخ تلاش‌هایی که به صورت فشرده ذخیره شده‌اند
+    compact = ExamAttempt.objects.filter(exam=exam, status='completed', answer_slots__isnull=False).only(
+        'id', 'slot_question_ids', 'answer_slots', 'correct_bitmap'
+    )
+    rows.extend(compact_answer_rows(compact))
+    answers = np.array(rows, dtype=object).reshape(-1, 4)
+    presented_pairs = np.array(_presented_pairs(exam, attempts), dtype=np.int64).reshape(-1, 2)
+
+    attempt_ids = np.array([attempt[0] for attempt in attempts], dtype=np.int64)
+    question_ids = np.union1d(presented_pairs[:, 1], answers[:, 1].astype(np.int64))
+
+    if not len(attempt_ids) or not len(question_ids):
+        return {
+            'attempts_count': len(attempt_ids),
+            'questions_count': 0,
+            'group_size': 0,
+            'kr20': None,
+            'mean_correct': None,
+            'std_correct': None,
+            'questions': []
+        }
+
+    # ماتریس‌های تلاش × سوال (attempt_ids و question_ids مرتب هستند)
+    attempt_ids.sort()
+    answer_rows = np.searchsorted(attempt_ids, answers[:, 0].astype(np.int64))
+    answer_cols = np.searchsorted(question_ids, answers[:, 1].astype(np.int64))
+
+    presented = np.zeros((len(attempt_ids), len(question_ids)), dtype=bool)
+    presented_rows = np.searchsorted(attempt_ids, presented_pairs[:, 0])
+    presented[presented_rows, np.searchsorted(question_ids, presented_pairs[:, 1])] = True
+    presented[answer_rows, answer_cols] = True
+
+    correct = np.zeros_like(presented)
+    correct[answer_rows, answer_cols] = answers[:, 3].astype(bool)
+
+    presented_count = presented.sum(axis=0)
+    correct_count = correct.sum(axis=0)
+    answered_count = np.bincount(answer_cols, minlength=len(question_ids))
+    difficulty = _rate(correct_count, presented_count)
+
+    # گروه‌های بالا و پایین بر اساس تعداد پاسخ صحیح
+    totals = correct.sum(axis=1)
+    group_size = max(1, int(round(GROUP_RATIO * len(attempt_ids))))
+    ranking = np.argsort(totals, kind='stable')
+    lower, upper = ranking[:group_size], ranking[-group_size:]
+    discrimination = (
+        _rate(correct[upper].sum(axis=0), presented[upper].sum(axis=0))
+        - _rate(correct[lower].sum(axis=0), presented[lower].sum(axis=0))
+    )
+
+    # KR-20 = k/(k-1) * (1 - Σpq / σ²)
+    item_variance = np.nan_to_num(difficulty * (1 - difficulty))
+    sum_pq = (presented @ item_variance).mean()
+    k = presented.sum(axis=1).mean()
+    total_variance = totals.var()
+    kr20 = k / (k - 1) * (1 - sum_pq / total_variance) if k > 1 and total_variance > 0 else np.nan
+
+    # درصد انتخاب گزینه‌ها؛ ترتیب ثابت گزینه‌ها (مانند برگه آزمون) تا خروجی در هر بار تحلیل یکسان باشد
+    options = list(QuestionOption.objects.filter(question_id__in=question_ids.tolist()).order_by(
+        'question_id', 'order', 'id'
+    ).values_list('id', 'question_id', 'text', 'is_correct'))
+    option_ids = np.array([option[0] for option in options], dtype=np.int64)
+    option_cols = np.searchsorted(question_ids, np.array([option[1] for option in options], dtype=np.int64))
+    id_order = np.argsort(option_ids)
+
+    selected = np.array([option_id for option_id in answers[:, 2] if option_id is not None], dtype=np.int64)
+    selected = selected[np.isin(selected, option_ids)]
+    option_counts = np.bincount(
+        id_order[np.searchsorted(option_ids[id_order], selected)], minlength=len(option_ids)
+    )
+    selection_rate = _rate(option_counts, presented_count[option_cols])
+
+    options_by_question = {}
+    for i, (option_id, question_id, text, is_correct) in enumerate(options):
+        options_by_question.setdefault(question_id, []).append({
+            'option_id': option_id,
+            'text': text,
+            'is_correct': is_correct,
+            'selection_rate': _value(selection_rate[i]),
+        })
+
+    omit_rate = _rate(presented_count - answered_count, presented_count)
+    questions = Question.objects.filter(id__in=question_ids.tolist()).values_list('id', 'text', 'difficulty')
+
+    question_index = {question_id: i for i, question_id in enumerate(question_ids.tolist())}
+    results = []
+    for question_id, text, level in questions:
+        col = question_index[question_id]
+        results.append({
+            'question_id': question_id,
+            'text': text,
+            'difficulty': level,
+            'presented_count': int(presented_count[col]),
+            'correct_count': int(correct_count[col]),
+            'difficulty_index': _value(difficulty[col]),
+            'discrimination_index': _value(discrimination[col]),
+            'omit_rate': _value(omit_rate[col]),
+            'options': options_by_question.get(question_id, [])
+        })
+    results.sort(key=lambda item: item['question_id'])
+
+    return {
+        'attempts_count': len(attempt_ids),
+        'questions_count': len(question_ids),
+        'group_size': group_size,
+        'kr20': _value(kr20),
+        'mean_correct': _value(totals.mean()),
+        'std_correct': _value(totals.std()),
+        'questions': results
+    }
@@ -0,0 +1,83 @@
+# lms/services/keyset.py
+"""
+صفحه‌بندی keyset (cursor)
+
+به جای OFFSET هر صفحه با شرط «بعد از آخرین ردیف صفحه قبل» روی ستون‌های مرتب‌سازی
+خوانده می‌شود و COUNT(*) هم اجرا نمی‌شود؛ با ایندکس مناسب هزینه صفحه N برابر
+صفحه اول است. آخرین ستون مرتب‌سازی باید یکتا باشد (معمولاً id).
+
+cursor برای کلاینت مبهم است: base64 مقادیر ستون‌های مرتب‌سازی آخرین ردیف صفحه.
+"""
+import base64
+import json
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _field_name(field):
+    return field.lstrip('-')
+
+
+def _dump(value):
+    # isoformat کامل (با میکروثانیه) تا ردیف‌های هم‌زمان جا نیفتند
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """اندازه صفحه از query string؛ در صورت نامعتبر بودن ValueError"""
+    page_size = min(int(value), maximum) if value not in (None, '') else default
+    if page_size < 1:
+        raise ValueError("page_size نامعتبر است")
+    return page_size
+
+
+def encode_cursor(obj, ordering):
+    values = [_dump(getattr(obj, _field_name(field))) for field in ordering]
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode()
+
+
+def decode_cursor(cursor, model, ordering):
+    """مقادیر ستون‌های مرتب‌سازی از cursor؛ در صورت نامعتبر بودن ValueError"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        if not isinstance(values, list) or len(values) != len(ordering) or None in values:
+            raise ValueError
+        return [
+            model._meta.get_field(_field_name(field)).to_python(value)
+            for field, value in zip(ordering, values)
+        ]
+    except (ValueError, TypeError, UnicodeError, ValidationError) as e:
+        raise ValueError("cursor نامعتبر است") from e
+
+
+def keyset_filter(ordering, values):
+    """
+    شرط ردیف‌های بعد از values، مثلا برای ('-created_at', '-id'):
+    created_at <= v0 AND (created_at < v0 OR (created_at = v0 AND id < v1))
+
+    شرط اول اضافی است ولی به PostgreSQL اجازه می‌دهد از ابتدای بازه ایندکس شروع کند.
+    """
+    condition = Q()
+    for i, field in enumerate(ordering):
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        equal = {_field_name(previous): value for previous, value in zip(ordering[:i], values[:i])}
+        condition |= Q(**equal, **{f"{_field_name(field)}__{lookup}": values[i]})
+
+    first = ordering[0]
+    return Q(**{f"{_field_name(first)}__{'lte' if first.startswith('-') else 'gte'}": values[0]}) & condition
+
+
+def get_page(queryset, ordering, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """(ردیف‌های صفحه، cursor صفحه بعد یا None)"""
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(keyset_filter(ordering, decode_cursor(cursor, queryset.model, ordering)))
+
+    # یک ردیف اضافه برای تشخیص وجود صفحه بعد
+    page = list(queryset[:page_size + 1])
+    has_next = len(page) > page_size
+    page = page[:page_size]
+    return page, encode_cursor(page[-1], ordering) if has_next else None
@@ -0,0 +1,248 @@
+# lms/services/load_test.py
+"""
+تست بار شروع همزمان آزمون
+
+هر دانش‌آموز مجازی در یک thread جداگانه همان مسیر واقعی را طی می‌کند:
+ورود (ساخت توکن JWT)، چند بار خواندن داشبورد، بررسی دسترسی و شروع آزمون
+همزمان با بقیه (با Barrier)، ثبت پاسخ‌ها با فاصله زمانی تصادفی و پایان آزمون.
+
+درخواست‌ها یا داخل همین پروسه با django.test.Client (بدون شبکه) یا با requests
+به یک سرور در حال اجرا (base_url) فرستاده می‌شوند. تعداد کوئری هر درخواست از
+هدر X-DB-Queries (QueryCountMiddleware) خوانده می‌شود؛ در حالت HTTP سرور باید
+با LMS_QUERY_COUNT_HEADER=1 اجرا شده باشد.
+"""
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from django.db import close_old_connections, connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from ..models import Exam, ExamAttempt, ExamQuestionSelection
+from .dashboard import invalidate_student_dashboard
+from .exam_statistics import rebuild_exam_statistics
+
+API_PREFIX = '/lms/v1/quiz'
+PERCENTILES = (50, 95, 99)
+BARRIER_TIMEOUT = 120
+
+ENDPOINT_DASHBOARD = 'dashboard'
+ENDPOINT_CHECK = 'check'
+ENDPOINT_START = 'start'
+ENDPOINT_ANSWER = 'answer'
+ENDPOINT_FINISH = 'finish'
+ENDPOINTS = [ENDPOINT_DASHBOARD, ENDPOINT_CHECK, ENDPOINT_START, ENDPOINT_ANSWER, ENDPOINT_FINISH]
+
+
+def pick_exam():
+    """آزمون باز با بیشترین دانش‌آموز دعوت شده"""
+    now = timezone.now()
+    return Exam.objects.filter(
+        is_published=True, allowed_entry_start__lte=now, allowed_entry_end__gte=now
+    ).annotate(n=Count('invited_students')).order_by('-n', 'id').first()
+
+
+def reset_exam(exam, keep_papers=False):
+    """
+    حذف تلاش‌های قبلی آزمون تا دانش‌آموزان دوباره بتوانند شروع کنند
+
+    سوالات ذخیره شده دانش‌آموزان (ExamQuestionSelection) هم حذف می‌شوند؛ در غیر
+    این صورت شروع آزمون برگه اجرای قبلی را مانند برگه از پیش ساخته شده می‌خواند.
+    با keep_papers=True برگه‌ها (مثلا برگه‌های از پیش ساخته شده) می‌مانند تا مسیر
+    شروع با برگه آماده سنجیده شود.
+    """
+    attempts = ExamAttempt.objects.filter(exam=exam)
+    student_ids = set(attempts.values_list('student_id', flat=True))
+    attempts.delete()
+    if not keep_papers:
+        ExamQuestionSelection.objects.filter(exam=exam).delete()
+    rebuild_exam_statistics(exam.id)
+    invalidate_student_dashboard(*student_ids)
+
+
+def pick_students(exam, count):
+    """دانش‌آموزان دعوت شده‌ای که هنوز در آزمون شرکت نکرده‌اند"""
+    return list(
+        exam.invited_students.exclude(attempts__exam=exam).exclude(user__isnull=True)
+        .select_related('user').order_by('id')[:count]
+    )
+
+
+class LocalTransport:
+    """ارسال درخواست داخل همین پروسه (هر thread اتصال دیتابیس خودش را دارد)"""
+
+    def __init__(self, token):
+        self.client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def request(self, method, path, payload=None):
+        if method == 'GET':
+            response = self.client.get(path)
+        else:
+            response = self.client.post(path, json.dumps(payload or {}), content_type='application/json')
+        return response.status_code, response.headers.get('X-DB-Queries'), _json(response.content)
+
+    def close(self):
+        connection.close()
+
+
+class HttpTransport:
+    """ارسال درخواست به سرور در حال اجرا"""
+
+    def __init__(self, token, base_url):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f"Bearer {token}"
+
+    def request(self, method, path, payload=None):
+        response = self.session.request(method, self.base_url + path, json=payload)
+        return response.status_code, response.headers.get('X-DB-Queries'), _json(response.content)
+
+    def close(self):
+        self.session.close()
+
+
+def _json(content):
+    try:
+        return json.loads(content)
+    except ValueError:
+        return None
+
+
+class Recorder:
+    """نتیجه درخواست‌ها به تفکیک endpoint"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)  # endpoint -> [(latency_ms, status_code, queries)]
+        self.error_messages = defaultdict(Counter)
+
+    def add(self, endpoint, latency_ms, status_code, queries, body=None):
+        with self.lock:
+            self.samples[endpoint].append((latency_ms, status_code, queries))
+            if status_code >= 400:
+                message = body.get('message') if isinstance(body, dict) else None
+                self.error_messages[endpoint][message or f"HTTP {status_code}"] += 1
+
+    def report(self):
+        report = {}
+        for endpoint in ENDPOINTS:
+            samples = self.samples.get(endpoint)
+            if not samples:
+                continue
+            latencies = sorted(sample[0] for sample in samples)
+            queries = [int(sample[2]) for sample in samples if sample[2] is not None]
+            report[endpoint] = {
+                'requests': len(samples),
+                'errors': sum(1 for sample in samples if sample[1] >= 400),
+                **{f"p{pct}_ms": round(percentile(latencies, pct), 1) for pct in PERCENTILES},
+                'max_ms': round(latencies[-1], 1),
+                'queries_avg': round(sum(queries) / len(queries), 1) if queries else None,
+                'queries_max': max(queries) if queries else None,
+                'error_messages': dict(self.error_messages[endpoint]),
+            }
+        return report
+
+
+def percentile(sorted_values, pct):
+    """صدک به روش nearest-rank"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class VirtualStudent:
+    def __init__(self, exam, student, transport, recorder, barrier, rng, answer_interval, dashboard_polls):
+        self.exam = exam
+        self.student = student
+        self.transport = transport
+        self.recorder = recorder
+        self.barrier = barrier
+        self.rng = rng
+        self.answer_interval = answer_interval
+        self.dashboard_polls = dashboard_polls
+
+    def _call(self, endpoint, method, path, payload=None):
+        started = time.perf_counter()
+        status_code, queries, body = self.transport.request(method, API_PREFIX + path, payload)
+        self.recorder.add(endpoint, (time.perf_counter() - started) * 1000, status_code, queries, body)
+        return status_code, body
+
+    def _think(self):
+        if self.answer_interval:
+            time.sleep(self.rng.uniform(0.5, 1.5) * self.answer_interval)
+
+    def run(self):
+        for _ in range(self.dashboard_polls):
+            self._call(ENDPOINT_DASHBOARD, 'GET', '/dashboard/')
+
+        # همه دانش‌آموزان با هم وارد آزمون می‌شوند
+        self.barrier.wait(BARRIER_TIMEOUT)
+        self._call(ENDPOINT_CHECK, 'POST', '/check/', {'exam_id': self.exam.id})
+        status_code, body = self._call(ENDPOINT_START, 'POST', '/start/', {'exam_id': self.exam.id})
+        if status_code != 200 or not body:
+            return
+
+        data = body['data']
+        for question in data['questions']:
+            self._think()
+            self._call(ENDPOINT_ANSWER, 'POST', '/answer/', {
+                'attempt_id': data['attempt_id'],
+                'question_id': question['id'],
+                'option_id': self.rng.choice(question['options'])['id'],
+            })
+
+        self._think()
+        self._call(ENDPOINT_FINISH, 'POST', '/finish/', {'attempt_id': data['attempt_id']})
+
+
+def _worker(virtual_student, errors):
+    try:
+        virtual_student.run()
+    except Exception as exc:  # خطای یک دانش‌آموز نباید بقیه را متوقف کند
+        errors.append(f"{virtual_student.student.mobile}: {exc!r}")
+        virtual_student.barrier.abort()
+    finally:
+        virtual_student.transport.close()
+
+
+def run_load_test(exam, students, base_url=None, answer_interval=0.0, dashboard_polls=2, seed=1):
+    """
+    اجرای سناریو برای دانش‌آموزان داده شده
+
+    خروجی: {'students', 'duration_s', 'errors', 'endpoints': {endpoint: آمار}}
+    """
+    recorder = Recorder()
+    barrier = threading.Barrier(len(students))
+    errors = []
+    rng = random.Random(seed)
+
+    threads = []
+    for student in students:
+        token = str(RefreshToken.for_user(student.user).access_token)
+        transport = HttpTransport(token, base_url) if base_url else LocalTransport(token)
+        virtual_student = VirtualStudent(
+            exam, student, transport, recorder, barrier, random.Random(rng.random()),
+            answer_interval, dashboard_polls
+        )
+        threads.append(threading.Thread(target=_worker, args=(virtual_student, errors)))
+
+    close_old_connections()
+    started = time.perf_counter()
+    with override_settings(LMS_QUERY_COUNT_HEADER=True):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    return {
+        'students': len(students),
+        'duration_s': round(time.perf_counter() - started, 2),
+        'errors': errors,
+        'endpoints': recorder.report(),
+    }
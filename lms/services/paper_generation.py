@@ -0,0 +1,192 @@
+# lms/services/paper_generation.py
+"""
+ساخت پیش‌از‌موعد سوالات شخصی‌سازی شده آزمون
+
+بعد از انتشار آزمون، سوالات هر دانش‌آموز دعوت شده (و ترتیب گزینه‌ها) به صورت
+دسته‌ای در ExamQuestionSelection ذخیره می‌شود تا شروع آزمون فقط یک خواندن ساده باشد.
+
+انتشار آزمون فقط وضعیت را pending می‌کند؛ ساخت توسط دستور pregenerate_exam_papers
+(با cron) انجام می‌شود. اجرای running که مدتی پیشرفت نداشته (پروسه از بین رفته)
+دوباره برداشته می‌شود و از دانش‌آموزان باقی‌مانده ادامه پیدا می‌کند.
+"""
+import logging
+import random
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from ..models import Exam, ExamQuestionSelection, Question, QuestionOption
+from .question_payload import get_question_payloads, option_ids
+from .question_pool import get_question_pool, sample_question_ids
+from .seeded_selection import get_pool_snapshot, seeded_question_ids, seeded_option_order
+
+STUDENT_BATCH_SIZE = 200
+INSERT_BATCH_SIZE = 1000
+# اجرای running بدون پیشرفت در این مدت متوقف شده محسوب می‌شود
+STALE_AFTER = timedelta(minutes=10)
+
+logger = logging.getLogger(__name__)
+
+
+def _set_status(exam_id, **fields):
+    Exam.objects.filter(id=exam_id).update(pregeneration_updated_at=timezone.now(), **fields)
+
+
+def build_option_orders(question_ids):
+    """شناسه گزینه‌های هر سوال به ترتیب پیش‌فرض (با یک کوئری)"""
+    option_orders = {qid: [] for qid in question_ids}
+    options = QuestionOption.objects.filter(
+        question_id__in=question_ids
+    ).order_by('question_id', 'order', 'id').values_list('question_id', 'id')
+    for question_id, option_id in options:
+        option_orders[question_id].append(option_id)
+    return option_orders
+
+
+def select_question_ids(exam, grade_id):
+    """انتخاب شناسه سوالات یک دانش‌آموز از ایندکس بانک سوالات"""
+    pool = get_question_pool(
+        exam.teacher_id,
+        grade_id=exam.grade_id or grade_id,
+        subject_id=exam.subject_id,
+        chapter_id=exam.chapter_id
+    )
+    return sample_question_ids(
+        pool,
+        exam.get_question_distribution(),
+        exam.total_questions_count,
+        shuffle=exam.randomize_questions
+    )
+
+
+def build_selection_rows(exam, student_id, question_ids, option_orders):
+    rows = []
+    for idx, question_id in enumerate(question_ids):
+        option_ids = list(option_orders.get(question_id, []))
+        if exam.randomize_options:
+            random.shuffle(option_ids)
+        rows.append(ExamQuestionSelection(
+            exam_id=exam.id,
+            student_id=student_id,
+            question_id=question_id,
+            order=idx + 1,
+            option_order=option_ids
+        ))
+    return rows
+
+
+def load_attempt_paper(attempt):
+    """
+    سوالات یک تلاش به ترتیب نمایش: [(payload, option_order), ...]
+
+    داده نمایشی سوالات از کش خوانده می‌شود. در حالت seeded سوالات از روی seed
+    دوباره ساخته می‌شوند و در غیر این صورت از ExamQuestionSelection خوانده می‌شوند.
+    """
+    exam = attempt.exam
+
+    if attempt.selection_seed is not None and attempt.pool_snapshot_id:
+        question_ids = seeded_question_ids(exam, attempt.pool_snapshot, attempt.selection_seed)
+        payloads = get_question_payloads(dict(
+            Question.objects.filter(id__in=question_ids).values_list('id', 'updated_at')
+        ))
+        return [
+            (payloads[qid], seeded_option_order(exam, attempt.selection_seed, qid, option_ids(payloads[qid])))
+            for qid in question_ids if qid in payloads
+        ]
+
+    selections = list(ExamQuestionSelection.objects.filter(
+        exam_id=attempt.exam_id,
+        student_id=attempt.student_id
+    ).order_by('order').values_list('question_id', 'option_order', 'question__updated_at'))
+    payloads = get_question_payloads({qid: updated_at for qid, _, updated_at in selections})
+    return [(payloads[qid], option_order) for qid, option_order, _ in selections if qid in payloads]
+
+
+def pregenerate_exam_papers(exam_id):
+    """ساخت سوالات تمام دانش‌آموزان دعوت شده یک آزمون"""
+    exam = Exam.objects.get(id=exam_id)
+    _set_status(exam_id, pregeneration_status='running', pregenerated_count=0)
+
+    if exam.selection_mode == 'seeded':
+        return _pregenerate_snapshots(exam)
+
+    try:
+        ready_student_ids = set(
+            ExamQuestionSelection.objects.filter(exam=exam).values_list('student_id', flat=True).distinct()
+        )
+        students = list(exam.invited_students.values_list('id', 'grade_id'))
+        generated = len(ready_student_ids)
+
+        for start in range(0, len(students), STUDENT_BATCH_SIZE):
+            batch = [s for s in students[start:start + STUDENT_BATCH_SIZE] if s[0] not in ready_student_ids]
+
+            papers = []
+            for student_id, grade_id in batch:
+                question_ids = select_question_ids(exam, grade_id)
+                # اگر سوال کافی نباشد، خطا هنگام شروع آزمون به دانش‌آموز نمایش داده می‌شود
+                if len(question_ids) < exam.total_questions_count:
+                    continue
+                papers.append((student_id, question_ids))
+
+            option_orders = build_option_orders({qid for _, ids in papers for qid in ids})
+
+            rows = []
+            for student_id, question_ids in papers:
+                rows.extend(build_selection_rows(exam, student_id, question_ids, option_orders))
+
+            with transaction.atomic():
+                ExamQuestionSelection.objects.bulk_create(rows, batch_size=INSERT_BATCH_SIZE, ignore_conflicts=True)
+
+            generated += len(papers)
+            _set_status(exam_id, pregenerated_count=generated)
+
+    except Exception:
+        logger.exception("Pregeneration failed for exam %s", exam_id)
+        _set_status(exam_id, pregeneration_status='failed')
+        raise
+
+    _set_status(exam_id, pregeneration_status='completed', pregenerated_count=generated)
+    return generated
+
+
+def _pregenerate_snapshots(exam):
+    """در حالت seeded فقط نسخه ثابت بانک سوالات برای پایه‌های دانش‌آموزان ساخته می‌شود"""
+    try:
+        if exam.grade_id:
+            grade_ids = {exam.grade_id}
+        else:
+            grade_ids = set(exam.invited_students.values_list('grade_id', flat=True))
+        for grade_id in grade_ids:
+            get_pool_snapshot(exam, grade_id)
+    except Exception:
+        logger.exception("Pregeneration failed for exam %s", exam.id)
+        _set_status(exam.id, pregeneration_status='failed')
+        raise
+
+    generated = exam.invited_students.count()
+    _set_status(exam.id, pregeneration_status='completed', pregenerated_count=generated)
+    return generated
+
+
+def schedule_pregeneration(exam):
+    """ثبت آزمون در صف ساخت (اجرا توسط دستور pregenerate_exam_papers)"""
+    _set_status(exam.id, pregeneration_status='pending', pregenerated_count=0)
+    exam.pregeneration_status = 'pending'
+    exam.pregenerated_count = 0
+
+
+def pending_exams(now=None):
+    """آزمون‌های منتشر شده و هنوز قابل شرکتی که ساختشان شروع نشده، ناموفق بوده یا متوقف شده است"""
+    now = now or timezone.now()
+    stale = Q(pregeneration_updated_at__lt=now - STALE_AFTER) | Q(pregeneration_updated_at=None)
+    return Exam.objects.filter(is_published=True, allowed_entry_end__gt=now).filter(
+        Q(pregeneration_status__in=['not_started', 'pending', 'failed']) | Q(pregeneration_status='running') & stale
+    )
+
+
+def claim_pregeneration(exam_id, now=None):
+    """برداشتن آزمون از صف؛ False اگر اجرای دیگری زودتر آن را برداشته باشد"""
+    now = now or timezone.now()
+    return bool(pending_exams(now).filter(id=exam_id).update(
+        pregeneration_status='running', pregeneration_updated_at=now
+    ))
@@ -0,0 +1,156 @@
+# lms/services/question_counters.py
+"""
+شمارنده‌های سوالات فعال
+
+تعداد سوالات فعال هر درس و فصل (Subject.question_count و Chapter.question_count)
+و هر معلم به تفکیک درجه سختی (TeacherQuestionCounter) به جای COUNT در هر لیست
+نگهداری می‌شود. ایجاد، ویرایش و حذف سوال در همان تراکنش با
+UPDATE ... SET count = count + n شمارنده‌ها را تغییر می‌دهد.
+
+اگر شمارنده‌ها به هر دلیلی (تغییر مستقیم دیتابیس، حذف آبشاری) اختلاف پیدا کنند،
+reconcile_question_counters همه را از روی جدول سوالات دوباره محاسبه می‌کند
+(دستور rebuild_question_counters).
+"""
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Greatest
+from ..models import Subject, Chapter, Question, TeacherQuestionCounter
+
+
+def question_state(question):
+    """(معلم، درس، فصل، درجه سختی) سوال برای شمارش؛ None برای سوال غیرفعال یا حذف شده"""
+    if question is None or not question.is_active:
+        return None
+    return question.teacher_id, question.subject_id, question.chapter_id, question.difficulty
+
+
+def _increment(queryset, field, delta):
+    # شمارنده منفی نمی‌شود حتی اگر قبلا اختلاف داشته باشد
+    return queryset.update(**{field: Greatest(F(field) + delta, Value(0))})
+
+
+def apply_question_changes(removed=(), added=()):
+    """
+    کم کردن وضعیت‌های removed و اضافه کردن وضعیت‌های added (خروجی question_state)
+
+    باید در همان تراکنش تغییر سوالات صدا زده شود. برای هر درس، فصل و
+    (معلم، درجه سختی) متمایز فقط یک UPDATE اجرا می‌شود.
+    """
+    subjects, chapters, teachers = Counter(), Counter(), Counter()
+    for states, delta in ((removed, -1), (added, 1)):
+        for state in states:
+            if state is None:
+                continue
+            teacher_id, subject_id, chapter_id, difficulty = state
+            subjects[subject_id] += delta
+            if chapter_id:
+                chapters[chapter_id] += delta
+            teachers[teacher_id, difficulty] += delta
+
+    # ترتیب ثابت قفل ردیف‌ها تا تراکنش‌های همزمان در بن‌بست نیفتند
+    for subject_id, delta in sorted(subjects.items()):
+        if delta:
+            _increment(Subject.objects.filter(id=subject_id), 'question_count', delta)
+    for chapter_id, delta in sorted(chapters.items()):
+        if delta:
+            _increment(Chapter.objects.filter(id=chapter_id), 'question_count', delta)
+    for (teacher_id, difficulty), delta in sorted(teachers.items()):
+        if not delta:
+            continue
+        counter = TeacherQuestionCounter.objects.filter(teacher_id=teacher_id, difficulty=difficulty)
+        if _increment(counter, 'count', delta):
+            continue
+        # اولین سوال این معلم با این درجه سختی
+        _, created = TeacherQuestionCounter.objects.get_or_create(
+            teacher_id=teacher_id, difficulty=difficulty, defaults={'count': max(delta, 0)}
+        )
+        if not created:
+            _increment(counter, 'count', delta)
+
+
+def record_question_change(before, after):
+    """بروزرسانی شمارنده‌ها برای تغییر یک سوال (before/after خروجی question_state)"""
+    if before != after:
+        apply_question_changes(removed=[before], added=[after])
+
+
+def available_question_bound(teacher_id, subject_id=None, chapter_id=None):
+    """
+    حد بالای تعداد سوالات فعال معلم در درس/فصل (بدون شمارش بانک سوالات)
+
+    اگر این عدد از تعداد سوالات آزمون کمتر باشد، آزمون قطعا قابل ساخت نیست.
+    """
+    bound = TeacherQuestionCounter.objects.filter(teacher_id=teacher_id).aggregate(total=Sum('count'))['total'] or 0
+    if chapter_id:
+        bound = min(bound, Chapter.objects.filter(id=chapter_id).values_list('question_count', flat=True).first() or 0)
+    elif subject_id:
+        bound = min(bound, Subject.objects.filter(id=subject_id).values_list('question_count', flat=True).first() or 0)
+    return bound
+
+
+def compute_question_counters():
+    """محاسبه کامل شمارنده‌ها از روی جدول سوالات"""
+    active = Question.objects.filter(is_active=True).order_by()
+    return {
+        'subjects': dict(active.values('subject_id').annotate(total=Count('id')).values_list('subject_id', 'total')),
+        'chapters': dict(
+            active.exclude(chapter_id=None).values('chapter_id').annotate(total=Count('id'))
+            .values_list('chapter_id', 'total')
+        ),
+        'teachers': {
+            (teacher_id, difficulty): total
+            for teacher_id, difficulty, total in active.values('teacher_id', 'difficulty').annotate(
+                total=Count('id')
+            ).values_list('teacher_id', 'difficulty', 'total')
+        },
+    }
+
+
+def _fix_counts(model, field, current, expected, check):
+    drifted = [
+        model(id=pk, **{field: expected.get(pk, 0)})
+        for pk, count in current.items()
+        if count != expected.get(pk, 0)
+    ]
+    if drifted and not check:
+        model.objects.bulk_update(drifted, [field], batch_size=1000)
+    return len(drifted)
+
+
+@transaction.atomic
+def reconcile_question_counters(check=False):
+    """
+    بازسازی همه شمارنده‌ها؛ خروجی: تعداد ردیف‌های دارای اختلاف {'subjects', 'chapters', 'teachers'}
+
+    ردیف‌های شمارنده قبل از شمارش قفل می‌شوند تا تغییرات همزمان سوالات بعد از
+    بازسازی اعمال شوند و از دست نروند. با check=True چیزی ذخیره نمی‌شود.
+    """
+    subjects = dict(Subject.objects.select_for_update().values_list('id', 'question_count'))
+    chapters = dict(Chapter.objects.select_for_update().values_list('id', 'question_count'))
+    teachers = {
+        (counter.teacher_id, counter.difficulty): counter
+        for counter in TeacherQuestionCounter.objects.select_for_update()
+    }
+
+    expected = compute_question_counters()
+    drift = {
+        'subjects': _fix_counts(Subject, 'question_count', subjects, expected['subjects'], check),
+        'chapters': _fix_counts(Chapter, 'question_count', chapters, expected['chapters'], check),
+    }
+
+    changed, created = [], []
+    for key in sorted(teachers.keys() | expected['teachers'].keys()):
+        count = expected['teachers'].get(key, 0)
+        counter = teachers.get(key)
+        if counter is None:
+            created.append(TeacherQuestionCounter(teacher_id=key[0], difficulty=key[1], count=count))
+        elif counter.count != count:
+            counter.count = count
+            changed.append(counter)
+    drift['teachers'] = len(changed) + len(created)
+
+    if not check:
+        TeacherQuestionCounter.objects.bulk_update(changed, ['count'], batch_size=1000)
+        TeacherQuestionCounter.objects.bulk_create(created, batch_size=1000)
+    return drift
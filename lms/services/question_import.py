@@ -0,0 +1,234 @@
+# lms/services/question_import.py
+"""
+ورود دسته‌ای سوالات از فایل CSV یا JSON-lines
+
+فایل به صورت جریانی (ردیف به ردیف) خوانده می‌شود و ردیف‌ها در دسته‌های
+batch_size تایی اعتبارسنجی و با bulk_create (یک INSERT برای سوالات و یک INSERT
+برای گزینه‌های هر دسته) ذخیره می‌شوند. ردیف‌های نامعتبر ذخیره نمی‌شوند و با
+شماره ردیف در گزارش خطا برمی‌گردند.
+
+ستون‌های CSV (سطر اول عنوان ستون‌ها):
+    text, grade, subject, chapter, difficulty, estimated_time, explanation,
+    option_1, option_2, option_3, option_4, correct_option (۱ تا ۴)
+
+هر خط JSON-lines:
+    {"text": ..., "grade": 1, "subject": 2, "chapter": null, "difficulty": "easy",
+     "estimated_time": 60, "explanation": "",
+     "options": [{"text": ..., "is_correct": true}, ...]}
+
+grade، subject و chapter شناسه هستند (مانند API ساخت سوال).
+"""
+import csv
+import io
+import json
+from django.db import transaction
+from ..models import Grade, Subject, Chapter, Question, QuestionOption
+from .question_counters import apply_question_changes, question_state
+from .question_pool import invalidate_teacher_pool
+from .taxonomy import invalidate_taxonomy
+
+FORMAT_CSV = 'csv'
+FORMAT_JSONL = 'jsonl'
+FORMATS = [FORMAT_CSV, FORMAT_JSONL]
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_UPLOAD_ROWS = 20000  # حداکثر ردیف در هر آپلود از طریق API
+MAX_REPORTED_ERRORS = 500
+OPTIONS_COUNT = 4
+MIN_ESTIMATED_TIME = 10
+MAX_ESTIMATED_TIME = 300
+DIFFICULTIES = {key for key, _ in Question.DIFFICULTY_CHOICES}
+
+
+def detect_format(filename):
+    """تشخیص فرمت از پسوند فایل"""
+    name = (filename or '').lower()
+    if name.endswith('.csv'):
+        return FORMAT_CSV
+    if name.endswith(('.jsonl', '.ndjson', '.json')):
+        return FORMAT_JSONL
+    return None
+
+
+def _csv_rows(stream):
+    reader = csv.DictReader(stream)
+    for row in reader:
+        try:
+            correct = int(row.get('correct_option') or 0)
+        except ValueError:
+            correct = 0
+        # شماره خط فایل (سطر عنوان خط ۱ است)
+        yield reader.line_num, {
+            'text': row.get('text'),
+            'grade': row.get('grade'),
+            'subject': row.get('subject'),
+            'chapter': row.get('chapter'),
+            'difficulty': row.get('difficulty'),
+            'estimated_time': row.get('estimated_time'),
+            'explanation': row.get('explanation'),
+            'options': [
+                {'text': row.get(f'option_{i}'), 'is_correct': i == correct}
+                for i in range(1, OPTIONS_COUNT + 1)
+            ],
+        }
+
+
+def _jsonl_rows(stream):
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def iter_rows(stream, fmt):
+    """(شماره ردیف، داده) برای هر ردیف فایل متنی؛ داده None یعنی ردیف قابل خواندن نیست"""
+    if fmt == FORMAT_CSV:
+        return _csv_rows(stream)
+    return _jsonl_rows(stream)
+
+
+def open_text(fileobj):
+    """فایل باینری آپلود شده را به صورت متنی (UTF-8 با یا بدون BOM) باز می‌کند"""
+    return io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+
+
+class _Taxonomy:
+    """پایه‌ها، دروس و فصل‌ها یک بار خوانده می‌شوند (نه یک کوئری برای هر ردیف)"""
+
+    def __init__(self):
+        self.grades = set(Grade.objects.values_list('id', flat=True))
+        self.subject_grade = dict(Subject.objects.values_list('id', 'grade_id'))
+        self.chapter_subject = dict(Chapter.objects.values_list('id', 'subject_id'))
+
+
+def _text(value):
+    return str(value).strip() if value is not None else ''
+
+
+def _to_int(value):
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return False
+
+
+def validate_row(row, taxonomy):
+    """اعتبارسنجی یک ردیف؛ خروجی: (داده تمیز شده، دیکشنری خطاها)"""
+    if row is None:
+        return None, {'row': 'فرمت ردیف صحیح نیست'}
+
+    errors = {}
+    text = _text(row.get('text'))
+    if not text:
+        errors['text'] = 'متن سوال الزامی است'
+
+    grade_id = _to_int(row.get('grade'))
+    subject_id = _to_int(row.get('subject'))
+    chapter_id = _to_int(row.get('chapter'))
+    if grade_id not in taxonomy.grades:
+        errors['grade'] = 'پایه تحصیلی معتبر نیست'
+    if subject_id not in taxonomy.subject_grade:
+        errors['subject'] = 'درس معتبر نیست'
+    elif 'grade' not in errors and taxonomy.subject_grade[subject_id] != grade_id:
+        errors['subject'] = 'درس متعلق به این پایه نیست'
+    if chapter_id is False or (chapter_id is not None and chapter_id not in taxonomy.chapter_subject):
+        errors['chapter'] = 'فصل معتبر نیست'
+    elif chapter_id is not None and 'subject' not in errors and taxonomy.chapter_subject[chapter_id] != subject_id:
+        errors['chapter'] = 'فصل متعلق به این درس نیست'
+
+    difficulty = _text(row.get('difficulty'))
+    if difficulty not in DIFFICULTIES:
+        errors['difficulty'] = 'درجه سختی معتبر نیست'
+
+    estimated_time = _to_int(row.get('estimated_time'))
+    if not estimated_time:
+        errors['estimated_time'] = 'زمان تخمینی پاسخ الزامی است'
+    elif estimated_time < MIN_ESTIMATED_TIME:
+        errors['estimated_time'] = 'زمان تخمینی پاسخ حداقل ۱۰ ثانیه باشد'
+    elif estimated_time > MAX_ESTIMATED_TIME:
+        errors['estimated_time'] = 'زمان تخمینی پاسخ حداکثر ۳۰۰ ثانیه باشد'
+
+    options = row.get('options')
+    if not isinstance(options, list) or len(options) != OPTIONS_COUNT:
+        errors['options'] = 'سوال باید دقیقاً ۴ گزینه داشته باشد'
+    elif not all(isinstance(option, dict) for option in options):
+        errors['options'] = 'فرمت گزینه‌ها صحیح نیست'
+    elif sum(1 for option in options if option.get('is_correct')) != 1:
+        errors['options'] = 'سوال باید دقیقاً یک گزینه صحیح داشته باشد'
+    else:
+        for idx, option in enumerate(options):
+            if not _text(option.get('text')):
+                errors['options'] = f"گزینه {chr(65 + idx)}: متن گزینه الزامی است"
+                break
+
+    if errors:
+        return None, errors
+
+    return {
+        'text': text,
+        'grade_id': grade_id,
+        'subject_id': subject_id,
+        'chapter_id': chapter_id,
+        'difficulty': difficulty,
+        'estimated_time': estimated_time,
+        'explanation': _text(row.get('explanation')),
+        'options': [(_text(option['text']), bool(option.get('is_correct'))) for option in options],
+    }, {}
+
+
+def _save_batch(teacher, batch):
+    with transaction.atomic():
+        questions = Question.objects.bulk_create([
+            Question(teacher=teacher, **{key: value for key, value in data.items() if key != 'options'})
+            for data in batch
+        ])
+        QuestionOption.objects.bulk_create([
+            QuestionOption(question=question, text=text, order=order, is_correct=is_correct)
+            for question, data in zip(questions, batch)
+            for order, (text, is_correct) in enumerate(data['options'], start=1)
+        ])
+        apply_question_changes(added=[question_state(question) for question in questions])
+    return len(questions)
+
+
+def import_questions(teacher, rows, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, max_rows=None):
+    """
+    ورود سوالات از ردیف‌های iter_rows
+
+    خروجی: {'total', 'created', 'failed', 'errors': [{'row', 'errors'}], 'truncated'}
+    """
+    taxonomy = _Taxonomy()
+    report = {'total': 0, 'created': 0, 'failed': 0, 'errors': [], 'truncated': False}
+    batch = []
+
+    for line, row in rows:
+        if max_rows is not None and report['total'] >= max_rows:
+            report['truncated'] = True
+            break
+        report['total'] += 1
+
+        data, errors = validate_row(row, taxonomy)
+        if errors:
+            report['failed'] += 1
+            if len(report['errors']) < MAX_REPORTED_ERRORS:
+                report['errors'].append({'row': line, 'errors': errors})
+            continue
+
+        batch.append(data)
+        if len(batch) >= batch_size:
+            report['created'] += len(batch) if dry_run else _save_batch(teacher, batch)
+            batch = []
+
+    if batch:
+        report['created'] += len(batch) if dry_run else _save_batch(teacher, batch)
+
+    if report['created'] and not dry_run:
+        invalidate_teacher_pool(teacher.id)
+        invalidate_taxonomy()
+    return report
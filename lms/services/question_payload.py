@@ -0,0 +1,92 @@
+# lms/services/question_payload.py
+"""
+کش داده نمایشی سوالات (متن، تصویر و گزینه‌ها)
+
+یک سوال برای صدها دانش‌آموز نمایش داده می‌شود؛ بنابراین داده آن یک بار ساخته
+و با کلید «شناسه سوال + updated_at» در کش ذخیره می‌شود. هر تغییری در سوال یا
+گزینه‌هایش updated_at را تغییر می‌دهد و کلید قبلی دیگر خوانده نمی‌شود.
+"""
+from django.core.cache import cache
+from django.utils import timezone
+from ..models import Question
+
+PAYLOAD_TIMEOUT = 60 * 60 * 24
+
+
+def _payload_key(question_id, updated_at):
+    return f"lms_question_payload_{question_id}_{int(updated_at.timestamp() * 1_000_000)}"
+
+
+def touch_question(question_id):
+    """تغییر نسخه سوال پس از تغییر گزینه‌ها (بدون save کامل سوال)"""
+    Question.objects.filter(id=question_id).update(updated_at=timezone.now())
+
+
+def build_payload(question):
+    """داده سوال با گزینه‌ها به ترتیب پیش‌فرض (گزینه‌ها باید prefetch شده باشند)"""
+    return {
+        'id': question.id,
+        'text': question.text,
+        'estimated_time': question.estimated_time,
+        'image_url': question.image.url if question.image else None,
+        'options': [
+            {
+                'id': opt.id,
+                'text': opt.text,
+                'image_url': opt.image.url if opt.image else None,
+            }
+            for opt in question.options.all()
+        ]
+    }
+
+
+def get_question_payloads(versions):
+    """
+    داده نمایشی چند سوال: {question_id: payload}
+
+    versions: {question_id: updated_at}. سوالات موجود در کش با یک get_many
+    خوانده می‌شوند و بقیه با دو کوئری ساخته و با set_many ذخیره می‌شوند.
+    """
+    keys = {_payload_key(qid, updated_at): qid for qid, updated_at in versions.items()}
+    cached = cache.get_many(keys.keys())
+    payloads = {keys[key]: payload for key, payload in cached.items()}
+
+    missing = [qid for qid in versions if qid not in payloads]
+    if missing:
+        fresh = {}
+        for question in Question.objects.filter(id__in=missing).prefetch_related('options'):
+            payloads[question.id] = build_payload(question)
+            fresh[_payload_key(question.id, question.updated_at)] = payloads[question.id]
+        cache.set_many(fresh, PAYLOAD_TIMEOUT)
+
+    return payloads
+
+
+def get_payloads_for_questions(questions):
+    """داده نمایشی برای سوالاتی که از قبل خوانده شده‌اند"""
+    return get_question_payloads({question.id: question.updated_at for question in questions})
+
+
+def option_ids(payload):
+    return [opt['id'] for opt in payload['options']]
+
+
+def render_question(payload, option_order=None, option_image_key='image_url'):
+    """داده سوال برای پاسخ API با ترتیب گزینه‌های تلاش"""
+    options = payload['options']
+    if option_order:
+        position = {option_id: idx for idx, option_id in enumerate(option_order)}
+        options = sorted(options, key=lambda opt: position.get(opt['id'], len(position)))
+
+    return {
+        **payload,
+        'options': [
+            {
+                'id': opt['id'],
+                'text': opt['text'],
+                option_image_key: opt['image_url'],
+                'order': idx + 1
+            }
+            for idx, opt in enumerate(options)
+        ]
+    }
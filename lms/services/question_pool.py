@@ -0,0 +1,100 @@
+# lms/services/question_pool.py
+"""
+ایندکس بانک سوالات در کش
+
+برای هر ترکیب (معلم، پایه، درس، فصل، درجه سختی) فقط شناسه سوالات فعال
+در کش نگهداری می‌شود تا شروع آزمون نیازی به شمارش و خواندن کل بانک نداشته باشد.
+با هر تغییر در بانک سوالات یک معلم، نسخه ایندکس او افزایش پیدا می‌کند.
+"""
+import random
+import time
+from django.core.cache import cache
+from ..models import Question
+
+POOL_TIMEOUT = 60 * 60  # یک ساعت
+DIFFICULTIES = [key for key, _ in Question.DIFFICULTY_CHOICES]
+
+
+def _version_key(teacher_id):
+    return f"lms_question_pool_version_{teacher_id}"
+
+
+def _pool_key(teacher_id, version, grade_id, subject_id, chapter_id, difficulty):
+    return f"lms_question_pool_{teacher_id}_{version}_{grade_id or 'all'}_{subject_id or 'all'}_{chapter_id or 'all'}_{difficulty}"
+
+
+def _new_version():
+    # نسخه بر اساس زمان ساخته می‌شود تا بعد از پاک شدن کش تکراری نشود
+    return time.time_ns()
+
+
+def get_pool_version(teacher_id):
+    return cache.get_or_set(_version_key(teacher_id), _new_version, timeout=None)
+
+
+def invalidate_teacher_pool(teacher_id):
+    """باطل کردن ایندکس سوالات یک معلم (بعد از ایجاد/ویرایش/حذف سوال)"""
+    cache.set(_version_key(teacher_id), _new_version(), timeout=None)
+
+
+def get_question_pool(teacher_id, grade_id=None, subject_id=None, chapter_id=None):
+    """
+    دریافت شناسه سوالات فعال به تفکیک درجه سختی
+
+    خروجی: {'easy': [...], 'medium': [...], 'hard': [...]}
+    """
+    version = get_pool_version(teacher_id)
+    keys = {
+        difficulty: _pool_key(teacher_id, version, grade_id, subject_id, chapter_id, difficulty)
+        for difficulty in DIFFICULTIES
+    }
+
+    cached = cache.get_many(keys.values())
+    if len(cached) == len(keys):
+        return {difficulty: cached[key] for difficulty, key in keys.items()}
+
+    questions = Question.objects.filter(teacher_id=teacher_id, is_active=True)
+    if grade_id:
+        questions = questions.filter(grade_id=grade_id)
+    if subject_id:
+        questions = questions.filter(subject_id=subject_id)
+    if chapter_id:
+        questions = questions.filter(chapter_id=chapter_id)
+
+    pool = {difficulty: [] for difficulty in DIFFICULTIES}
+    for question_id, difficulty in questions.order_by('id').values_list('id', 'difficulty'):
+        pool.setdefault(difficulty, []).append(question_id)
+
+    cache.set_many({keys[difficulty]: pool[difficulty] for difficulty in DIFFICULTIES}, timeout=POOL_TIMEOUT)
+    return pool
+
+
+def sample_question_ids(pool, distribution, total_count, shuffle=True, rng=random):
+    """
+    انتخاب تصادفی شناسه سوالات از ایندکس بر اساس توزیع درجه سختی
+
+    اگر از یک درجه سختی سوال کافی نباشد، کمبود از سایر سوالات جبران می‌شود.
+    با دادن یک random.Random با seed ثابت، خروجی قابل تکرار است.
+    """
+    selected_ids = []
+    used_ids = set()
+
+    for difficulty, needed in distribution.items():
+        if needed <= 0:
+            continue
+
+        available = [qid for qid in pool.get(difficulty, []) if qid not in used_ids]
+        selected = rng.sample(available, needed) if len(available) >= needed else available
+        selected_ids.extend(selected)
+        used_ids.update(selected)
+
+    if len(selected_ids) < total_count:
+        remaining = total_count - len(selected_ids)
+        others = [qid for difficulty in sorted(pool) for qid in pool[difficulty] if qid not in used_ids]
+        if others:
+            selected_ids.extend(rng.sample(others, min(remaining, len(others))))
+
+    if shuffle:
+        rng.shuffle(selected_ids)
+
+    return selected_ids[:total_count]
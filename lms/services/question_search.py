@@ -0,0 +1,110 @@
+# lms/services/question_search.py
+"""
+جستجو در بانک سوالات
+
+متن جستجو و متن سوالات قبل از مقایسه یکسان‌سازی می‌شوند (ي/ى -> ی، ك -> ک،
+ارقام فارسی/عربی -> لاتین، نیم‌فاصله -> فاصله) تا تفاوت صفحه‌کلیدها مانع پیدا
+شدن سوال نشود.
+
+PostgreSQL: ستون تولیدی search_vector (مهاجرت 0013) با ایندکس GIN؛ هر کلمه به
+صورت پیشوندی جستجو می‌شود. برای تطبیق بخشی از کلمه و غلط تایپی، در صورت نصب
+بودن pg_trgm از word_similarity و در غیر این صورت از LIKE روی متن یکسان شده
+استفاده می‌شود. رتبه نتیجه بیشترین مقدار ts_rank_cd و شباهت trigram است.
+
+سایر دیتابیس‌ها (SQLite در تست‌ها): همه کلمات باید در متن یا توضیح یکسان شده سوال باشند و
+سوالاتی که کل عبارت را دارند بالاتر قرار می‌گیرند.
+"""
+import re
+from django.db import connection
+from django.db.models import BooleanField, Case, FloatField, TextField, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Concat, Lower, Replace
+from ..models import Question
+
+NORMALIZE_MAP = {
+    'ي': 'ی', 'ى': 'ی', 'ك': 'ک', '\u200c': ' ',
+    **{persian: str(digit) for digit, persian in enumerate('۰۱۲۳۴۵۶۷۸۹')},
+    **{arabic: str(digit) for digit, arabic in enumerate('٠١٢٣٤٥٦٧٨٩')},
+}
+_TRANSLATION = str.maketrans(NORMALIZE_MAP)
+MAX_TERMS = 8
+
+_trigram_available = {}
+
+
+def normalize(value):
+    """یکسان‌سازی متن فارسی (مطابق تابع lms_normalize_fa در PostgreSQL)"""
+    return ' '.join((value or '').lower().translate(_TRANSLATION).split())
+
+
+def search_terms(value):
+    """کلمات عبارت جستجو (فقط حروف و ارقام، بدون عملگرهای tsquery)"""
+    return re.findall(r'\w+', normalize(value))[:MAX_TERMS]
+
+
+def _has_trigram():
+    alias = connection.alias
+    if alias not in _trigram_available:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_available[alias] = cursor.fetchone() is not None
+    return _trigram_available[alias]
+
+
+def _search_postgresql(queryset, phrase, terms):
+    table = Question._meta.db_table
+    tsquery = ' & '.join(f"{term}:*" for term in terms)
+    vector_match = f"\"{table}\".\"search_vector\" @@ to_tsquery('simple', %s)"
+    vector_rank = f"ts_rank_cd(\"{table}\".\"search_vector\", to_tsquery('simple', %s))"
+    text = f"lms_normalize_fa(\"{table}\".\"text\")"
+
+    if _has_trigram():
+        partial_match, partial_params = f"%s <%% {text}", [phrase]
+        rank_sql = f"GREATEST({vector_rank}, word_similarity(%s, {text}))"
+        rank_params = [tsquery, phrase]
+    else:
+        partial_match, partial_params = f"{text} LIKE %s", [f"%{phrase}%"]
+        rank_sql, rank_params = vector_rank, [tsquery]
+
+    return queryset.filter(
+        RawSQL(f"({vector_match} OR {partial_match})", [tsquery, *partial_params], output_field=BooleanField())
+    ).annotate(
+        search_rank=RawSQL(rank_sql, rank_params, output_field=FloatField())
+    )
+
+
+def _normalized_text():
+    expression = Lower(Concat('text', Value(' '), 'explanation', output_field=TextField()))
+    for source, target in NORMALIZE_MAP.items():
+        expression = Replace(expression, Value(source), Value(target), output_field=TextField())
+    return expression
+
+
+def _search_fallback(queryset, phrase, terms):
+    queryset = queryset.annotate(normalized_text=_normalized_text())
+    for term in terms:
+        queryset = queryset.filter(normalized_text__contains=term)
+    return queryset.annotate(search_rank=Case(
+        When(normalized_text__contains=phrase, then=Value(1.0)),
+        default=Value(0.5),
+        output_field=FloatField(),
+    ))
+
+
+def search_questions(queryset, value):
+    """
+    فیلتر و رتبه‌بندی queryset سوالات با عبارت جستجو
+
+    خروجی به ترتیب رتبه (search_rank) مرتب شده است؛ اگر عبارت هیچ کلمه‌ای نداشته
+    باشد queryset بدون تغییر برمی‌گردد.
+    """
+    terms = search_terms(value)
+    if not terms:
+        return queryset
+
+    phrase = ' '.join(terms)
+    if connection.vendor == 'postgresql':
+        queryset = _search_postgresql(queryset, phrase, terms)
+    else:
+        queryset = _search_fallback(queryset, phrase, terms)
+    return queryset.order_by('-search_rank', '-id')
@@ -0,0 +1,218 @@
+# lms/services/roster_import.py
+"""
+ورود دسته‌ای فهرست دانش‌آموزان یک مدرسه از فایل CSV
+
+ستون‌های CSV (سطر اول عنوان ستون‌ها):
+    first_name, last_name, mobile, grade
+
+grade شناسه یا نام پایه است. شماره همراه‌ها به فرمت 09xxxxxxxxx یکسان‌سازی می‌شوند
+(ارقام فارسی، فاصله، خط تیره و پیش‌شماره +98 یا 0098 پذیرفته می‌شود).
+
+ردیف‌ها در دسته‌های batch_size تایی با چند دستور ثابت ذخیره می‌شوند: خواندن و قفل
+دانش‌آموزان موجود، bulk_update موجودها، bulk_create(ignore_conflicts=True) جدیدها،
+خواندن شناسه‌ها و در صورت انتخاب آزمون، درج ردیف‌های دعوت در جدول واسط.
+دانش‌آموزانی که معلم دیگری ثبت کرده (حتی اگر همزمان با ورود فایل ثبت شده باشند)
+تغییر نمی‌کنند و در گزارش به عنوان خطا برمی‌گردند (مانند StudentRegisterView).
+"""
+import csv
+import re
+from django.db import transaction
+from ..models import Exam, Grade, Student
+from .dashboard import invalidate_student_dashboard
+from .question_search import normalize
+
+DEFAULT_BATCH_SIZE = 500
+MAX_UPLOAD_ROWS = 5000  # حداکثر ردیف در هر آپلود از طریق API
+MOBILE_RE = re.compile(r'^09\d{9}$')
+
+STATUS_CREATED = 'created'
+STATUS_UPDATED = 'updated'
+STATUS_FAILED = 'failed'
+OTHER_TEACHER_ERROR = {'mobile': 'این دانش‌آموز توسط معلم دیگری ثبت شده است'}
+
+
+def normalize_mobile(value):
+    """شماره همراه به فرمت 09xxxxxxxxx؛ None اگر معتبر نباشد"""
+    mobile = re.sub(r'[\s\-()]', '', normalize(str(value or '')))
+    if mobile.startswith('+98'):
+        mobile = '0' + mobile[3:]
+    elif mobile.startswith('0098'):
+        mobile = '0' + mobile[4:]
+    elif mobile.startswith('98') and len(mobile) == 12:
+        mobile = '0' + mobile[2:]
+    elif mobile.startswith('9') and len(mobile) == 10:
+        mobile = '0' + mobile
+    return mobile if MOBILE_RE.match(mobile) else None
+
+
+def iter_rows(stream):
+    """(شماره خط، داده) برای هر ردیف فایل CSV"""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+class _Grades:
+    """پایه‌های فعال یک بار خوانده می‌شوند (بر اساس شناسه و نام یکسان شده)"""
+
+    def __init__(self):
+        grades = list(Grade.objects.filter(is_active=True).values_list('id', 'name'))
+        self.ids = {grade_id for grade_id, _ in grades}
+        self.by_name = {normalize(name): grade_id for grade_id, name in grades}
+
+    def resolve(self, value):
+        value = normalize(str(value or ''))
+        if value.isdigit():
+            return int(value) if int(value) in self.ids else None
+        return self.by_name.get(value)
+
+
+def _text(value):
+    return str(value).strip() if value is not None else ''
+
+
+def validate_row(row, grades):
+    """اعتبارسنجی یک ردیف؛ خروجی: (داده تمیز شده، دیکشنری خطاها)"""
+    errors = {}
+    first_name = _text(row.get('first_name'))
+    last_name = _text(row.get('last_name'))
+    if not first_name:
+        errors['first_name'] = 'نام الزامی است'
+    elif len(first_name) > 50:
+        errors['first_name'] = 'نام حداکثر ۵۰ کاراکتر باشد'
+    if not last_name:
+        errors['last_name'] = 'نام خانوادگی الزامی است'
+    elif len(last_name) > 50:
+        errors['last_name'] = 'نام خانوادگی حداکثر ۵۰ کاراکتر باشد'
+
+    mobile = normalize_mobile(row.get('mobile'))
+    if mobile is None:
+        errors['mobile'] = 'شماره همراه معتبر نیست (مثال: 09123456789)'
+
+    grade_id = grades.resolve(row.get('grade'))
+    if grade_id is None:
+        errors['grade'] = 'پایه تحصیلی معتبر نیست'
+
+    if errors:
+        return None, errors
+    return {'first_name': first_name, 'last_name': last_name, 'mobile': mobile, 'grade_id': grade_id}, {}
+
+
+def _failed(report, line, mobile, errors):
+    report['failed'] += 1
+    report['rows'].append({'row': line, 'mobile': mobile, 'status': STATUS_FAILED, 'errors': errors})
+
+
+def _owned_by_other(owner_id, teacher):
+    return owner_id not in (None, teacher.id)
+
+
+def _save_batch(teacher, batch, exam, dry_run, report):
+    mobiles = [data['mobile'] for _, data in batch]
+    with transaction.atomic():
+        # ردیف‌های موجود تا پایان دسته قفل می‌شوند تا مالکشان همزمان عوض نشود
+        locked = Student.objects.select_for_update().filter(mobile__in=mobiles).only('id', 'mobile', 'created_by_id')
+        existing = {student.mobile: student for student in locked}
+
+        accepted = []
+        for line, data in batch:
+            student = existing.get(data['mobile'])
+            if student is not None and _owned_by_other(student.created_by_id, teacher):
+                _failed(report, line, data['mobile'], OTHER_TEACHER_ERROR)
+                continue
+            accepted.append((line, data, STATUS_UPDATED if student is not None else STATUS_CREATED))
+
+        student_ids = {}
+        if accepted and not dry_run:
+            updated = []
+            for _, data, status in accepted:
+                if status == STATUS_UPDATED:
+                    student = existing[data['mobile']]
+                    for field, value in data.items():
+                        setattr(student, field, value)
+                    student.created_by_id = teacher.id
+                    updated.append(student)
+            Student.objects.bulk_update(updated, ['first_name', 'last_name', 'grade', 'created_by'])
+            # ردیف‌هایی که همزمان ثبت شده‌اند نادیده گرفته و در خواندن بعدی بررسی می‌شوند
+            Student.objects.bulk_create(
+                [Student(created_by=teacher, **data) for _, data, status in accepted if status == STATUS_CREATED],
+                ignore_conflicts=True,
+            )
+            # bulk_create با ignore_conflicts شناسه ردیف‌ها را برنمی‌گرداند
+            owners = {
+                mobile: (student_id, owner_id)
+                for mobile, student_id, owner_id in Student.objects.filter(
+                    mobile__in=[data['mobile'] for _, data, _ in accepted]
+                ).values_list('mobile', 'id', 'created_by_id')
+            }
+
+            saved = []
+            for line, data, status in accepted:
+                student_id, owner_id = owners[data['mobile']]
+                if _owned_by_other(owner_id, teacher):
+                    _failed(report, line, data['mobile'], OTHER_TEACHER_ERROR)
+                    continue
+                student_ids[data['mobile']] = student_id
+                saved.append((line, data, status))
+            accepted = saved
+
+            if exam is not None and student_ids:
+                Invitation = Exam.invited_students.through
+                Invitation.objects.bulk_create(
+                    [Invitation(exam_id=exam.id, student_id=student_id) for student_id in student_ids.values()],
+                    ignore_conflicts=True,
+                )
+                invited_ids = list(student_ids.values())
+                transaction.on_commit(lambda: invalidate_student_dashboard(*invited_ids))
+
+    for line, data, status in accepted:
+        report[status] += 1
+        report['rows'].append({
+            'row': line,
+            'mobile': data['mobile'],
+            'status': status,
+            'student_id': student_ids.get(data['mobile']),
+        })
+    if exam is not None:
+        report['invited'] += len(accepted)
+
+
+def import_roster(teacher, rows, exam=None, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, max_rows=None):
+    """
+    ثبت یا بروزرسانی دانش‌آموزان از ردیف‌های iter_rows و (اختیاری) دعوت آنها به آزمون
+
+    خروجی: {'total', 'created', 'updated', 'invited', 'failed', 'truncated',
+            'rows': [{'row', 'mobile', 'status', 'student_id' یا 'errors'}]}
+    """
+    grades = _Grades()
+    report = {
+        'total': 0, STATUS_CREATED: 0, STATUS_UPDATED: 0, 'invited': 0, STATUS_FAILED: 0,
+        'truncated': False, 'rows': [],
+    }
+    seen = set()
+    batch = []
+
+    for line, row in rows:
+        if max_rows is not None and report['total'] >= max_rows:
+            report['truncated'] = True
+            break
+        report['total'] += 1
+
+        data, errors = validate_row(row, grades)
+        if not errors and data['mobile'] in seen:
+            errors = {'mobile': 'شماره همراه در فایل تکراری است'}
+        if errors:
+            _failed(report, line, data['mobile'] if data else _text(row.get('mobile')), errors)
+            continue
+
+        seen.add(data['mobile'])
+        batch.append((line, data))
+        if len(batch) >= batch_size:
+            _save_batch(teacher, batch, exam, dry_run, report)
+            batch = []
+
+    if batch:
+        _save_batch(teacher, batch, exam, dry_run, report)
+
+    report['rows'].sort(key=lambda result: result['row'])
+    return report
@@ -0,0 +1,29 @@
+# lms/services/scoring.py
+"""
+بروزرسانی اتمی نمره تلاش
+
+نمره با یک دستور UPDATE و عبارت F() افزایش پیدا می‌کند تا پاسخ‌های همزمان
+(دوبار زدن، ارسال مجدد) باعث از دست رفتن امتیاز نشوند و نیازی به قفل نباشد.
+"""
+from django.db.models import F
+from ..models import ExamAttempt
+
+POINTS_PER_QUESTION = 10
+
+
+def add_correct_answer(attempt_id, points=POINTS_PER_QUESTION):
+    """افزودن امتیاز یک پاسخ صحیح به تلاش در حال انجام"""
+    return ExamAttempt.objects.filter(id=attempt_id, status='in_progress').update(
+        score=F('score') + points,
+        total_correct=F('total_correct') + 1
+    )
+
+
+def add_correct_answers(attempt_id, correct_count):
+    """افزودن امتیاز چند پاسخ صحیح با یک UPDATE"""
+    if not correct_count:
+        return 0
+    return ExamAttempt.objects.filter(id=attempt_id, status='in_progress').update(
+        score=F('score') + correct_count * POINTS_PER_QUESTION,
+        total_correct=F('total_correct') + correct_count
+    )
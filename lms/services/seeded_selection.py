@@ -0,0 +1,67 @@
+# lms/services/seeded_selection.py
+"""
+انتخاب قطعی (deterministic) سوالات از روی seed
+
+در حالت seeded به جای ذخیره یک ردیف ExamQuestionSelection برای هر سوال،
+فقط seed و نسخه ثابت بانک سوالات (QuestionPoolSnapshot) روی تلاش ذخیره می‌شود
+و سوالات و ترتیب گزینه‌ها هنگام ادامه آزمون دوباره ساخته می‌شوند.
+"""
+import random
+from django.db import IntegrityError, transaction
+from ..models import QuestionPoolSnapshot
+from .question_pool import get_pool_version, get_question_pool, sample_question_ids
+
+
+def new_seed():
+    return random.SystemRandom().getrandbits(62)
+
+
+def get_pool_snapshot(exam, grade_id=None):
+    """نسخه ثابت بانک سوالات آزمون برای نسخه فعلی بانک معلم"""
+    grade_id = exam.grade_id or grade_id
+    version = get_pool_version(exam.teacher_id)
+    existing = QuestionPoolSnapshot.objects.filter(
+        exam_id=exam.id, grade_id=grade_id, pool_version=version
+    ).order_by('id')
+
+    snapshot = existing.first()
+    if snapshot:
+        return snapshot
+
+    pool = get_question_pool(
+        exam.teacher_id,
+        grade_id=grade_id,
+        subject_id=exam.subject_id,
+        chapter_id=exam.chapter_id
+    )
+    try:
+        with transaction.atomic():
+            return QuestionPoolSnapshot.objects.create(
+                exam_id=exam.id, grade_id=grade_id, pool_version=version, question_ids=pool
+            )
+    except IntegrityError:
+        # شروع همزمان آزمون همین نسخه را ساخته است
+        snapshot = existing.first()
+        if snapshot is None:
+            raise
+        return snapshot
+
+
+def seeded_question_ids(exam, snapshot, seed):
+    """شناسه سوالات تلاش به ترتیب نمایش (همیشه برای یک seed یکسان)"""
+    return sample_question_ids(
+        snapshot.question_ids,
+        exam.get_question_distribution(),
+        exam.total_questions_count,
+        shuffle=exam.randomize_questions,
+        rng=random.Random(seed)
+    )
+
+
+def seeded_option_order(exam, seed, question_id, option_ids):
+    """ترتیب شناسه گزینه‌های یک سوال برای این seed"""
+    if not exam.randomize_options:
+        return []
+    option_ids = sorted(option_ids)
+    random.Random(f"{seed}:{question_id}").shuffle(option_ids)
+    return option_ids
@@ -0,0 +1,381 @@
+# lms/services/synthetic_data.py
+"""
+ساخت داده مصنوعی در حجم بالا برای بنچمارک
+
+تمام داده‌ها با یک random.Random با seed ثابت و با bulk_create ساخته می‌شوند
+تا اجرای دوباره با همان پارامترها همان داده را بسازد. کاربران ساخته شده با
+پیشوند شماره همراه 000 مشخص می‌شوند که هیچ شماره واقعی (داخلی یا بین‌المللی)
+با آن شروع نمی‌شود، و flush_synthetic_data فقط همان‌ها (و هرچه به آنها وابسته
+است) را حذف می‌کند.
+
+آزمون‌ها دو دسته‌اند:
+- آزمون‌های گذشته: با تلاش‌های تکمیل شده، برگه هر دانش‌آموز و پاسخ‌ها
+- آزمون‌های باز: بدون تلاش، برای بنچمارک شروع آزمون و ثبت پاسخ
+"""
+import random
+from collections import defaultdict
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from ..models import (
+    Chapter, Exam, ExamAttempt, ExamQuestionSelection, Grade, Question, QuestionOption, Student, StudentAnswer,
+    Subject, Teacher,
+)
+from .question_counters import reconcile_question_counters
+from .question_pool import invalidate_teacher_pool
+from .taxonomy import invalidate_taxonomy
+from .scoring import POINTS_PER_QUESTION
+
+MyUser = get_user_model()
+
+# پیشوندهای غیرقابل شماره‌گیری (کد کشور با 0 شروع نمی‌شود)؛ 0990 و 0991 پیش‌شماره واقعی اپراتور هستند
+TEACHER_MOBILE_PREFIX = '0000'
+STUDENT_MOBILE_PREFIX = '0001'
+
+DEFAULT_COUNTS = {
+    'teachers': 200,
+    'questions': 500_000,
+    'students': 50_000,
+    'exams': 2_000,
+    'invites_per_exam': 50,
+}
+DEFAULT_SEED = 1404
+DEFAULT_BATCH_SIZE = 5_000
+
+OPEN_EXAM_RATIO = 0.1
+SUBJECTS_PER_TEACHER = 3
+QUESTION_COUNTS = [10, 20, 30]
+ATTEMPT_RATE = 0.9
+ANSWER_RATE = 0.9
+CORRECT_RATE = {'easy': 0.8, 'medium': 0.6, 'hard': 0.4}
+DIFFICULTY_WEIGHTS = {'easy': 40, 'medium': 35, 'hard': 25}
+
+FIRST_NAMES = ['علی', 'محمد', 'زهرا', 'فاطمه', 'حسین', 'مریم', 'رضا', 'سارا', 'امیر', 'نرگس']
+LAST_NAMES = ['احمدی', 'محمدی', 'کریمی', 'حسینی', 'رضایی', 'موسوی', 'جعفری', 'کاظمی', 'رحیمی', 'نوری']
+
+# در صورت خالی بودن جدول پایه‌ها
+DEFAULT_TAXONOMY = {
+    ('هفتم', 'middle', 1): ['ریاضی', 'علوم', 'فارسی', 'عربی', 'انگلیسی'],
+    ('هشتم', 'middle', 2): ['ریاضی', 'علوم', 'فارسی', 'عربی', 'انگلیسی'],
+    ('نهم', 'middle', 3): ['ریاضی', 'علوم', 'فارسی', 'عربی', 'انگلیسی'],
+    ('دهم', 'high', 1): ['ریاضی', 'فیزیک', 'شیمی', 'زیست‌شناسی', 'فارسی'],
+    ('یازدهم', 'high', 2): ['ریاضی', 'فیزیک', 'شیمی', 'زیست‌شناسی', 'فارسی'],
+    ('دوازدهم', 'high', 3): ['ریاضی', 'فیزیک', 'شیمی', 'زیست‌شناسی', 'فارسی'],
+}
+CHAPTERS_PER_SUBJECT = 6
+
+
+def _mobile(prefix, number):
+    return f"{prefix}{number:07d}"
+
+
+def _bulk_create(model, objects, batch_size):
+    """bulk_create دسته‌ای؛ شناسه‌ها روی اشیاء قرار می‌گیرد"""
+    for start in range(0, len(objects), batch_size):
+        model.objects.bulk_create(objects[start:start + batch_size], batch_size=batch_size)
+    return objects
+
+
+def synthetic_users():
+    return MyUser.objects.filter(
+        Q(mobile__startswith=TEACHER_MOBILE_PREFIX) | Q(mobile__startswith=STUDENT_MOBILE_PREFIX)
+    )
+
+
+def flush_synthetic_data():
+    """حذف داده‌های ساخته شده (به ترتیب وابستگی تا حذف‌ها دسته‌ای انجام شوند)"""
+    teachers = Teacher.objects.filter(mobile__startswith=TEACHER_MOBILE_PREFIX)
+    students = Student.objects.filter(mobile__startswith=STUDENT_MOBILE_PREFIX)
+    exams = Exam.objects.filter(teacher__in=teachers)
+
+    with transaction.atomic():
+        StudentAnswer.objects.filter(attempt__exam__in=exams).delete()
+        ExamQuestionSelection.objects.filter(exam__in=exams).delete()
+        ExamAttempt.objects.filter(exam__in=exams).delete()
+        Exam.invited_students.through.objects.filter(exam__in=exams).delete()
+        exams.delete()
+        QuestionOption.objects.filter(question__teacher__in=teachers).delete()
+        Question.objects.filter(teacher__in=teachers).delete()
+        students.delete()
+        teachers.delete()
+        synthetic_users().delete()
+
+
+def _taxonomy():
+    """{subject_id: (grade_id, [chapter_id, ...])} برای دروس فعال"""
+    if not Grade.objects.exists():
+        for (name, level, order), subject_names in DEFAULT_TAXONOMY.items():
+            grade = Grade.objects.create(name=name, level=level, order=order)
+            subjects = Subject.objects.bulk_create([Subject(grade=grade, name=subject) for subject in subject_names])
+            Chapter.objects.bulk_create([
+                Chapter(grade=grade, subject=subject, name=f"فصل {number}")
+                for subject in subjects for number in range(1, CHAPTERS_PER_SUBJECT + 1)
+            ])
+
+    chapters = defaultdict(list)
+    for chapter_id, subject_id in Chapter.objects.filter(is_active=True).order_by('id').values_list('id', 'subject_id'):
+        chapters[subject_id].append(chapter_id)
+
+    return {
+        subject_id: (grade_id, chapters.get(subject_id, []))
+        for subject_id, grade_id in Subject.objects.filter(is_active=True).order_by('id').values_list('id', 'grade_id')
+    }
+
+
+def _create_people(rng, prefix, count, batch_size):
+    """ساخت کاربران با رمز عبور غیرقابل استفاده؛ {mobile: user_id}"""
+    password = make_password(None)
+    users = [
+        MyUser(mobile=_mobile(prefix, number), first_name=rng.choice(FIRST_NAMES),
+               last_name=rng.choice(LAST_NAMES), password=password)
+        for number in range(count)
+    ]
+    _bulk_create(MyUser, users, batch_size)
+    return dict(MyUser.objects.filter(mobile__startswith=prefix).values_list('mobile', 'id'))
+
+
+def create_teachers(rng, count, taxonomy, batch_size):
+    """ساخت معلم‌ها؛ [(teacher, [subject_id, ...])]"""
+    user_ids = _create_people(rng, TEACHER_MOBILE_PREFIX, count, batch_size)
+    teachers = _bulk_create(Teacher, [
+        Teacher(user_id=user_id, first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                mobile=mobile, is_approved=True)
+        for mobile, user_id in sorted(user_ids.items())
+    ], batch_size)
+
+    subject_ids = sorted(taxonomy)
+    return [
+        (teacher, rng.sample(subject_ids, min(SUBJECTS_PER_TEACHER, len(subject_ids))))
+        for teacher in teachers
+    ]
+
+
+def create_questions(rng, count, teachers, taxonomy, batch_size):
+    """
+    ساخت سوالات چهارگزینه‌ای
+
+    خروجی: بانک {(teacher_id, subject_id): {difficulty: [question_id, ...]}}
+    و گزینه‌ها {question_id: ([option_id, ...], شماره گزینه صحیح، درجه سختی)}
+    """
+    pools = defaultdict(lambda: defaultdict(list))
+    options = {}
+    difficulties, weights = list(DIFFICULTY_WEIGHTS), list(DIFFICULTY_WEIGHTS.values())
+
+    for start in range(0, count, batch_size):
+        questions, correct = [], []
+        for number in range(start, min(start + batch_size, count)):
+            teacher, subject_ids = rng.choice(teachers)
+            subject_id = rng.choice(subject_ids)
+            grade_id, chapter_ids = taxonomy[subject_id]
+            questions.append(Question(
+                teacher=teacher, grade_id=grade_id, subject_id=subject_id,
+                chapter_id=rng.choice(chapter_ids) if chapter_ids else None,
+                text=f"سوال آزمایشی شماره {number + 1}",
+                difficulty=rng.choices(difficulties, weights)[0],
+                estimated_time=rng.choice([30, 45, 60, 90]),
+                explanation=f"توضیح پاسخ سوال {number + 1}",
+            ))
+            correct.append(rng.randrange(4))
+        Question.objects.bulk_create(questions)
+
+        question_options = [
+            QuestionOption(question=question, text=f"گزینه {position + 1}", order=position + 1,
+                           is_correct=(position == correct_position))
+            for question, correct_position in zip(questions, correct)
+            for position in range(4)
+        ]
+        QuestionOption.objects.bulk_create(question_options)
+
+        for index, question in enumerate(questions):
+            pools[(question.teacher_id, question.subject_id)][question.difficulty].append(question.id)
+            options[question.id] = (
+                [opt.id for opt in question_options[index * 4:index * 4 + 4]], correct[index], question.difficulty
+            )
+
+    return pools, options
+
+
+def create_students(rng, count, teachers, taxonomy, batch_size):
+    """ساخت دانش‌آموزان؛ {grade_id: [student_id, ...]}"""
+    user_ids = _create_people(rng, STUDENT_MOBILE_PREFIX, count, batch_size)
+    grade_ids = sorted({grade_id for grade_id, _ in taxonomy.values()})
+    students = _bulk_create(Student, [
+        Student(user_id=user_id, first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                mobile=mobile, grade_id=rng.choice(grade_ids), created_by=rng.choice(teachers)[0])
+        for mobile, user_id in sorted(user_ids.items())
+    ], batch_size)
+
+    by_grade = defaultdict(list)
+    for student in students:
+        by_grade[student.grade_id].append(student.id)
+    return by_grade
+
+
+def _paper(rng, exam, pool):
+    """انتخاب سوالات یک دانش‌آموز طبق توزیع درجه سختی آزمون"""
+    question_ids = []
+    for difficulty, wanted in exam.get_question_distribution().items():
+        candidates = pool.get(difficulty, [])
+        question_ids.extend(rng.sample(candidates, min(wanted, len(candidates))))
+    rng.shuffle(question_ids)
+    return question_ids
+
+
+class _Buffer:
+    """صف ردیف‌ها که با رسیدن به اندازه دسته با bulk_create نوشته می‌شود"""
+
+    def __init__(self, model, batch_size):
+        self.model, self.batch_size, self.rows, self.written = model, batch_size, [], 0
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.model.objects.bulk_create(self.rows, batch_size=self.batch_size)
+            self.written += len(self.rows)
+            self.rows = []
+
+
+def create_exams(rng, count, invites_per_exam, teachers, pools, options, students_by_grade, batch_size, log=None):
+    """ساخت آزمون‌ها، دعوت‌ها و برای آزمون‌های گذشته تلاش‌ها، برگه‌ها و پاسخ‌ها"""
+    now = timezone.now()
+    invitations = _Buffer(Exam.invited_students.through, batch_size)
+    selections = _Buffer(ExamQuestionSelection, batch_size)
+    answers = _Buffer(StudentAnswer, batch_size)
+    candidates = [
+        (teacher, subject_id) for teacher, subject_ids in teachers for subject_id in subject_ids
+        if pools.get((teacher.id, subject_id))
+    ]
+    subject_grades = dict(Subject.objects.values_list('id', 'grade_id'))
+    attempts_count = 0
+
+    for number in range(count):
+        teacher, subject_id = rng.choice(candidates)
+        is_open = rng.random() < OPEN_EXAM_RATIO
+        if is_open:
+            entry_start = now - timedelta(hours=1)
+            entry_end = now + timedelta(days=7)
+        else:
+            entry_start = now - timedelta(days=rng.randint(2, 365), hours=rng.randint(0, 12))
+            entry_end = entry_start + timedelta(hours=rng.choice([1, 2, 24]))
+
+        exam = Exam.objects.create(
+            teacher=teacher, title=f"آزمون آزمایشی {number + 1}", grade_id=subject_grades[subject_id],
+            subject_id=subject_id, duration_minutes=rng.choice([20, 30, 45, 60]),
+            allowed_entry_start=entry_start, allowed_entry_end=entry_end,
+            total_questions_count=rng.choice(QUESTION_COUNTS), easy_percent=40, medium_percent=30, hard_percent=30,
+            is_published=True,
+        )
+
+        classmates = students_by_grade.get(exam.grade_id, [])
+        invited = rng.sample(classmates, min(invites_per_exam, len(classmates)))
+        for student_id in invited:
+            invitations.add(Exam.invited_students.through(exam_id=exam.id, student_id=student_id))
+        if is_open:
+            continue
+
+        # تلاش‌ها و برگه‌های آزمون‌های گذشته
+        pool = pools[(teacher.id, subject_id)]
+        papers, attempts = [], []
+        for student_id in invited:
+            if rng.random() >= ATTEMPT_RATE:
+                continue
+            paper = _paper(rng, exam, pool)
+            ability = rng.uniform(-0.2, 0.2)
+            sheet = []
+            for question_id in paper:
+                if rng.random() >= ANSWER_RATE:
+                    continue
+                option_ids, correct_position, difficulty = options[question_id]
+                is_correct = rng.random() < CORRECT_RATE[difficulty] + ability
+                position = correct_position if is_correct else rng.choice(
+                    [p for p in range(4) if p != correct_position]
+                )
+                sheet.append((question_id, option_ids[position], is_correct))
+
+            total_correct = sum(1 for _, _, is_correct in sheet if is_correct)
+            papers.append((student_id, paper, sheet))
+            attempts.append(ExamAttempt(
+                student_id=student_id, exam=exam, total_questions=len(paper), total_correct=total_correct,
+                score=total_correct * POINTS_PER_QUESTION, status='completed',
+                end_time=entry_start + timedelta(minutes=rng.randint(5, exam.duration_minutes)),
+            ))
+
+        ExamAttempt.objects.bulk_create(attempts)
+        # start_time با auto_now_add مقدار می‌گیرد؛ با یک update به زمان آزمون برگردانده می‌شود
+        ExamAttempt.objects.filter(exam=exam).update(start_time=entry_start)
+        attempts_count += len(attempts)
+
+        for attempt, (student_id, paper, sheet) in zip(attempts, papers):
+            for order, question_id in enumerate(paper, 1):
+                selections.add(ExamQuestionSelection(
+                    exam_id=exam.id, student_id=student_id, question_id=question_id, order=order,
+                    option_order=options[question_id][0]
+                ))
+            for question_id, option_id, is_correct in sheet:
+                answers.add(StudentAnswer(
+                    attempt_id=attempt.id, question_id=question_id, selected_option_id=option_id,
+                    is_correct=is_correct
+                ))
+
+        if log and (number + 1) % 100 == 0:
+            log(f"{number + 1} آزمون ساخته شد")
+
+    for buffer in (invitations, selections, answers):
+        buffer.flush()
+
+    return {
+        'invitations': invitations.written,
+        'attempts': attempts_count,
+        'selections': selections.written,
+        'answers': answers.written,
+    }
+
+
+def generate(counts=None, seed=DEFAULT_SEED, batch_size=DEFAULT_BATCH_SIZE, log=None):
+    """
+    ساخت کل داده‌ها؛ تعداد ردیف‌های ساخته شده از هر نوع را برمی‌گرداند
+
+    counts: کلیدهای DEFAULT_COUNTS (کلیدهای نیامده مقدار پیش‌فرض دارند)
+    """
+    counts = {**DEFAULT_COUNTS, **(counts or {})}
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+
+    if not connection.features.can_return_rows_from_bulk_insert:
+        raise RuntimeError('database backend must return ids from bulk inserts')
+
+    taxonomy = _taxonomy()
+    teachers = create_teachers(rng, counts['teachers'], taxonomy, batch_size)
+    log(f"{len(teachers)} معلم ساخته شد")
+
+    pools, options = create_questions(rng, counts['questions'], teachers, taxonomy, batch_size)
+    log(f"{len(options)} سوال با {len(options) * 4} گزینه ساخته شد")
+
+    students_by_grade = create_students(rng, counts['students'], teachers, taxonomy, batch_size)
+    log(f"{sum(len(ids) for ids in students_by_grade.values())} دانش‌آموز ساخته شد")
+
+    created = create_exams(
+        rng, counts['exams'], counts['invites_per_exam'], teachers, pools, options, students_by_grade,
+        batch_size, log
+    )
+    log(f"{counts['exams']} آزمون با {created['attempts']} تلاش و {created['answers']} پاسخ ساخته شد")
+
+    reconcile_question_counters()
+    for teacher, _ in teachers:
+        invalidate_teacher_pool(teacher.id)
+    invalidate_taxonomy()
+
+    return {
+        'teachers': len(teachers),
+        'questions': len(options),
+        'students': sum(len(ids) for ids in students_by_grade.values()),
+        'exams': counts['exams'],
+        **created,
+    }
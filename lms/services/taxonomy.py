@@ -0,0 +1,80 @@
+# lms/services/taxonomy.py
+"""
+درخت پایه ← درس ← فصل به همراه تعداد دروس، فصل‌ها و سوالات فعال
+
+درخت با سه کوئری ساخته می‌شود (پایه‌ها، دروس و فصل‌ها؛ تعداد سوالات از شمارنده‌های
+question_count خوانده می‌شود) و با کلید نسخه‌دار در کش نگهداری می‌شود. با هر تغییر در
+پایه‌ها، دروس، فصل‌ها یا سوالات، invalidate_taxonomy نسخه را عوض می‌کند؛ همین
+نسخه ETag پاسخ API است.
+"""
+import time
+from collections import defaultdict
+from django.core.cache import cache
+from ..models import Grade, Subject, Chapter
+
+TAXONOMY_TIMEOUT = 60 * 60 * 24
+_VERSION_KEY = 'lms_taxonomy_version'
+
+
+def _tree_key(version):
+    return f"lms_taxonomy_tree_{version}"
+
+
+def _new_version():
+    # نسخه بر اساس زمان ساخته می‌شود تا بعد از پاک شدن کش تکراری نشود
+    return time.time_ns()
+
+
+def get_taxonomy_version():
+    return cache.get_or_set(_VERSION_KEY, _new_version, timeout=None)
+
+
+def invalidate_taxonomy():
+    """باطل کردن درخت کش شده (بعد از تغییر پایه/درس/فصل یا ایجاد/ویرایش/حذف سوال)"""
+    cache.set(_VERSION_KEY, _new_version(), timeout=None)
+
+
+def build_taxonomy():
+    chapters = defaultdict(list)
+    for chapter in Chapter.objects.filter(is_active=True).order_by('name', 'id').values(
+        'id', 'name', 'subject_id', 'question_count'
+    ):
+        chapters[chapter.pop('subject_id')].append(chapter)
+
+    subjects = defaultdict(list)
+    for subject in Subject.objects.filter(is_active=True).order_by('name', 'id').values(
+        'id', 'name', 'grade_id', 'question_count'
+    ):
+        subject_chapters = chapters[subject['id']]
+        subjects[subject['grade_id']].append({
+            'id': subject['id'],
+            'name': subject['name'],
+            'chapter_count': len(subject_chapters),
+            'question_count': subject['question_count'],
+            'chapters': subject_chapters,
+        })
+
+    return [
+        {
+            'id': grade.id,
+            'name': grade.name,
+            'level': grade.level,
+            'level_display': grade.get_level_display(),
+            'order': grade.order,
+            'subject_count': len(subjects[grade.id]),
+            'subjects': subjects[grade.id],
+        }
+        for grade in Grade.objects.filter(is_active=True).order_by('order', 'id')
+    ]
+
+
+def get_taxonomy(version=None):
+    """درخت کش شده برای نسخه فعلی (version: خروجی get_taxonomy_version در صورت خوانده شدن قبلی)"""
+    if version is None:
+        version = get_taxonomy_version()
+    key = _tree_key(version)
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_taxonomy()
+        cache.set(key, tree, TAXONOMY_TIMEOUT)
+    return tree
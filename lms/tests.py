@@ -1,3 +1,1329 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+from io import StringIO
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from asnaf.query_budget import Call, QueryBudgetMixin
+from .models import (
+    Grade, Subject, Chapter, Skill, Teacher, Student, Question, QuestionOption, Exam, ExamQuestionSelection, ExamAttempt,
+    StudentAnswer, ExamStatistics,
+)
+from .services.attempt_expiry import expire_overdue_attempts
+from .services.exam_statistics import compute_exam_statistics, rebuild_exam_statistics
+from .services.item_analysis import analyze_exam
+from .services.paper_generation import claim_pregeneration, schedule_pregeneration
+from .services.question_pool import get_pool_version
+from .services.taxonomy import invalidate_taxonomy
+from .services import answer_buffer, compact_answers, load_test, question_counters, question_import, roster_import, synthetic_data
+
+MyUser = get_user_model()
+
+
+class LmsTestMixin:
+    """ساخت داده‌های پایه برای تست‌ها (معلم، بانک سوال، دانش‌آموز و آزمون)"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher_user = MyUser.objects.create_user(mobile='09120000000')
+        self.teacher = Teacher.objects.create(
+            user=self.teacher_user, first_name='معلم', last_name='تست', mobile='09120000000'
+        )
+        self.grade = Grade.objects.create(name='هفتم', level='middle', order=1)
+        self.subject = Subject.objects.create(grade=self.grade, name='ریاضی')
+
+    def create_questions(self, count):
+        difficulties = ['easy', 'medium', 'hard']
+        questions = []
+        for i in range(count):
+            question = Question.objects.create(
+                teacher=self.teacher, text=f'سوال {i}', grade=self.grade, subject=self.subject,
+                difficulty=difficulties[i % 3], estimated_time=30
+            )
+            QuestionOption.objects.bulk_create([
+                QuestionOption(question=question, text=f'گزینه {j}', order=j + 1, is_correct=(j == 0))
+                for j in range(4)
+            ])
+            questions.append(question)
+        question_counters.apply_question_changes(added=[question_counters.question_state(q) for q in questions])
+
+    def create_student(self, mobile='09121111111'):
+        user = MyUser.objects.create_user(mobile=mobile)
+        student = Student.objects.create(
+            user=user, first_name='دانش‌آموز', last_name='تست', mobile=mobile,
+            grade=self.grade, created_by=self.teacher
+        )
+        return student
+
+    def create_exam(self, total_questions, students=()):
+        now = timezone.now()
+        exam = Exam.objects.create(
+            teacher=self.teacher, title='آزمون تست', duration_minutes=30,
+            allowed_entry_start=now - timedelta(minutes=5), allowed_entry_end=now + timedelta(hours=1),
+            total_questions_count=total_questions, easy_percent=40, medium_percent=30, hard_percent=30,
+            grade=self.grade, subject=self.subject, is_published=True
+        )
+        exam.invited_students.add(*students)
+        return exam
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+
+class StartQuizQueryCountTests(LmsTestMixin, TestCase):
+    """تعداد کوئری‌های شروع آزمون نباید به تعداد سوالات وابسته باشد"""
+
+    def _start_queries(self, total_questions, mobile):
+        student = self.create_student(mobile)
+        exam = self.create_exam(total_questions, students=[student])
+        client = self.client_for(student.user)
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.post('/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(len(response.data['data']['questions']), total_questions)
+        self.assertEqual(
+            ExamQuestionSelection.objects.filter(exam=exam, student=student).count(), total_questions
+        )
+        return len(ctx.captured_queries)
+
+    def test_query_count_is_constant(self):
+        self.create_questions(60)
+        small = self._start_queries(5, '09121111111')
+        large = self._start_queries(50, '09122222222')
+        self.assertEqual(small, large)
+
+
+class ResumeQuizQueryCountTests(LmsTestMixin, TestCase):
+    """ادامه آزمون (رفرش صفحه) باید تعداد کوئری ثابت داشته باشد"""
+
+    MAX_RESUME_QUERIES = 10
+
+    def _resume_queries(self, total_questions, mobile):
+        student = self.create_student(mobile)
+        exam = self.create_exam(total_questions, students=[student])
+        client = self.client_for(student.user)
+        data = client.post('/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json').data['data']
+
+        for question in data['questions'][:2]:
+            client.post('/lms/v1/quiz/answer/', {
+                'attempt_id': data['attempt_id'],
+                'question_id': question['id'],
+                'option_id': question['options'][0]['id'],
+            }, format='json')
+
+        with CaptureQueriesContext(connection) as resume_ctx:
+            response = client.post('/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        questions = response.data['data']['questions']
+        self.assertEqual(len(questions), total_questions)
+        self.assertEqual(sum(q['is_answered'] for q in questions), 2)
+
+        with CaptureQueriesContext(connection) as questions_ctx:
+            response = client.get(f"/lms/v1/exam/attempt/{data['attempt_id']}/questions/")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(len(response.data['data']['questions']), total_questions)
+
+        return len(resume_ctx.captured_queries), len(questions_ctx.captured_queries)
+
+    def test_resume_queries_are_capped(self):
+        self.create_questions(60)
+        small = self._resume_queries(5, '09121111111')
+        large = self._resume_queries(40, '09122222222')
+        self.assertEqual(small, large)
+        self.assertLessEqual(max(large), self.MAX_RESUME_QUERIES)
+
+
+class QuestionPayloadCacheTests(LmsTestMixin, TestCase):
+    """داده سوالات از کش خوانده می‌شود و با ویرایش سوال نسخه جدید نمایش داده می‌شود"""
+
+    def test_update_replaces_cached_payload(self):
+        self.create_questions(3)
+        student = self.create_student()
+        exam = self.create_exam(3, students=[student])
+        client = self.client_for(student.user)
+        attempt_id = client.post('/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json').data['data']['attempt_id']
+        url = f'/lms/v1/exam/attempt/{attempt_id}/questions/'
+
+        with CaptureQueriesContext(connection) as ctx:
+            questions = client.get(url).data['data']['questions']
+        # تلاش + سوالات انتخابی؛ داده سوالات و گزینه‌ها از کش
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+        question_id = questions[0]['id']
+        response = self.client_for(self.teacher_user).put(f'/lms/v1/questions/{question_id}/update/', {
+            'text': 'متن جدید',
+            'options': json.dumps([{'text': f'جدید {i}', 'is_correct': i == 0} for i in range(4)]),
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+        questions = {q['id']: q for q in client.get(url).data['data']['questions']}
+        self.assertEqual(questions[question_id]['text'], 'متن جدید')
+        self.assertEqual(
+            sorted(opt['text'] for opt in questions[question_id]['options']), [f'جدید {i}' for i in range(4)]
+        )
+
+
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class ConcurrentAnswerScoringTests(LmsTestMixin, TransactionTestCase):
+    """ارسال همزمان پاسخ‌ها نباید باعث از دست رفتن امتیاز شود"""
+
+    def _submit_in_parallel(self, user, payloads):
+        barrier = threading.Barrier(len(payloads))
+        status_codes = []
+
+        def submit(payload):
+            client = self.client_for(user)
+            barrier.wait()
+            try:
+                response = client.post('/lms/v1/quiz/answer/', payload, format='json')
+                status_codes.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit, args=(payload,)) for payload in payloads]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return status_codes
+
+    def test_parallel_submits_keep_every_point(self):
+        self.create_questions(12)
+        student = self.create_student()
+        exam = self.create_exam(10, students=[student])
+        response = self.client_for(student.user).post('/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json')
+        data = response.data['data']
+
+        payloads = []
+        for question in data['questions']:
+            correct = QuestionOption.objects.get(question_id=question['id'], is_correct=True)
+            payloads.append({'attempt_id': data['attempt_id'], 'question_id': question['id'], 'option_id': correct.id})
+
+        status_codes = self._submit_in_parallel(student.user, payloads)
+
+        self.assertEqual(status_codes, [200] * len(payloads))
+        attempt = ExamAttempt.objects.get(id=data['attempt_id'])
+        self.assertEqual(attempt.total_correct, 10)
+        self.assertEqual(attempt.score, 100)
+
+    def test_parallel_duplicate_submits_count_once(self):
+        self.create_questions(3)
+        student = self.create_student()
+        exam = self.create_exam(1, students=[student])
+        response = self.client_for(student.user).post('/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json')
+        data = response.data['data']
+        question_id = data['questions'][0]['id']
+        correct = QuestionOption.objects.get(question_id=question_id, is_correct=True)
+
+        payload = {'attempt_id': data['attempt_id'], 'question_id': question_id, 'option_id': correct.id}
+        status_codes = self._submit_in_parallel(student.user, [payload] * 5)
+
+        self.assertEqual(status_codes.count(200), 1)
+        self.assertEqual(StudentAnswer.objects.filter(attempt_id=data['attempt_id']).count(), 1)
+        attempt = ExamAttempt.objects.get(id=data['attempt_id'])
+        self.assertEqual(attempt.score, 10)
+        self.assertEqual(attempt.total_correct, 1)
+
+
+class StudentDashboardTests(LmsTestMixin, TestCase):
+    """داشبورد دانش‌آموز با تعداد کوئری ثابت و باطل شدن کش پس از پایان آزمون"""
+
+    def _dashboard(self, client):
+        response = client.get('/lms/v1/quiz/dashboard/')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data['data']
+
+    def test_query_count_is_constant(self):
+        counts = []
+        for exams, mobile in ((1, '09121111111'), (6, '09122222222')):
+            student = self.create_student(mobile)
+            for _ in range(exams):
+                self.create_exam(5, students=[student])
+            cache.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                data = self._dashboard(self.client_for(student.user))
+            self.assertEqual(data['stats']['available'], exams)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_finish_invalidates_cache(self):
+        self.create_questions(6)
+        student = self.create_student()
+        exam = self.create_exam(3, students=[student])
+        client = self.client_for(student.user)
+        self.assertEqual(self._dashboard(client)['stats']['available'], 1)
+
+        attempt_id = client.post('/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json').data['data']['attempt_id']
+        client.post('/lms/v1/quiz/finish/', {'attempt_id': attempt_id}, format='json')
+
+        data = self._dashboard(client)
+        self.assertEqual(data['stats']['available'], 0)
+        self.assertEqual(data['completed_exams'][0]['attempt_id'], attempt_id)
+
+
+class ExamResultsTests(LmsTestMixin, TestCase):
+    """آمار و صفحه‌بندی نتایج آزمون برای معلم"""
+
+    def setUp(self):
+        super().setUp()
+        students = [self.create_student(f'0913{i:07d}') for i in range(7)]
+        self.exam = self.create_exam(10, students=students)
+        # نمره‌ها: 100, 80, 60, 40, 20 (تکمیل شده) و دو تلاش در حال انجام
+        for i, student in enumerate(students):
+            correct = 10 - 2 * i
+            ExamAttempt.objects.create(
+                exam=self.exam, student=student, total_questions=10, total_correct=max(correct, 0),
+                score=max(correct, 0) * 10, status='completed' if i < 5 else 'in_progress'
+            )
+        self.client = self.client_for(self.teacher_user)
+
+    def test_stats(self):
+        response = self.client.get(f'/lms/v1/exams/{self.exam.id}/results/')
+        self.assertEqual(response.status_code, 200, response.data)
+        stats = response.data['data']['stats']
+        self.assertEqual(stats['total_students'], 7)
+        self.assertEqual(stats['completed_count'], 5)
+        self.assertEqual(stats['in_progress_count'], 2)
+        self.assertEqual(stats['not_started_count'], 0)
+        self.assertEqual(stats['avg_score'], 60)
+        self.assertEqual(stats['avg_percentage'], 60)
+        self.assertEqual(stats['pass_count'], 3)
+        self.assertEqual(stats['fail_count'], 2)
+
+    def test_keyset_pagination(self):
+        scores, cursor = [], None
+        while True:
+            params = {'page_size': 3}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(f'/lms/v1/exams/{self.exam.id}/results/', params).data['data']
+            scores.extend(r['score'] for r in data['results'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(scores, [100, 80, 60, 40, 20, 0, 0])
+
+    def test_csv_export(self):
+        response = self.client.get(f'/lms/v1/exams/{self.exam.id}/results/', {'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 8)
+        self.assertTrue(lines[0].startswith('attempt_id,'))
+
+
+class ExamStatisticsTests(LmsTestMixin, TestCase):
+    """بروزرسانی افزایشی آمار آزمون باید با محاسبه کامل یکسان باشد"""
+
+    def _post(self, client, url, data):
+        # تغییرات آمار بعد از commit هر درخواست اعمال می‌شوند
+        with self.captureOnCommitCallbacks(execute=True):
+            return client.post(url, data, format='json')
+
+    def test_incremental_matches_rebuild(self):
+        self.create_questions(12)
+        students = [self.create_student(f'0913{i:07d}') for i in range(3)]
+        exam = self.create_exam(4, students=students)
+
+        for i, student in enumerate(students):
+            client = self.client_for(student.user)
+            data = self._post(client, '/lms/v1/quiz/start/', {'exam_id': exam.id}).data['data']
+            if i == 2:
+                continue
+            for question in data['questions'][:2 + i]:
+                correct = QuestionOption.objects.get(question_id=question['id'], is_correct=True)
+                self._post(client, '/lms/v1/quiz/answer/', {
+                    'attempt_id': data['attempt_id'], 'question_id': question['id'], 'option_id': correct.id
+                })
+            self._post(client, '/lms/v1/quiz/finish/', {'attempt_id': data['attempt_id']})
+
+        stats = ExamStatistics.objects.get(exam=exam)
+        self.assertEqual(stats.completed_count, 2)
+        self.assertEqual(stats.in_progress_count, 1)
+        self.assertEqual(stats.score_sum, 50)
+        self.assertEqual((stats.pass_count, stats.fail_count), (1, 1))
+        self.assertEqual(sum(stats.histogram), 2)
+
+        for field, value in compute_exam_statistics(exam.id).items():
+            self.assertEqual(getattr(stats, field), value, field)
+
+    def test_missing_row_is_not_double_counted(self):
+        self.create_questions(6)
+        students = [self.create_student(f'0913{i:07d}') for i in range(2)]
+        exam = self.create_exam(3, students=students)
+
+        # تغییرات هر دو درخواست بعد از commit هر دو اعمال می‌شوند
+        with self.captureOnCommitCallbacks(execute=True):
+            for student in students:
+                self.client_for(student.user).post('/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json')
+
+        self.assertEqual(ExamStatistics.objects.get(exam=exam).in_progress_count, 2)
+        self.assertEqual(compute_exam_statistics(exam.id)['in_progress_count'], 2)
+
+
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class ConcurrentStartQuizTests(LmsTestMixin, TransactionTestCase):
+    """درخواست‌های همزمان شروع آزمون باید دقیقاً یک تلاش بسازند"""
+
+    def _start_in_parallel(self, user, exam, count):
+        barrier = threading.Barrier(count)
+        responses = []
+
+        def start():
+            client = self.client_for(user)
+            barrier.wait()
+            try:
+                responses.append(client.post('/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json'))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=start) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return responses
+
+    def _assert_single_attempt(self, mode):
+        self.create_questions(12)
+        student = self.create_student()
+        exam = self.create_exam(5, students=[student])
+        Exam.objects.filter(id=exam.id).update(selection_mode=mode)
+
+        responses = self._start_in_parallel(student.user, exam, 6)
+
+        self.assertEqual([r.status_code for r in responses], [200] * 6)
+        self.assertEqual(ExamAttempt.objects.filter(exam=exam, student=student).count(), 1)
+        self.assertEqual(len({r.data['data']['attempt_id'] for r in responses}), 1)
+        if mode == 'stored':
+            self.assertEqual(ExamQuestionSelection.objects.filter(exam=exam, student=student).count(), 5)
+
+    def test_parallel_starts_create_one_attempt(self):
+        self._assert_single_attempt('stored')
+
+    def test_parallel_seeded_starts_create_one_attempt(self):
+        self._assert_single_attempt('seeded')
+
+
+class ItemAnalysisTests(LmsTestMixin, TestCase):
+    """شاخص‌های تحلیل سوالات روی یک ماتریس پاسخ کوچک با مقادیر معلوم"""
+
+    def test_item_statistics(self):
+        self.create_questions(2)
+        q1, q2 = Question.objects.order_by('id')
+        students = [self.create_student(f'0913{i:07d}') for i in range(4)]
+        exam = self.create_exam(2, students=students)
+
+        # None یعنی بدون پاسخ
+        answers = [(True, True), (True, False), (False, None), (True, True)]
+        for student, row in zip(students, answers):
+            attempt = ExamAttempt.objects.create(exam=exam, student=student, total_questions=2, status='completed')
+            for question, is_correct in zip((q1, q2), row):
+                ExamQuestionSelection.objects.create(exam=exam, student=student, question=question)
+                if is_correct is None:
+                    continue
+                option = question.options.get(is_correct=is_correct) if is_correct else question.options.last()
+                StudentAnswer.objects.create(
+                    attempt=attempt, question=question, selected_option=option, is_correct=is_correct
+                )
+
+        response = self.client_for(self.teacher_user).get(f'/lms/v1/exams/{exam.id}/item-analysis/')
+        self.assertEqual(response.status_code, 200, response.data)
+        data = response.data['data']
+
+        self.assertEqual(data['attempts_count'], 4)
+        self.assertEqual(data['group_size'], 1)
+        self.assertEqual(data['kr20'], 0.7273)
+        first, second = data['questions']
+        self.assertEqual(first['difficulty_index'], 0.75)
+        self.assertEqual(second['difficulty_index'], 0.5)
+        self.assertEqual(first['discrimination_index'], 1.0)
+        self.assertEqual(second['omit_rate'], 0.25)
+        self.assertEqual([o['selection_rate'] for o in first['options']], [0.75, 0.0, 0.0, 0.25])
+
+
+class PregenerationTests(LmsTestMixin, TestCase):
+    """ساخت سوالات آزمون‌های در صف و اجراهای متوقف شده توسط دستور pregenerate_exam_papers"""
+
+    def test_command_picks_up_pending_and_stalled_exams(self):
+        self.create_questions(9)
+        students = [self.create_student(f'0913{i:07d}') for i in range(2)]
+        pending = self.create_exam(3, students=students)
+        schedule_pregeneration(pending)
+        stalled = self.create_exam(3, students=students)
+        Exam.objects.filter(id=stalled.id).update(
+            pregeneration_status='running', pregeneration_updated_at=timezone.now() - timedelta(hours=1)
+        )
+        running = self.create_exam(3, students=students)
+        Exam.objects.filter(id=running.id).update(
+            pregeneration_status='running', pregeneration_updated_at=timezone.now()
+        )
+
+        call_command('pregenerate_exam_papers', stdout=StringIO())
+
+        statuses = dict(Exam.objects.values_list('id', 'pregeneration_status'))
+        self.assertEqual(
+            [statuses[exam.id] for exam in (pending, stalled, running)], ['completed', 'completed', 'running']
+        )
+        self.assertEqual(ExamQuestionSelection.objects.filter(exam=stalled).count(), 6)
+        self.assertFalse(claim_pregeneration(running.id))
+
+
+class AttemptExpiryTests(LmsTestMixin, TestCase):
+    """تلاش‌های منقضی شده با نمره پاسخ‌های ثبت شده به timeout تغییر می‌کنند"""
+
+    def test_overdue_attempts_are_timed_out(self):
+        self.create_questions(6)
+        overdue_student, fresh_student = self.create_student('09131111111'), self.create_student('09132222222')
+        exam = self.create_exam(3, students=[overdue_student, fresh_student])
+
+        attempts = {}
+        for student in (overdue_student, fresh_student):
+            client = self.client_for(student.user)
+            with self.captureOnCommitCallbacks(execute=True):
+                data = client.post('/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json').data['data']
+            correct = QuestionOption.objects.get(question_id=data['questions'][0]['id'], is_correct=True)
+            client.post('/lms/v1/quiz/answer/', {
+                'attempt_id': data['attempt_id'], 'question_id': correct.question_id, 'option_id': correct.id
+            }, format='json')
+            attempts[student.id] = data['attempt_id']
+
+        started = timezone.now() - timedelta(minutes=exam.duration_minutes + 5)
+        ExamAttempt.objects.filter(id=attempts[overdue_student.id]).update(start_time=started)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(expire_overdue_attempts(), 1)
+
+        overdue = ExamAttempt.objects.get(id=attempts[overdue_student.id])
+        self.assertEqual(overdue.status, 'timeout')
+        self.assertEqual((overdue.score, overdue.total_correct), (10, 1))
+        self.assertEqual(overdue.end_time, started + timedelta(minutes=exam.duration_minutes))
+        self.assertEqual(ExamAttempt.objects.get(id=attempts[fresh_student.id]).status, 'in_progress')
+
+        stats = ExamStatistics.objects.get(exam=exam)
+        self.assertEqual((stats.in_progress_count, stats.timeout_count), (1, 1))
+
+        response = self.client_for(overdue_student.user).post('/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class BatchAnswerSubmitTests(LmsTestMixin, TestCase):
+    """ثبت دسته‌ای پاسخ‌ها با نتیجه جداگانه برای هر پاسخ"""
+
+    def test_batch_results(self):
+        self.create_questions(9)
+        student = self.create_student()
+        exam = self.create_exam(4, students=[student])
+        client = self.client_for(student.user)
+        data = client.post('/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json').data['data']
+        attempt_id = data['attempt_id']
+        q1, q2, q3, q4 = [q['id'] for q in data['questions']]
+        correct = {q: QuestionOption.objects.get(question_id=q, is_correct=True).id for q in (q1, q2, q3, q4)}
+        wrong = {q: QuestionOption.objects.filter(question_id=q, is_correct=False).first().id for q in (q1, q2)}
+        outside = QuestionOption.objects.exclude(question_id__in=[q1, q2, q3, q4]).first()
+
+        # پاسخ قبلی از مسیر تکی
+        client.post('/lms/v1/quiz/answer/', {
+            'attempt_id': attempt_id, 'question_id': q4, 'option_id': correct[q4]
+        }, format='json')
+
+        response = client.post('/lms/v1/quiz/answers/batch/', {
+            'attempt_id': attempt_id,
+            'answers': [
+                {'question_id': q1, 'option_id': wrong[q1], 'client_timestamp': '2026-01-01T10:00:05'},
+                {'question_id': q1, 'option_id': correct[q1], 'client_timestamp': '2026-01-01T10:00:01'},
+                {'question_id': q2, 'option_id': correct[q2]},
+                {'question_id': q3, 'option_id': wrong[q2]},
+                {'question_id': outside.question_id, 'option_id': outside.id},
+                {'question_id': q4, 'option_id': correct[q4]},
+            ]
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+        results = response.data['data']['results']
+        self.assertEqual(
+            [r['status'] for r in results],
+            ['already_answered', 'saved', 'saved', 'invalid', 'invalid', 'already_answered']
+        )
+        self.assertEqual(response.data['data']['saved_count'], 2)
+        self.assertTrue(results[1]['is_correct'])
+
+        attempt = ExamAttempt.objects.get(id=attempt_id)
+        self.assertEqual((attempt.total_correct, attempt.score), (3, 30))
+        self.assertEqual(StudentAnswer.objects.filter(attempt=attempt).count(), 3)
+
+
+class AnswerBufferTests(LmsTestMixin, TestCase):
+    """پاسخ‌های بافر شده در پایان آزمون ذخیره می‌شوند و پاسخ‌های دیرتر نمره را تغییر نمی‌دهند"""
+
+    def setUp(self):
+        buffer_dir, cache_dir = tempfile.TemporaryDirectory(), tempfile.TemporaryDirectory()
+        self.addCleanup(buffer_dir.cleanup)
+        self.addCleanup(cache_dir.cleanup)
+        shared_cache = {'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir.name,
+        }}
+        self.buffer_settings = self.settings(
+            LMS_ANSWER_BUFFER_ENABLED=True, LMS_ANSWER_BUFFER_DIR=buffer_dir.name, LMS_ANSWER_BUFFER_DIR_SHARED=True,
+            CACHES=shared_cache,
+        )
+        self.buffer_settings.enable()
+        self.addCleanup(self.buffer_settings.disable)
+        super().setUp()
+
+    def test_requires_shared_cache_and_dir(self):
+        self.assertTrue(answer_buffer.is_enabled())
+        self.assertEqual(answer_buffer.check_answer_buffer_settings(), [])
+        with self.settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertFalse(answer_buffer.is_enabled())
+            self.assertEqual([error.id for error in answer_buffer.check_answer_buffer_settings()], ['lms.E001'])
+        with self.settings(LMS_ANSWER_BUFFER_DIR_SHARED=False):
+            self.assertFalse(answer_buffer.is_enabled())
+            self.assertEqual([error.id for error in answer_buffer.check_answer_buffer_settings()], ['lms.E002'])
+
+    def test_finish_flushes_buffer(self):
+        self.create_questions(6)
+        student = self.create_student()
+        exam = self.create_exam(3, students=[student])
+        client = self.client_for(student.user)
+        data = client.post('/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json').data['data']
+        q1, q2, q3 = [q['id'] for q in data['questions']]
+        for question_id in (q1, q2):
+            correct = QuestionOption.objects.get(question_id=question_id, is_correct=True)
+            client.post('/lms/v1/quiz/answer/', {
+                'attempt_id': data['attempt_id'], 'question_id': question_id, 'option_id': correct.id
+            }, format='json')
+        self.assertFalse(StudentAnswer.objects.filter(attempt_id=data['attempt_id']).exists())
+        answered_at = timezone.now()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/lms/v1/quiz/finish/', {'attempt_id': data['attempt_id']}, format='json')
+        self.assertEqual(response.data['data']['score'], 20)
+        # زمان پاسخ همان زمان ارسال است، نه زمان ذخیره دسته‌ای
+        answer_times = StudentAnswer.objects.filter(attempt_id=data['attempt_id']).values_list('answer_time', flat=True)
+        self.assertTrue(all(answer_time <= answered_at for answer_time in answer_times))
+        self.assertEqual(answer_buffer.pending_attempt_ids(), [])
+
+        # پاسخی که بعد از پایان آزمون در فایل نوشته شده ذخیره نمی‌شود
+        correct = QuestionOption.objects.get(question_id=q3, is_correct=True)
+        answer_buffer.record_answer(data['attempt_id'], q3, correct.id, True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(answer_buffer.flush_all(), 0)
+        self.assertEqual(answer_buffer.pending_attempt_ids(), [])
+
+        attempt = ExamAttempt.objects.get(id=data['attempt_id'])
+        self.assertEqual((attempt.status, attempt.score, attempt.total_correct), ('completed', 20, 2))
+        self.assertEqual(StudentAnswer.objects.filter(attempt=attempt).count(), 2)
+
+
+class CompactAnswersTests(LmsTestMixin, TestCase):
+    """نتیجه تلاش پس از فشرده شدن پاسخ‌ها تغییر نمی‌کند"""
+
+    def _results(self, student, attempt_id, exam):
+        quiz = self.client_for(student.user).get(f'/lms/v1/quiz/result/{attempt_id}/').data['data']
+        detail = self.client_for(self.teacher_user).get(
+            f'/lms/v1/exams/{exam.id}/students/{student.id}/result/'
+        ).data['data']
+        return quiz, detail
+
+    def test_compacted_attempt_keeps_results(self):
+        self.create_questions(9)
+        student = self.create_student()
+        exam = self.create_exam(4, students=[student])
+        client = self.client_for(student.user)
+        data = client.post('/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json').data['data']
+        attempt_id = data['attempt_id']
+        q1, q2, q3 = [q['id'] for q in data['questions'][:3]]
+        for question_id, is_correct in ((q1, True), (q2, False), (q3, True)):
+            option = QuestionOption.objects.filter(question_id=question_id, is_correct=is_correct).last()
+            client.post('/lms/v1/quiz/answer/', {
+                'attempt_id': attempt_id, 'question_id': question_id, 'option_id': option.id
+            }, format='json')
+        client.post('/lms/v1/quiz/finish/', {'attempt_id': attempt_id}, format='json')
+
+        before = self._results(student, attempt_id, exam)
+        analysis = analyze_exam(exam)
+        # با --keep-rows پاسخ‌ها دوبار در تحلیل سوالات شمرده نمی‌شوند
+        call_command('compact_attempt_answers', '--keep-rows', stdout=StringIO())
+        self.assertTrue(StudentAnswer.objects.filter(attempt_id=attempt_id).exists())
+        self.assertEqual(analyze_exam(exam), analysis)
+        ExamAttempt.objects.filter(id=attempt_id).update(answer_slots=None)
+        call_command('compact_attempt_answers', stdout=StringIO())
+
+        attempt = ExamAttempt.objects.get(id=attempt_id)
+        self.assertEqual(len(attempt.slot_question_ids), 4)
+        self.assertEqual(bytes(attempt.answer_slots)[3], 0)
+        self.assertEqual((attempt.total_correct, attempt.score), (2, 20))
+        self.assertFalse(StudentAnswer.objects.filter(attempt=attempt).exists())
+        self.assertEqual(self._results(student, attempt_id, exam), before)
+        self.assertEqual(len(before[0]['answers']), 3)
+
+        # ویرایش گزینه‌ها شماره گزینه انتخاب شده در پاسخ فشرده را جابجا نمی‌کند
+        selected = QuestionOption.objects.filter(question_id=q2, is_correct=False).last()
+        options = QuestionOption.objects.filter(question_id=q2).order_by('order', 'id')
+        option_ids = list(options.values_list('id', flat=True))
+        response = self.client_for(self.teacher_user).put(f'/lms/v1/questions/{q2}/update/', {
+            'options': json.dumps([{'text': f'ویرایش {i}', 'is_correct': i == 3} for i in range(4)]),
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(list(options.values_list('id', flat=True)), option_ids)
+        answer = next(a for a in compact_answers.load_answer_sheet(attempt) if a['question'].id == q2)
+        self.assertEqual(answer['selected_option'].id, selected.id)
+        self.assertFalse(answer['is_correct'])
+
+    @override_settings(LMS_COMPACT_ANSWERS_ENABLED=True)
+    def test_finish_packs_answers(self):
+        self.create_questions(6)
+        student = self.create_student()
+        exam = self.create_exam(3, students=[student])
+        client = self.client_for(student.user)
+        data = client.post('/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json').data['data']
+        correct = QuestionOption.objects.get(question_id=data['questions'][1]['id'], is_correct=True)
+        client.post('/lms/v1/quiz/answer/', {
+            'attempt_id': data['attempt_id'], 'question_id': correct.question_id, 'option_id': correct.id
+        }, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/lms/v1/quiz/finish/', {'attempt_id': data['attempt_id']}, format='json')
+        self.assertEqual(response.data['data']['score'], 10)
+
+        attempt = ExamAttempt.objects.get(id=data['attempt_id'])
+        self.assertEqual(bytes(attempt.correct_bitmap), b'\x02')
+        self.assertEqual(ExamStatistics.objects.get(exam=exam).completed_count, 1)
+
+        answers = self.client_for(student.user).get(f'/lms/v1/quiz/result/{attempt.id}/').data['data']['answers']
+        self.assertEqual([(a['selected_option_text'], a['is_correct']) for a in answers], [(correct.text, True)])
+
+
+class SyntheticDataTests(TestCase):
+    """داده مصنوعی با seed ثابت قابل تکرار است"""
+
+    COUNTS = {'teachers': 3, 'questions': 120, 'students': 30, 'exams': 8, 'invites_per_exam': 6}
+
+    def _fingerprint(self):
+        return sorted(StudentAnswer.objects.values_list(
+            'attempt__student__mobile', 'question__text', 'selected_option__order', 'is_correct'
+        ))
+
+    def test_generate_is_repeatable(self):
+        created = synthetic_data.generate(self.COUNTS, seed=7, batch_size=50)
+        self.assertEqual(created['questions'], 120)
+        self.assertEqual(QuestionOption.objects.count(), 480)
+        self.assertEqual(StudentAnswer.objects.count(), created['answers'])
+        for attempt in ExamAttempt.objects.all():
+            self.assertEqual(attempt.total_correct, attempt.answers.filter(is_correct=True).count())
+            self.assertTrue(attempt.exam.invited_students.filter(id=attempt.student_id).exists())
+        first = self._fingerprint()
+        self.assertTrue(first)
+
+        # کاربر واقعی با پیش‌شماره 0990 حذف نمی‌شود
+        real_user = MyUser.objects.create_user(mobile='09901234567')
+        synthetic_data.flush_synthetic_data()
+        self.assertFalse(synthetic_data.synthetic_users().exists())
+        self.assertTrue(MyUser.objects.filter(id=real_user.id).exists())
+        synthetic_data.generate(self.COUNTS, seed=7, batch_size=50)
+        self.assertEqual(self._fingerprint(), first)
+
+    def test_command_refuses_without_debug(self):
+        with self.assertRaises(CommandError):
+            call_command('seed_lms_scale', '--flush', stdout=StringIO())
+        self.assertFalse(synthetic_data.synthetic_users().exists())
+
+
+class LoadTestHarnessTests(LmsTestMixin, TransactionTestCase):
+    """سناریوی تست بار کامل اجرا و برای هر endpoint گزارش می‌شود"""
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual([load_test.percentile(values, pct) for pct in (50, 95, 99)], [50, 95, 99])
+        self.assertEqual(load_test.percentile([7], 99), 7)
+
+    @override_settings(LMS_QUERY_COUNT_HEADER=True)
+    def test_query_count_header(self):
+        student = self.create_student()
+        response = self.client_for(student.user).get('/lms/v1/quiz/dashboard/')
+        self.assertGreater(int(response.headers['X-DB-Queries']), 0)
+
+    @skipUnlessDBFeature('test_db_allows_multiple_connections')
+    def test_exam_start_storm(self):
+        self.create_questions(12)
+        students = [self.create_student(f'0913000000{i}') for i in range(4)]
+        exam = self.create_exam(3, students=students)
+
+        result = load_test.run_load_test(exam, load_test.pick_students(exam, 10), dashboard_polls=1)
+
+        self.assertEqual(result['errors'], [])
+        endpoints = result['endpoints']
+        self.assertEqual(set(endpoints), set(load_test.ENDPOINTS))
+        self.assertEqual(endpoints['answer']['requests'], 12)
+        self.assertEqual(sum(stats['errors'] for stats in endpoints.values()), 0)
+        self.assertIsNotNone(endpoints['start']['queries_avg'])
+        self.assertEqual(ExamAttempt.objects.filter(exam=exam, status='completed').count(), 4)
+
+    def test_pick_and_reset_exam(self):
+        self.create_questions(6)
+        student = self.create_student()
+        self.create_exam(3)
+        exam = self.create_exam(3, students=[student])
+        self.assertEqual(load_test.pick_exam(), exam)
+
+        client = self.client_for(student.user)
+        attempt_id = client.post('/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json').data['data']['attempt_id']
+        client.post('/lms/v1/quiz/finish/', {'attempt_id': attempt_id}, format='json')
+        self.assertEqual(client.get('/lms/v1/quiz/dashboard/').data['data']['stats']['available'], 0)
+
+        load_test.reset_exam(exam)
+        self.assertFalse(ExamAttempt.objects.filter(exam=exam).exists())
+        self.assertFalse(ExamQuestionSelection.objects.filter(exam=exam).exists())
+        self.assertEqual(client.get('/lms/v1/quiz/dashboard/').data['data']['stats']['available'], 1)
+
+
+class QuestionImportTests(LmsTestMixin, TestCase):
+    """ورود دسته‌ای سوالات با گزارش خطای هر ردیف"""
+
+    HEADER = 'text,grade,subject,chapter,difficulty,estimated_time,explanation,option_1,option_2,option_3,option_4,correct_option'
+
+    def _csv_row(self, text, correct=1, estimated_time=60, subject=None):
+        subject = self.subject.id if subject is None else subject
+        return f'{text},{self.grade.id},{subject},,easy,{estimated_time},,الف,ب,ج,د,{correct}'
+
+    def _jsonl(self, count):
+        return '\n'.join(json.dumps({
+            'text': f'سوال {i}', 'grade': self.grade.id, 'subject': self.subject.id, 'difficulty': 'medium',
+            'estimated_time': 45, 'options': [{'text': str(j), 'is_correct': j == 2} for j in range(4)],
+        }) for i in range(count))
+
+    def test_csv_upload_reports_invalid_rows(self):
+        content = '\n'.join([
+            self.HEADER,
+            self._csv_row('سوال ۱'),
+            self._csv_row('سوال ۲', correct=5),
+            self._csv_row('سوال ۳', correct=3),
+            self._csv_row('سوال ۴', estimated_time=5),
+            self._csv_row('سوال ۵', subject=999999),
+            self._csv_row('سوال ۶', correct=4),
+        ])
+        upload = SimpleUploadedFile('questions.csv', content.encode('utf-8-sig'), content_type='text/csv')
+        response = self.client_for(self.teacher_user).post(
+            '/lms/v1/questions/import/', {'file': upload}, format='multipart'
+        )
+
+        self.assertEqual(response.status_code, 201, response.data)
+        report = response.data['data']
+        self.assertEqual((report['total'], report['created'], report['failed']), (6, 3, 3))
+        self.assertEqual([error['row'] for error in report['errors']], [3, 5, 6])
+        self.assertIn('options', report['errors'][0]['errors'])
+        self.assertIn('estimated_time', report['errors'][1]['errors'])
+        self.assertIn('subject', report['errors'][2]['errors'])
+
+        questions = Question.objects.filter(teacher=self.teacher).order_by('id')
+        self.assertEqual([q.text for q in questions], ['سوال ۱', 'سوال ۳', 'سوال ۶'])
+        self.assertEqual(
+            [q.options.get(is_correct=True).order for q in questions], [1, 3, 4]
+        )
+        self.assertEqual(QuestionOption.objects.filter(question__in=questions).count(), 12)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        def queries(count):
+            rows = question_import.iter_rows(StringIO(self._jsonl(count)), question_import.FORMAT_JSONL)
+            with CaptureQueriesContext(connection) as ctx:
+                report = question_import.import_questions(self.teacher, rows, batch_size=100)
+            self.assertEqual(report['created'], count)
+            return len(ctx.captured_queries)
+
+        # ردیف شمارنده معلم در اولین ورود ساخته می‌شود
+        queries(1)
+        # اندازه‌ها زیر سقف پارامترهای یک INSERT در SQLite هستند
+        self.assertEqual(queries(5), queries(40))
+        self.assertEqual(Question.objects.filter(teacher=self.teacher).count(), 46)
+
+    def test_command_dry_run(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False, encoding='utf-8') as fileobj:
+            fileobj.write(self._jsonl(3) + '\n{invalid json}\n')
+        self.addCleanup(os.remove, fileobj.name)
+
+        out = StringIO()
+        call_command('import_questions', fileobj.name, '--teacher', self.teacher_user.mobile, '--dry-run', stdout=out)
+        self.assertIn('ردیف 4', out.getvalue())
+        self.assertFalse(Question.objects.exists())
+
+        call_command('import_questions', fileobj.name, '--teacher', str(self.teacher.id), stdout=StringIO())
+        self.assertEqual(Question.objects.count(), 3)
+
+    def test_command_rejects_unreadable_file(self):
+        with tempfile.NamedTemporaryFile('wb', suffix='.csv', delete=False) as fileobj:
+            fileobj.write('text,difficulty\nسوال,easy\n'.encode('utf-16'))
+        self.addCleanup(os.remove, fileobj.name)
+
+        with self.assertRaisesMessage(CommandError, 'UTF-8'):
+            call_command('import_questions', fileobj.name, '--teacher', str(self.teacher.id), stdout=StringIO())
+
+
+class RosterImportTests(LmsTestMixin, TestCase):
+    """ثبت دسته‌ای دانش‌آموزان با upsert و دعوت در چند دستور"""
+
+    HEADER = 'first_name,last_name,mobile,grade'
+
+    def _upload(self, lines, **data):
+        content = '\n'.join([self.HEADER, *lines])
+        upload = SimpleUploadedFile('roster.csv', content.encode('utf-8-sig'), content_type='text/csv')
+        return self.client_for(self.teacher_user).post(
+            '/lms/v1/students/import/', {'file': upload, **data}, format='multipart'
+        )
+
+    def test_normalize_mobile(self):
+        for value in ['09121234567', '9121234567', '+98 912 123 4567', '00989121234567', '۰۹۱۲-۱۲۳-۴۵۶۷']:
+            self.assertEqual(roster_import.normalize_mobile(value), '09121234567', value)
+        for value in ['', '0912123456', '08121234567', 'abc']:
+            self.assertIsNone(roster_import.normalize_mobile(value), value)
+
+    def test_upsert_invite_and_report(self):
+        own = self.create_student('09121111111')
+        other_teacher = Teacher.objects.create(
+            user=MyUser.objects.create_user(mobile='09129999999'), first_name='دیگر', last_name='معلم',
+            mobile='09129999999'
+        )
+        Student.objects.create(first_name='الف', last_name='ب', mobile='09122222222', created_by=other_teacher)
+        exam = self.create_exam(0)
+        exam.is_published = False
+        exam.save()
+
+        response = self._upload([
+            'علی,احمدی,+98 912 000 0001,هفتم',
+            f'نام,جدید,0912 111 1111,{self.grade.id}',
+            'کسی,دیگر,09122222222,هفتم',
+            'بی,پایه,09120000002,دهم',
+            'تکراری,یک,۰۹۱۲۰۰۰۰۰۰۱,هفتم',
+            'مریم,رضايي,9120000003,هفتم',
+        ], exam_id=exam.id)
+
+        self.assertEqual(response.status_code, 201, response.data)
+        report = response.data['data']
+        self.assertEqual(
+            (report['total'], report['created'], report['updated'], report['failed'], report['invited']),
+            (6, 2, 1, 3, 3)
+        )
+        self.assertEqual([r['status'] for r in report['rows']],
+                         ['created', 'updated', 'failed', 'failed', 'failed', 'created'])
+        self.assertEqual([r['row'] for r in report['rows']], [2, 3, 4, 5, 6, 7])
+        self.assertIn('grade', report['rows'][3]['errors'])
+
+        own.refresh_from_db()
+        self.assertEqual((own.first_name, own.last_name), ('نام', 'جدید'))
+        self.assertEqual(Student.objects.get(mobile='09122222222').created_by, other_teacher)
+        self.assertEqual(
+            set(exam.invited_students.values_list('mobile', flat=True)),
+            {'09120000001', '09121111111', '09120000003'}
+        )
+
+    def test_invited_student_dashboard_is_refreshed(self):
+        student = self.create_student('09121111111')
+        exam = self.create_exam(0)
+        client = self.client_for(student.user)
+        self.assertEqual(client.get('/lms/v1/quiz/dashboard/').data['data']['stats']['available'], 0)
+
+        rows = roster_import.iter_rows(StringIO(f'{self.HEADER}\nدانش‌آموز,تست,09121111111,{self.grade.id}'))
+        with self.captureOnCommitCallbacks(execute=True):
+            report = roster_import.import_roster(self.teacher, rows, exam=exam)
+        self.assertEqual(report['invited'], 1)
+        self.assertEqual(client.get('/lms/v1/quiz/dashboard/').data['data']['stats']['available'], 1)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        exam = self.create_exam(0)
+
+        def queries(start, count):
+            rows = roster_import.iter_rows(StringIO('\n'.join(
+                [self.HEADER] + [f'نام,{i},0913{i:07d},{self.grade.id}' for i in range(start, start + count)]
+            )))
+            with CaptureQueriesContext(connection) as ctx:
+                report = roster_import.import_roster(self.teacher, rows, exam=exam)
+            self.assertEqual(report['created'], count)
+            return len(ctx.captured_queries)
+
+        # اندازه‌ها زیر سقف پارامترهای یک INSERT در SQLite هستند
+        self.assertEqual(queries(0, 5), queries(5, 40))
+        self.assertEqual(exam.invited_students.count(), 45)
+
+
+class QuestionSearchTests(LmsTestMixin, TestCase):
+    """جستجوی رتبه‌بندی شده و صفحه‌بندی شده در بانک سوالات با یکسان‌سازی حروف فارسی"""
+
+    def _question(self, text, teacher=None, explanation=''):
+        return Question.objects.create(
+            teacher=teacher or self.teacher, text=text, grade=self.grade, subject=self.subject,
+            difficulty='easy', estimated_time=30, explanation=explanation
+        )
+
+    def _search(self, term, **params):
+        response = self.client_for(self.teacher_user).get('/lms/v1/questions/', {'search': term, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_arabic_and_persian_letters_match(self):
+        arabic = self._question('كتاب رياضي پايه هفتم')
+        persian = self._question('کتاب ریاضی هشتم')
+        self._question('هندسه')
+
+        self.assertEqual({r['id'] for r in self._search('کتاب ریاضی')['results']}, {arabic.id, persian.id})
+        self.assertEqual({r['id'] for r in self._search('كتاب')['results']}, {arabic.id, persian.id})
+        self.assertEqual([r['id'] for r in self._search('۷ رياضي')['results']], [])
+
+    def test_prefix_explanation_and_rank(self):
+        scattered = self._question('درجه دوم یک معادله')
+        phrase = self._question('معادله درجه دوم را حل کنید')
+        explained = self._question('سوال بدون کلمه کلیدی', explanation='حل معادلات')
+        other_teacher = Teacher.objects.create(
+            user=MyUser.objects.create_user(mobile='09129999999'), first_name='دیگر', last_name='معلم',
+            mobile='09129999999'
+        )
+        self._question('معادله درجه دوم', teacher=other_teacher)
+
+        self.assertEqual([r['id'] for r in self._search('معادله درجه')['results']], [phrase.id, scattered.id])
+        self.assertEqual({r['id'] for r in self._search('معادل')['results']}, {scattered.id, phrase.id, explained.id})
+
+    def test_pagination(self):
+        for i in range(25):
+            self._question(f'تمرین شماره {i}')
+        self._question('سوال دیگر')
+
+        first = self._search('تمرین', page_size=10)
+        self.assertEqual(first['count'], 25)
+        self.assertEqual(len(first['results']), 10)
+        self.assertIsNotNone(first['next'])
+        last = self._search('تمرین', page_size=10, page=3)
+        self.assertEqual(len(last['results']), 5)
+
+        # بدون جستجو، صفحه‌بندی keyset (بدون count)
+        response = self.client_for(self.teacher_user).get('/lms/v1/questions/', {'page_size': 20})
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertNotIn('count', response.data)
+
+
+class KeysetPaginationTests(LmsTestMixin, TestCase):
+    """صفحه‌بندی cursor لیست‌ها: بدون تکرار یا جا افتادن ردیف، حتی با زمان ایجاد یکسان"""
+
+    def _walk(self, url, user, page_size, wrapped=False):
+        client = self.client_for(user)
+        ids, cursor = [], None
+        while True:
+            params = {'page_size': page_size, **({'cursor': cursor} if cursor else {})}
+            response = client.get(url, params)
+            self.assertEqual(response.status_code, 200, response.data)
+            page = response.data['data'] if wrapped else response.data
+            self.assertLessEqual(len(page['results']), page_size)
+            ids.extend(item['id'] for item in page['results'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                return ids
+
+    def test_questions_with_equal_created_at(self):
+        self.create_questions(7)
+        Question.objects.filter(id__lte=Question.objects.order_by('id')[3].id).update(created_at=timezone.now())
+
+        expected = list(Question.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(self._walk('/lms/v1/questions/', self.teacher_user, 3), expected)
+
+    def test_students_and_exam_students(self):
+        students = [self.create_student(f'0912111{i:04d}') for i in range(5)]
+        exam = self.create_exam(0, students)
+
+        ids = self._walk('/lms/v1/students/', self.teacher_user, 2, wrapped=True)
+        self.assertEqual(ids, [student.id for student in reversed(students)])
+        ids = self._walk(f'/lms/v1/exams/{exam.id}/students/', self.teacher_user, 2, wrapped=True)
+        self.assertEqual(ids, [student.id for student in students])
+
+    def test_invalid_parameters(self):
+        client = self.client_for(self.teacher_user)
+        self.assertEqual(client.get('/lms/v1/exams/', {'cursor': 'not-a-cursor'}).status_code, 400)
+        self.assertEqual(client.get('/lms/v1/exams/', {'page_size': 0}).status_code, 400)
+        response = client.get('/lms/v1/exams/', {'page_size': 1000})
+        self.assertEqual(response.data['page_size'], 200)
+
+
+class QuestionCounterTests(LmsTestMixin, TestCase):
+    """شمارنده‌های سوالات فعال درس، فصل و معلم/درجه سختی"""
+
+    def _counts(self):
+        self.subject.refresh_from_db()
+        teacher = dict(self.teacher.question_counters.values_list('difficulty', 'count'))
+        return self.subject.question_count, teacher
+
+    def test_create_update_delete_and_rebuild(self):
+        client = self.client_for(self.teacher_user)
+        other_subject = Subject.objects.create(grade=self.grade, name='علوم')
+        question_id = client.post('/lms/v1/questions/create/', {
+            'text': 'سوال', 'grade': self.grade.id, 'subject': self.subject.id, 'difficulty': 'easy',
+            'estimated_time': 30,
+            'options': json.dumps([{'text': f'گزینه {i}', 'is_correct': i == 0} for i in range(4)]),
+        }, format='json').data['data']['id']
+        self.create_questions(3)
+        self.assertEqual(self._counts(), (4, {'easy': 2, 'medium': 1, 'hard': 1}))
+
+        response = client.put(f'/lms/v1/questions/{question_id}/update/',
+                              {'difficulty': 'hard', 'subject': other_subject.id}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self._counts(), (3, {'easy': 1, 'medium': 1, 'hard': 2}))
+        other_subject.refresh_from_db()
+        self.assertEqual(other_subject.question_count, 1)
+
+        client.delete(f'/lms/v1/questions/{question_id}/delete/')
+        other_subject.refresh_from_db()
+        self.assertEqual(other_subject.question_count, 0)
+        self.assertEqual(self._counts(), (3, {'easy': 1, 'medium': 1, 'hard': 1}))
+        self.assertEqual(question_counters.reconcile_question_counters(check=True),
+                         {'subjects': 0, 'chapters': 0, 'teachers': 0})
+
+        # اختلاف ایجاد شده خارج از API با دستور بازسازی اصلاح می‌شود
+        Subject.objects.filter(id=self.subject.id).update(question_count=50)
+        self.teacher.question_counters.filter(difficulty='easy').delete()
+        out = StringIO()
+        call_command('rebuild_question_counters', stdout=out)
+        self.assertIn('2 مورد اصلاح شد', out.getvalue())
+        self.assertEqual(self._counts(), (3, {'easy': 1, 'medium': 1, 'hard': 1}))
+
+    def test_admin_changes_invalidate_pool(self):
+        self.create_questions(4)
+        questions = list(Question.objects.order_by('id'))
+        question_admin, option_admin = admin.site._registry[Question], admin.site._registry[QuestionOption]
+
+        def changed(apply):
+            version = get_pool_version(self.teacher.id)
+            apply()
+            return get_pool_version(self.teacher.id) != version
+
+        questions[0].difficulty = 'hard'
+        self.assertTrue(changed(lambda: question_admin.save_model(None, questions[0], None, True)))
+        self.assertTrue(changed(lambda: question_admin.delete_model(None, questions[1])))
+        self.assertTrue(changed(lambda: question_admin.delete_queryset(None, Question.objects.filter(id=questions[2].id))))
+        # تغییر گزینه‌ها نسخه داده کش شده سوال را هم عوض می‌کند
+        option = questions[3].options.first()
+        for apply in (lambda: option_admin.save_model(None, option, None, True),
+                      lambda: option_admin.delete_model(None, option),
+                      lambda: option_admin.delete_queryset(None, questions[3].options.all())):
+            updated_at = Question.objects.get(id=questions[3].id).updated_at
+            self.assertTrue(changed(apply))
+            self.assertGreater(Question.objects.get(id=questions[3].id).updated_at, updated_at)
+        self.assertEqual(self._counts(), (2, {'easy': 1, 'medium': 0, 'hard': 1}))
+
+    def test_start_fails_fast_when_pool_is_too_small(self):
+        self.create_questions(2)
+        student = self.create_student()
+        exam = self.create_exam(5, [student])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_for(student.user).post('/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('(2)', response.data['message'])
+        # ایندکس بانک سوالات ساخته نشد
+        self.assertFalse([q for q in queries.captured_queries if 'FROM "lms_question" ' in q['sql']])
+
+
+class TaxonomyTests(LmsTestMixin, TestCase):
+    """درخت پایه/درس/فصل با شمارش گروهی، کش نسخه‌دار و ETag"""
+
+    def setUp(self):
+        super().setUp()
+        self.chapter = Chapter.objects.create(grade=self.grade, subject=self.subject, name='فصل ۱')
+        Subject.objects.create(grade=self.grade, name='علوم')
+        Subject.objects.create(grade=self.grade, name='غیرفعال', is_active=False)
+        self.create_questions(3)
+        Question.objects.filter(id=Question.objects.order_by('id').first().id).update(chapter=self.chapter)
+        question_counters.reconcile_question_counters()
+
+    def test_tree_counts(self):
+        response = APIClient().get('/lms/v1/taxonomy/')
+        self.assertEqual(response.status_code, 200)
+        [grade] = response.data['data']
+        self.assertEqual(grade['subject_count'], 2)
+        subjects = {subject['name']: subject for subject in grade['subjects']}
+        self.assertEqual(subjects['ریاضی']['question_count'], 3)
+        self.assertEqual(subjects['ریاضی']['chapters'], [{'id': self.chapter.id, 'name': 'فصل ۱', 'question_count': 1}])
+        self.assertEqual(subjects['علوم']['question_count'], 0)
+
+    def test_etag_and_invalidation(self):
+        client = APIClient()
+        etag = client.get('/lms/v1/taxonomy/')['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/lms/v1/taxonomy/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 0)
+
+        # ایجاد سوال از طریق API نسخه درخت را عوض می‌کند
+        response = self.client_for(self.teacher_user).post('/lms/v1/questions/create/', {
+            'text': 'سوال جدید', 'grade': self.grade.id, 'subject': self.subject.id, 'difficulty': 'easy',
+            'estimated_time': 30,
+            'options': json.dumps([{'text': f'گزینه {i}', 'is_correct': i == 0} for i in range(4)]),
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+        response = client.get('/lms/v1/taxonomy/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['data'][0]['subjects'][0]['question_count'], 4)
+
+
+class LmsQueryBudgetTests(LmsTestMixin, QueryBudgetMixin, TestCase):
+    """تعداد کوئری endpointهای خواندنی نباید به تعداد سوال، دانش‌آموز، آزمون و پاسخ وابسته باشد"""
+
+    urls_module = 'lms.urls'
+    budgets = {
+        'grade-list': 1,
+        'subject-list': 1,
+        'chapter-list': 1,
+        'taxonomy': 3,
+        'skill-list': 1,
+        'teacher-check-status': 2,
+        'teacher-profile': 1,
+        'teacher-list': 1,
+        'student-profile': 1,
+        'student-list': 1,
+        'student-attempts': 1,
+        'exam-result': 4,
+        'question-list': 1,
+        'question-detail': 2,
+        'exam-list': 1,
+        'exam-detail': 2,
+        'exam-students-list': 3,
+        'exam-questions': 4,
+        'exam-results': 3,
+        'exam-item-analysis': 8,
+        'exam-student-result': 8,
+        'quiz-dashboard': 1,
+        'quiz-result': 5,
+    }
+    exempt = {
+        'teacher-register': 'ثبت نام یک معلم',
+        'student-register': 'ثبت نام یک دانش‌آموز',
+        'student-import': 'RosterImportTests',
+        'question-create': 'ساخت یک سوال',
+        'question-update': 'ویرایش یک سوال',
+        'question-delete': 'حذف یک سوال',
+        'question-import': 'QuestionImportTests',
+        'exam-create': 'ساخت یک آزمون',
+        'exam-update': 'ویرایش یک آزمون',
+        'exam-delete': 'حذف یک آزمون',
+        'exam-publish': 'انتشار یک آزمون',
+        'exam-add-students': 'افزودن دانش‌آموز به یک آزمون',
+        'exam-remove-student': 'حذف یک دانش‌آموز از آزمون',
+        'exam-check-access': 'مسیر قدیمی شروع آزمون با موبایل',
+        'exam-start': 'مسیر قدیمی شروع آزمون با موبایل',
+        'exam-submit-answer': 'ثبت یک پاسخ',
+        'exam-finish': 'پایان یک تلاش',
+        'quiz-check': 'بررسی دسترسی یک دانش‌آموز به یک آزمون',
+        'quiz-start': 'StartQuizQueryCountTests و ResumeQuizQueryCountTests',
+        'quiz-answer': 'ثبت یک پاسخ',
+        'quiz-answers-batch': 'BatchAnswerSubmitTests',
+        'quiz-finish': 'پایان یک تلاش',
+    }
+
+    def build_calls(self, size):
+        admin = MyUser.objects.create_user(mobile=f'0915{size:07d}', is_superuser=True)
+        teacher_user = MyUser.objects.create_user(mobile=f'0914{size:07d}')
+        teacher = Teacher.objects.create(
+            user=teacher_user, first_name='معلم', last_name=str(size), mobile=teacher_user.mobile
+        )
+        teacher.skills.set(Skill.objects.bulk_create([Skill(name=f'مهارت {size}-{i}') for i in range(size)]))
+
+        subjects = Subject.objects.bulk_create([
+            Subject(grade=self.grade, name=f'درس {size}-{i}') for i in range(size)
+        ])
+        chapters = Chapter.objects.bulk_create([
+            Chapter(grade=self.grade, subject=subjects[i], name=f'فصل {size}-{i}') for i in range(size)
+        ])
+        questions = Question.objects.bulk_create([
+            Question(teacher=teacher, text=f'سوال {i}', grade=self.grade, subject=subjects[0],
+                     chapter=chapters[i], difficulty='easy', estimated_time=30)
+            for i in range(size)
+        ])
+        QuestionOption.objects.bulk_create([
+            QuestionOption(question=question, text=f'گزینه {j}', order=j + 1, is_correct=(j == 0))
+            for question in questions for j in range(4)
+        ])
+        question_counters.apply_question_changes(added=[question_counters.question_state(q) for q in questions])
+
+        users = MyUser.objects.bulk_create([MyUser(mobile=f'0916{size:03d}{i:04d}') for i in range(size + 1)])
+        students = Student.objects.bulk_create([
+            Student(user=user, first_name='دانش‌آموز', last_name=str(i), mobile=user.mobile,
+                    grade=self.grade, created_by=teacher)
+            for i, user in enumerate(users)
+        ])
+        student, live_student, others = students[0], students[-1], students[1:-1]
+
+        now = timezone.now()
+        exams = Exam.objects.bulk_create([
+            Exam(teacher=teacher, title=f'آزمون {i}', duration_minutes=30,
+                 allowed_entry_start=now - timedelta(minutes=5), allowed_entry_end=now + timedelta(hours=1),
+                 total_questions_count=size, easy_percent=100, medium_percent=0, hard_percent=0,
+                 grade=self.grade, subject=subjects[0], is_published=True)
+            for i in range(size)
+        ])
+        exam = exams[0]
+        exam.invited_students.add(*students)
+        student.invited_exams.add(*exams[1:])
+
+        # تلاش کامل شده با پاسخ به همه سوالات از مسیر واقعی API
+        client = self.client_for(student.user)
+        paper = client.post('/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json').data['data']
+        client.post('/lms/v1/quiz/answers/batch/', {
+            'attempt_id': paper['attempt_id'],
+            'answers': [{'question_id': q['id'], 'option_id': q['options'][0]['id']} for q in paper['questions']],
+        }, format='json')
+        client.post('/lms/v1/quiz/finish/', {'attempt_id': paper['attempt_id']}, format='json')
+        live_paper = self.client_for(live_student.user).post(
+            '/lms/v1/quiz/start/', {'exam_id': exam.id}, format='json'
+        ).data['data']
+
+        ExamAttempt.objects.bulk_create(
+            [ExamAttempt(exam=other_exam, student=student, total_questions=size, status='completed')
+             for other_exam in exams[1:]]
+            + [ExamAttempt(exam=exam, student=other, total_questions=size, total_correct=i % (size + 1),
+                           score=i % (size + 1) * 10, status='completed')
+               for i, other in enumerate(others)]
+        )
+        for each in exams:
+            rebuild_exam_statistics(each.id)
+
+        attempt_id = paper['attempt_id']
+        # درخت از کش خوانده نشود تا کوئری ساخت آن شمرده شود
+        invalidate_taxonomy()
+        return [
+            Call('grade-list'),
+            Call('subject-list'),
+            Call('chapter-list'),
+            Call('taxonomy'),
+            Call('skill-list'),
+            Call('teacher-check-status', user=teacher_user),
+            Call('teacher-profile', user=teacher_user),
+            Call('teacher-list', user=admin),
+            Call('student-profile', user=student.user),
+            Call('student-list', user=teacher_user),
+            Call('student-attempts', user=student.user),
+            Call('exam-result', {'attempt_id': attempt_id}, user=teacher_user),
+            Call('question-list', user=teacher_user),
+            Call('question-detail', {'pk': questions[0].pk}, user=teacher_user),
+            Call('exam-list', user=teacher_user),
+            Call('exam-detail', {'pk': exam.pk}, user=teacher_user),
+            Call('exam-students-list', {'pk': exam.pk}, user=teacher_user),
+            Call('exam-questions', {'attempt_id': live_paper['attempt_id']}, user=live_student.user),
+            Call('exam-results', {'pk': exam.pk}, user=teacher_user),
+            Call('exam-item-analysis', {'pk': exam.pk}, user=teacher_user),
+            Call('exam-student-result', {'exam_id': exam.pk, 'student_id': student.pk}, user=teacher_user),
+            Call('quiz-dashboard', user=student.user),
+            Call('quiz-result', {'attempt_id': attempt_id}, user=student.user),
+        ]
@@ -4,6 +4,7 @@ from .views import (
     GradeListView,
     SubjectListView,
     ChapterListView,
+    TaxonomyView,
 
     # ویوهای معلم
     TeacherRegisterView,
@@ -14,10 +15,12 @@ from .views import (
     StudentRegisterView,
     StudentProfileView,
     StudentListView,
+    StudentImportView,
 
     # ویوهای مدیریت سوالات
     QuestionListView,
     QuestionCreateView,
+    QuestionImportView,
     QuestionDetailView,
     QuestionUpdateView,
     QuestionDeleteView,
@@ -40,9 +43,10 @@ from .views import (
     ExamResultView,
     StudentExamAttemptsView,
 )
-from .views.exam_views import ExamStudentsListView, ExamRemoveStudentView, ExamResultsView, ExamStudentResultDetailView
+from .views.exam_views import ExamStudentsListView, ExamRemoveStudentView, ExamResultsView, ExamStudentResultDetailView, \
+    ExamItemAnalysisView
 from .views.quiz_views import StartQuizView, SubmitQuizAnswerView, FinishQuizView, QuizResultView, \
-    CheckExamAccessView, StudentDashboardView
+    CheckExamAccessView, StudentDashboardView, SubmitQuizAnswersBatchView
 from .views.teacher_views import TeacherCheckStatusView, SkillListView
 
 urlpatterns = [
@@ -56,6 +60,9 @@ urlpatterns = [
     # فصل‌ها (با فیلتر subject_id)
     path('v1/chapters/', ChapterListView.as_view(), name='chapter-list'),
 
+    # درخت کامل پایه ← درس ← فصل با تعداد سوالات (کش شده، ETag)
+    path('v1/taxonomy/', TaxonomyView.as_view(), name='taxonomy'),
+
     # بررسی دسترسی دانش‌آموز به آزمون (قبل از شروع)
     path('v1/exam/check-access/', ExamCheckAccessView.as_view(), name='exam-check-access'),
 
@@ -98,6 +105,9 @@ urlpatterns = [
     # لیست دانش‌آموزان (برای معلم)
     path('v1/students/', StudentListView.as_view(), name='student-list'),
 
+    # ورود دسته‌ای دانش‌آموزان از CSV (با دعوت اختیاری به آزمون)
+    path('v1/students/import/', StudentImportView.as_view(), name='student-import'),
+
     # لیست تلاش‌های دانش‌آموز
     path('v1/student/attempts/', StudentExamAttemptsView.as_view(), name='student-attempts'),
 
@@ -111,6 +121,9 @@ urlpatterns = [
     # ایجاد سوال جدید
     path('v1/questions/create/', QuestionCreateView.as_view(), name='question-create'),
 
+    # ورود دسته‌ای سوالات از فایل CSV یا JSON-lines
+    path('v1/questions/import/', QuestionImportView.as_view(), name='question-import'),
+
     # دریافت، ویرایش و حذف سوال
     path('v1/questions/<int:pk>/', QuestionDetailView.as_view(), name='question-detail'),
     path('v1/questions/<int:pk>/update/', QuestionUpdateView.as_view(), name='question-update'),
@@ -141,10 +154,12 @@ urlpatterns = [
     path('v1/quiz/check/', CheckExamAccessView.as_view(), name='quiz-check'),
     path('v1/quiz/start/', StartQuizView.as_view(), name='quiz-start'),
     path('v1/quiz/answer/', SubmitQuizAnswerView.as_view(), name='quiz-answer'),
+    path('v1/quiz/answers/batch/', SubmitQuizAnswersBatchView.as_view(), name='quiz-answers-batch'),
     path('v1/quiz/finish/', FinishQuizView.as_view(), name='quiz-finish'),
     path('v1/quiz/result/<int:attempt_id>/', QuizResultView.as_view(), name='quiz-result'),
 
     path('v1/exams/<int:pk>/results/', ExamResultsView.as_view(), name='exam-results'),
+    path('v1/exams/<int:pk>/item-analysis/', ExamItemAnalysisView.as_view(), name='exam-item-analysis'),
     path('v1/exams/<int:exam_id>/students/<int:student_id>/result/', ExamStudentResultDetailView.as_view(),
          name='exam-student-result'),
 
@@ -179,6 +194,7 @@ urlpatterns = [
 سوالات:
 - 'question-list' : لیست سوالات
 - 'question-create' : ایجاد سوال جدید
+- 'question-import' : ورود دسته‌ای سوالات از فایل
 - 'question-detail' : جزئیات سوال
 - 'question-update' : ویرایش سوال
 - 'question-delete' : حذف سوال
@@ -191,4 +207,5 @@ urlpatterns = [
 - 'exam-delete' : حذف آزمون
 - 'exam-publish' : انتشار آزمون
 - 'exam-add-students' : اضافه کردن دانش‌آموز به آزمون
+- 'exam-item-analysis' : تحلیل سوالات آزمون
 """
\ No newline at end of file
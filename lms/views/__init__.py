@@ -5,6 +5,7 @@ from .common_views import (
     GradeListView,
     SubjectListView,
     ChapterListView,
+    TaxonomyView,
 )
 from .teacher_views import (
     TeacherRegisterView,
@@ -15,6 +16,7 @@ from .student_views import (
     StudentRegisterView,
     StudentProfileView,
     StudentListView,
+    StudentImportView,
     StudentDetailView,
     StudentDeleteView,
     StudentByMobileView,
@@ -22,6 +24,7 @@ from .student_views import (
 from .question_views import (
     QuestionListView,
     QuestionCreateView,
+    QuestionImportView,
     QuestionDetailView,
     QuestionUpdateView,
     QuestionDeleteView,
@@ -53,6 +56,7 @@ __all__ = [
     'GradeListView',
     'SubjectListView',
     'ChapterListView',
+    'TaxonomyView',
 
     # Teacher
     'TeacherRegisterView',
@@ -63,6 +67,7 @@ __all__ = [
     'StudentRegisterView',
     'StudentProfileView',
     'StudentListView',
+    'StudentImportView',
     'StudentDetailView',
     'StudentDeleteView',
     'StudentByMobileView',
@@ -70,6 +75,7 @@ __all__ = [
     # Question
     'QuestionListView',
     'QuestionCreateView',
+    'QuestionImportView',
     'QuestionDetailView',
     'QuestionUpdateView',
     'QuestionDeleteView',
@@ -1,17 +1,30 @@
 # lms/views/common_views.py - بازنویسی کامل
 
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework.permissions import AllowAny
 from ..models import Grade, Subject, Chapter
 from ..serializers import GradeSerializer, SubjectSerializer, ChapterSerializer
+from ..services.taxonomy import get_taxonomy, get_taxonomy_version
 from .base import BaseAPIView
 
 
+def count_subquery(queryset, field):
+    """تعداد ردیف‌های queryset مرتبط با ردیف بیرونی (بدون join و ضرب ردیف‌ها در هم)"""
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(total=Count('pk'))
+    return Coalesce(Subquery(counts.values('total'), output_field=IntegerField()), 0)
+
+
 class GradeListView(BaseAPIView):
     """لیست پایه‌های تحصیلی"""
     permission_classes = [AllowAny]
 
     def get(self, request):
-        grades = Grade.objects.filter(is_active=True).order_by('order')
+        grades = Grade.objects.filter(is_active=True).annotate(
+            subject_total=count_subquery(Subject.objects.filter(is_active=True), 'grade')
+        ).order_by('order')
         serializer = GradeSerializer(grades, many=True)
         return self.success_response(data=serializer.data)
 
@@ -27,7 +40,9 @@ class SubjectListView(BaseAPIView):
         if grade_id:
             queryset = queryset.filter(grade_id=grade_id)
 
-        queryset = queryset.order_by('name')
+        queryset = queryset.select_related('grade').annotate(
+            chapter_total=count_subquery(Chapter.objects.filter(is_active=True), 'subject'),
+        ).order_by('name')
         serializer = SubjectSerializer(queryset, many=True)
         return self.success_response(data=serializer.data)
 
@@ -43,6 +58,19 @@ class ChapterListView(BaseAPIView):
         if subject_id:
             queryset = queryset.filter(subject_id=subject_id)
 
-        queryset = queryset.order_by('name')
+        queryset = queryset.select_related('subject', 'grade').order_by('name')
         serializer = ChapterSerializer(queryset, many=True)
-        return self.success_response(data=serializer.data)
\ No newline at end of file
+        return self.success_response(data=serializer.data)
+
+
+def _taxonomy_etag(request, *args, **kwargs):
+    return f"taxonomy-{get_taxonomy_version()}"
+
+
+class TaxonomyView(BaseAPIView):
+    """درخت کامل پایه ← درس ← فصل با تعداد سوالات (کش شده، با پشتیبانی از ETag و 304)"""
+    permission_classes = [AllowAny]
+
+    @method_decorator(condition(etag_func=_taxonomy_etag))
+    def get(self, request):
+        return self.success_response(data=get_taxonomy())
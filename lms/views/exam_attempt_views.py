@@ -2,17 +2,25 @@ import random
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.utils import timezone
-from django.db import transaction
+from django.db import transaction, IntegrityError
+from django.db.models import prefetch_related_objects
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from ..models import Exam, ExamAttempt, StudentAnswer, Question, Student
+from ..models import Exam, ExamAttempt, StudentAnswer, Question, Student, ExamQuestionSelection
 from ..serializers import (
     StartExamRequestSerializer,
     SubmitAnswerSerializer,
     ExamAttemptDetailSerializer,
     ExamAttemptListSerializer,
 )
+from ..services import answer_buffer, compact_answers
+from ..services.dashboard import invalidate_student_dashboard
+from ..services.exam_statistics import record_attempt_completed, record_attempt_started
+from ..services.paper_generation import load_attempt_paper
+from ..services.question_payload import option_ids, render_question
+from ..services.scoring import add_correct_answer
 from .base import BaseAPIView
+from .pagination import KeysetPagination
 
 
 class StartExamView(BaseAPIView):
@@ -110,7 +118,7 @@ class StartExamView(BaseAPIView):
         existing_attempt = ExamAttempt.objects.filter(
             student=student,
             exam=exam,
-            status='completed'
+            status__in=['completed', 'timeout']
         ).first()
 
         if existing_attempt:
@@ -138,19 +146,25 @@ class StartExamView(BaseAPIView):
             total_questions=len(selected_questions),
             status='in_progress'
         )
+        record_attempt_started(exam.id)
 
-        # ذخیره سوالات انتخابی و ساخت سوالات با گزینه‌های جابجا شده
-        questions_data = []
-        for idx, question in enumerate(selected_questions):
-            # ذخیره سوال انتخاب شده
-            from ..models import ExamQuestionSelection
-            ExamQuestionSelection.objects.create(
+        # ذخیره سوالات انتخابی به صورت دسته‌ای
+        ExamQuestionSelection.objects.bulk_create([
+            ExamQuestionSelection(
                 exam=exam,
                 student=student,
                 question=question,
                 order=idx + 1
             )
+            for idx, question in enumerate(selected_questions)
+        ])
+
+        # گزینه‌های تمام سوالات با یک کوئری
+        prefetch_related_objects(selected_questions, 'options')
 
+        # ساخت سوالات با گزینه‌های جابجا شده
+        questions_data = []
+        for question in selected_questions:
             # آماده‌سازی گزینه‌ها
             options = self._shuffle_options(question) if exam.randomize_options else list(question.options.all())
 
@@ -190,39 +204,19 @@ class GetExamQuestionsView(BaseAPIView):
 
     def get(self, request, attempt_id):
         try:
-            attempt = ExamAttempt.objects.get(id=attempt_id, status='in_progress')
+            attempt = ExamAttempt.objects.select_related('exam', 'pool_snapshot').get(
+                id=attempt_id, status='in_progress'
+            )
         except ExamAttempt.DoesNotExist:
             return self.error_response(message="تلاش یافت نشد یا به پایان رسیده است")
 
-        # دریافت سوالات انتخابی
-        from ..models import ExamQuestionSelection
-        selections = ExamQuestionSelection.objects.filter(
-            exam=attempt.exam,
-            student=attempt.student
-        ).order_by('order')
-
+        # دریافت سوالات انتخابی به همراه گزینه‌ها (از کش داده سوالات)
         questions_data = []
-        for selection in selections:
-            question = selection.question
-            options = list(question.options.all())
-            if attempt.exam.randomize_options:
-                random.shuffle(options)
-
-            questions_data.append({
-                'id': question.id,
-                'text': question.text,
-                'estimated_time': question.estimated_time,
-                'image_url': question.image.url if question.image else None,
-                'options': [
-                    {
-                        'id': opt.id,
-                        'text': opt.text,
-                        'image': opt.image.url if opt.image else None,
-                        'order': idx + 1
-                    }
-                    for idx, opt in enumerate(options)
-                ]
-            })
+        for payload, option_order in load_attempt_paper(attempt):
+            if not option_order and attempt.exam.randomize_options:
+                option_order = option_ids(payload)
+                random.shuffle(option_order)
+            questions_data.append(render_question(payload, option_order, option_image_key='image'))
 
         return self.success_response(data={
             'attempt_id': attempt.id,
@@ -240,6 +234,9 @@ class SubmitAnswerView(BaseAPIView):
 
     @transaction.atomic
     def post(self, request):
+        if answer_buffer.is_enabled():
+            return self._submit_buffered(request)
+
         serializer = SubmitAnswerSerializer(data=request.data)
 
         if not serializer.is_valid():
@@ -253,19 +250,21 @@ class SubmitAnswerView(BaseAPIView):
         is_correct = option.is_correct
         points_earned = 10 if is_correct else 0  # هر سوال ۱۰ نمره
 
-        # ذخیره پاسخ
-        student_answer = StudentAnswer.objects.create(
-            attempt=attempt,
-            question=question,
-            selected_option=option,
-            is_correct=is_correct
-        )
+        # ذخیره پاسخ (محدودیت یکتایی از ثبت پاسخ تکراری جلوگیری می‌کند)
+        try:
+            with transaction.atomic():
+                StudentAnswer.objects.create(
+                    attempt=attempt,
+                    question=question,
+                    selected_option=option,
+                    is_correct=is_correct
+                )
+        except IntegrityError:
+            return self.error_response(message="پاسخ این سوال قبلاً ثبت شده است")
 
         # بروزرسانی نمره تلاش
         if is_correct:
-            attempt.score += points_earned
-            attempt.total_correct += 1
-            attempt.save()
+            add_correct_answer(attempt.id, points_earned)
 
         # ارسال پاسخ
         response_data = {
@@ -279,6 +278,38 @@ class SubmitAnswerView(BaseAPIView):
             message="پاسخ با موفقیت ثبت شد"
         )
 
+    def _submit_buffered(self, request):
+        """ثبت پاسخ در بافر (بدون نوشتن در دیتابیس)"""
+        try:
+            attempt_id = int(request.data.get('attempt_id'))
+            question_id = int(request.data.get('question_id'))
+            option_id = int(request.data.get('selected_option_id'))
+        except (TypeError, ValueError):
+            return self.error_response(message="اطلاعات ارسال شده معتبر نیست")
+
+        attempt_context = answer_buffer.get_attempt_context(attempt_id)
+        if not attempt_context:
+            return self.error_response(errors={"attempt_id": "تلاش معتبری یافت نشد"})
+
+        answer_key = answer_buffer.get_question_answer_key(question_id)
+        if not answer_key:
+            return self.error_response(errors={"question_id": "سوال معتبری یافت نشد"})
+        if option_id not in answer_key['options']:
+            return self.error_response(errors={"selected_option_id": "گزینه انتخاب شده معتبر نیست"})
+
+        is_correct = answer_key['options'][option_id]
+        if not answer_buffer.record_answer(attempt_id, question_id, option_id, is_correct):
+            return self.error_response(message="پاسخ این سوال قبلاً ثبت شده است")
+
+        return self.success_response(
+            data={
+                'is_correct': is_correct,
+                'points_earned': 10 if is_correct else 0,
+                'explanation': answer_key['explanation'] if not is_correct and attempt_context['show_answer_key'] else None
+            },
+            message="پاسخ با موفقیت ثبت شد"
+        )
+
 
 class FinishExamView(BaseAPIView):
     """پایان آزمون و محاسبه نتایج نهایی"""
@@ -288,10 +319,15 @@ class FinishExamView(BaseAPIView):
     @transaction.atomic
     def post(self, request, attempt_id):
         try:
-            attempt = ExamAttempt.objects.get(id=attempt_id, status='in_progress')
+            attempt = ExamAttempt.objects.select_for_update().get(id=attempt_id, status='in_progress')
         except ExamAttempt.DoesNotExist:
             return self.error_response(message="تلاش یافت نشد یا قبلاً پایان یافته است")
 
+        # ذخیره پاسخ‌های بافر شده قبل از محاسبه نمره
+        if answer_buffer.is_enabled():
+            answer_buffer.flush_attempt(attempt.id)
+            answer_buffer.forget_attempt(attempt.id)
+
         # محاسبه نمره نهایی
         answers = StudentAnswer.objects.filter(attempt=attempt)
         total_correct = answers.filter(is_correct=True).count()
@@ -305,6 +341,11 @@ class FinishExamView(BaseAPIView):
         attempt.end_time = timezone.now()
         attempt.status = 'completed'
         attempt.save()
+        answer_sheet = compact_answers.load_answer_sheet(attempt) if attempt.exam.show_answer_key_immediately else []
+        if compact_answers.is_enabled():
+            compact_answers.pack_attempt(attempt)
+        record_attempt_completed(attempt)
+        invalidate_student_dashboard(attempt.student_id)
 
         # آماده‌سازی پاسخ
         percentage = (total_score / max_score * 100) if max_score > 0 else 0
@@ -323,15 +364,12 @@ class FinishExamView(BaseAPIView):
         # اگر نمایش پاسخ‌نامه فعال باشد
         if attempt.exam.show_answer_key_immediately:
             answer_key = []
-            for answer in answers.order_by('id'):
+            for answer in answer_sheet:
                 answer_key.append({
-                    'question_text': answer.question.text,
-                    'selected_option_text': answer.selected_option.text if answer.selected_option else None,
-                    'is_correct': answer.is_correct,
-                    'correct_option_text': next(
-                        (opt.text for opt in answer.question.options.all() if opt.is_correct),
-                        None
-                    )
+                    'question_text': answer['question'].text,
+                    'selected_option_text': answer['selected_option'].text if answer['selected_option'] else None,
+                    'is_correct': answer['is_correct'],
+                    'correct_option_text': answer['correct_option'].text if answer['correct_option'] else None
                 })
             response_data['answer_key'] = answer_key
 
@@ -348,7 +386,7 @@ class ExamResultView(BaseAPIView):
 
     def get(self, request, attempt_id):
         try:
-            attempt = ExamAttempt.objects.get(id=attempt_id)
+            attempt = ExamAttempt.objects.select_related('student', 'exam').get(id=attempt_id)
         except ExamAttempt.DoesNotExist:
             return self.error_response(message="نتیجه‌ای یافت نشد", status_code=status.HTTP_404_NOT_FOUND)
 
@@ -373,7 +411,8 @@ class StudentExamAttemptsView(generics.ListAPIView):
     authentication_classes = [JWTAuthentication]  # اضافه شد
     permission_classes = [IsAuthenticated]
     serializer_class = ExamAttemptListSerializer
-
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-start_time', '-id')
 
     def get_queryset(self):
         user = self.request.user
@@ -381,10 +420,12 @@ class StudentExamAttemptsView(generics.ListAPIView):
         if hasattr(user, 'student_profile'):
             return ExamAttempt.objects.filter(
                 student=user.student_profile
-            ).order_by('-start_time')
+            ).select_related('student', 'exam')
 
         student_id = self.request.query_params.get('student_id')
         if student_id and user.is_superuser:
-            return ExamAttempt.objects.filter(student_id=student_id).order_by('-start_time')
+            return ExamAttempt.objects.filter(student_id=student_id).select_related(
+                'student', 'exam'
+            )
 
         return ExamAttempt.objects.none()
\ No newline at end of file
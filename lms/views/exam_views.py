@@ -1,7 +1,8 @@
 # lms/views/exam_views.py
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.db.models import Q
+from django.db.models import Count, Prefetch, Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
@@ -13,32 +14,48 @@ from ..serializers import (
     ExamUpdateSerializer,
     ExamStudentCheckSerializer,
 )
+from ..services import exam_results, keyset
+from ..services.compact_answers import load_answer_sheet
+from ..services.dashboard import invalidate_student_dashboard
+from ..services.exam_statistics import get_exam_statistics, stats_summary
+from ..services.item_analysis import get_item_analysis
+from ..services.paper_generation import schedule_pregeneration
 from .base import BaseAPIView
+from .common_views import count_subquery
+from .pagination import KeysetPagination
+
+
+def with_exam_relations(queryset):
+    """روابط و تعداد دعوت شدگان هر آزمون در همان کوئری لیست"""
+    return queryset.select_related('teacher', 'grade', 'subject', 'chapter').annotate(
+        invited_total=count_subquery(Exam.invited_students.through.objects.all(), 'exam')
+    )
 
 
 class ExamListView(generics.ListAPIView):
     authentication_classes = [JWTAuthentication]  # اضافه شد
     permission_classes = [IsAuthenticated]
     serializer_class = ExamListSerializer
-
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
         user = self.request.user
 
         # معلم: آزمون‌های خودش
         if hasattr(user, 'teacher_profile'):
-            return Exam.objects.filter(teacher=user.teacher_profile)
+            return with_exam_relations(Exam.objects.filter(teacher=user.teacher_profile))
 
         # دانش‌آموز: آزمون‌هایی که به آنها دعوت شده
         if hasattr(user, 'student_profile'):
-            return Exam.objects.filter(
+            return with_exam_relations(Exam.objects.filter(
                 invited_students=user.student_profile,
                 is_published=True
-            )
+            ))
 
         # ادمین: همه آزمون‌ها
         if user.is_superuser:
-            return Exam.objects.all()
+            return with_exam_relations(Exam.objects.all())
 
         return Exam.objects.none()
 
@@ -99,6 +116,9 @@ class ExamCreateView(BaseAPIView):
             exam.invited_students.set(students)
             print(f"Added {students.count()} students to exam")
 
+        if exam.is_published:
+            schedule_pregeneration(exam)
+
         response_serializer = ExamSerializer(exam)
 
         return self.success_response(
@@ -114,7 +134,9 @@ class ExamDetailView(BaseAPIView):
 
     def get(self, request, pk):
         try:
-            exam = Exam.objects.get(pk=pk)
+            exam = with_exam_relations(Exam.objects.prefetch_related(
+                Prefetch('invited_students', queryset=Student.objects.select_related('grade'))
+            )).get(pk=pk)
         except Exam.DoesNotExist:
             return self.error_response(message="آزمون یافت نشد", status_code=status.HTTP_404_NOT_FOUND)
 
@@ -226,8 +248,15 @@ class ExamPublishView(BaseAPIView):
 
         exam.is_published = True
         exam.save()
+        invalidate_student_dashboard(*exam.invited_students.values_list('id', flat=True))
+
+        # ساخت سوالات دانش‌آموزان توسط دستور pregenerate_exam_papers (قبل از زمان شروع آزمون)
+        schedule_pregeneration(exam)
 
-        return self.success_response(message="آزمون با موفقیت منتشر شد")
+        return self.success_response(
+            data={"pregeneration_status": exam.pregeneration_status},
+            message="آزمون با موفقیت منتشر شد"
+        )
 
 
 class ExamAddStudentsView(BaseAPIView):
@@ -304,6 +333,8 @@ class ExamRemoveStudentView(BaseAPIView):
 class ExamStudentsListView(BaseAPIView):
     authentication_classes = [JWTAuthentication]  # اضافه شد
     permission_classes = [IsAuthenticated]
+    # ترتیب تقریبی دعوت؛ ایندکس یکتای (exam_id, student_id) جدول واسط برای keyset کافی است
+    keyset_ordering = ('id',)
 
     def get(self, request, pk):
         try:
@@ -317,10 +348,11 @@ class ExamStudentsListView(BaseAPIView):
                 return self.error_response(message="شما به این آزمون دسترسی ندارید",
                                            status_code=status.HTTP_403_FORBIDDEN)
 
-        students = exam.invited_students.all()
+        paginator = KeysetPagination()
+        students = paginator.paginate_queryset(exam.invited_students.select_related('grade'), request, view=self)
         from ..serializers import StudentListSerializer
         serializer = StudentListSerializer(students, many=True)
-        return self.success_response(data=serializer.data)
+        return self.success_response(data=paginator.get_page_data(serializer.data))
 
 
 class ExamCheckAccessView(BaseAPIView):
@@ -361,9 +393,18 @@ class ExamResultsView(BaseAPIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def perform_content_negotiation(self, request, force=False):
+        # format=csv توسط خود ویو به صورت stream پاسخ داده می‌شود
+        return super().perform_content_negotiation(request, force=force or self._wants_csv(request))
+
+    def _wants_csv(self, request):
+        return request.query_params.get('format') == 'csv'
+
     def get(self, request, pk):
         try:
-            exam = Exam.objects.get(pk=pk)
+            exam = Exam.objects.select_related('teacher').annotate(
+                total_students=Count('invited_students', distinct=True)
+            ).get(pk=pk)
         except Exam.DoesNotExist:
             return self.error_response(message="آزمون یافت نشد", status_code=status.HTTP_404_NOT_FOUND)
 
@@ -373,56 +414,16 @@ class ExamResultsView(BaseAPIView):
                 return self.error_response(message="شما به این آزمون دسترسی ندارید",
                                            status_code=status.HTTP_403_FORBIDDEN)
 
-        # دریافت تمام تلاش‌های دانش‌آموزان این آزمون
-        attempts = ExamAttempt.objects.filter(exam=exam).select_related('student').order_by('-score', '-end_time')
-
-        results = []
-        for attempt in attempts:
-            max_score = attempt.total_questions * 10
-            percentage = (attempt.score / max_score * 100) if max_score > 0 else 0
-
-            results.append({
-                'attempt_id': attempt.id,
-                'student': {
-                    'id': attempt.student.id,
-                    'name': f"{attempt.student.first_name} {attempt.student.last_name}",
-                    'mobile': attempt.student.mobile,
-                    'grade': attempt.student.grade.name if attempt.student.grade else None
-                },
-                'score': attempt.score,
-                'max_score': max_score,
-                'percentage': round(percentage, 2),
-                'correct_count': attempt.total_correct,
-                'wrong_count': attempt.total_questions - attempt.total_correct,
-                'total_questions': attempt.total_questions,
-                'status': attempt.status,
-                'start_time': attempt.start_time,
-                'end_time': attempt.end_time,
-                'passed': percentage >= 60
-            })
+        if self._wants_csv(request):
+            response = StreamingHttpResponse(exam_results.iter_results_csv(exam), content_type='text/csv; charset=utf-8')
+            response['Content-Disposition'] = f'attachment; filename="exam_{exam.id}_results.csv"'
+            return response
 
-        # آمار کلی آزمون
-        total_students = exam.invited_students.count()
-        completed_count = attempts.filter(status='completed').count()
-        in_progress_count = attempts.filter(status='in_progress').count()
-
-        if completed_count > 0:
-            avg_score = sum(r['score'] for r in results if r['status'] == 'completed') / completed_count
-            avg_percentage = sum(r['percentage'] for r in results if r['status'] == 'completed') / completed_count
-        else:
-            avg_score = 0
-            avg_percentage = 0
-
-        stats = {
-            'total_students': total_students,
-            'completed_count': completed_count,
-            'in_progress_count': in_progress_count,
-            'not_started_count': total_students - completed_count - in_progress_count,
-            'avg_score': round(avg_score, 2),
-            'avg_percentage': round(avg_percentage, 2),
-            'pass_count': sum(1 for r in results if r['passed'] and r['status'] == 'completed'),
-            'fail_count': sum(1 for r in results if not r['passed'] and r['status'] == 'completed')
-        }
+        try:
+            page_size = keyset.parse_page_size(request.query_params.get('page_size'))
+            page = exam_results.get_results_page(exam, request.query_params.get('cursor'), page_size)
+        except ValueError:
+            return self.error_response(message="پارامترهای صفحه‌بندی نامعتبر است")
 
         exam_data = {
             'id': exam.id,
@@ -440,8 +441,33 @@ class ExamResultsView(BaseAPIView):
 
         return self.success_response(data={
             'exam': exam_data,
-            'stats': stats,
-            'results': results
+            'stats': stats_summary(get_exam_statistics(exam.id), exam.total_students),
+            'results': page['results'],
+            'next_cursor': page['next_cursor'],
+            'page_size': page['page_size']
+        })
+
+
+class ExamItemAnalysisView(BaseAPIView):
+    """تحلیل سوالات آزمون: ضریب دشواری، ضریب تمیز، گزینه‌ها و KR-20 (فقط معلم)"""
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        try:
+            exam = Exam.objects.select_related('teacher').get(pk=pk)
+        except Exam.DoesNotExist:
+            return self.error_response(message="آزمون یافت نشد", status_code=status.HTTP_404_NOT_FOUND)
+
+        # بررسی دسترسی (فقط معلم صاحب آزمون یا ادمین)
+        if not hasattr(request.user, 'teacher_profile') or exam.teacher != request.user.teacher_profile:
+            if not request.user.is_superuser:
+                return self.error_response(message="شما به این آزمون دسترسی ندارید",
+                                           status_code=status.HTTP_403_FORBIDDEN)
+
+        return self.success_response(data={
+            'exam_id': exam.id,
+            **get_item_analysis(exam)
         })
 
 
@@ -475,26 +501,24 @@ class ExamStudentResultDetailView(BaseAPIView):
                                        status_code=status.HTTP_404_NOT_FOUND)
 
         # دریافت پاسخ‌ها
-        answers = StudentAnswer.objects.filter(attempt=attempt).select_related('question', 'selected_option')
-
         questions_data = []
-        for answer in answers:
-            correct_option = answer.question.options.filter(is_correct=True).first()
+        for answer in load_answer_sheet(attempt):
+            question, selected_option, correct_option = answer['question'], answer['selected_option'], answer['correct_option']
             questions_data.append({
-                'id': answer.question.id,
-                'text': answer.question.text,
-                'difficulty': answer.question.difficulty,
+                'id': question.id,
+                'text': question.text,
+                'difficulty': question.difficulty,
                 'selected_option': {
-                    'id': answer.selected_option.id if answer.selected_option else None,
-                    'text': answer.selected_option.text if answer.selected_option else None,
-                    'is_correct': answer.is_correct
-                } if answer.selected_option else None,
-                'is_correct': answer.is_correct,
+                    'id': selected_option.id,
+                    'text': selected_option.text,
+                    'is_correct': answer['is_correct']
+                } if selected_option else None,
+                'is_correct': answer['is_correct'],
                 'correct_option': {
-                    'id': correct_option.id if correct_option else None,
-                    'text': correct_option.text if correct_option else None
+                    'id': correct_option.id,
+                    'text': correct_option.text
                 } if correct_option else None,
-                'explanation': answer.question.explanation
+                'explanation': question.explanation
             })
 
         max_score = attempt.total_questions * 10
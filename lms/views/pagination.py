@@ -0,0 +1,35 @@
+# lms/views/pagination.py
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+from ..services import keyset
+
+
+class KeysetPagination(BasePagination):
+    """
+    صفحه‌بندی cursor برای لیست‌های LMS (بدون COUNT و OFFSET)
+
+    ترتیب از keyset_ordering ویو خوانده می‌شود. پاسخ:
+    {'results': [...], 'next_cursor': '...' یا None, 'page_size': 50}
+    """
+    ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = getattr(view, 'keyset_ordering', self.ordering)
+        try:
+            self.page_size = keyset.parse_page_size(request.query_params.get(self.page_size_query_param))
+            page, self.next_cursor = keyset.get_page(
+                queryset, ordering, request.query_params.get(self.cursor_query_param), self.page_size
+            )
+        except ValueError:
+            raise ParseError("پارامترهای صفحه‌بندی نامعتبر است")
+        return page
+
+    def get_page_data(self, data):
+        return {'results': data, 'next_cursor': self.next_cursor, 'page_size': self.page_size}
+
+    def get_paginated_response(self, data):
+        return Response(self.get_page_data(data))
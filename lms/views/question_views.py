@@ -1,5 +1,9 @@
+import csv
+
 from rest_framework import generics, status
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
 from django.db.models import Q
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
@@ -10,14 +14,32 @@ from ..serializers import (
     QuestionCreateSerializer,
     QuestionUpdateSerializer,
 )
+from ..services import answer_buffer, question_counters, question_import
+from ..services.question_search import search_questions
+from ..services.question_pool import invalidate_teacher_pool
+from ..services.taxonomy import invalidate_taxonomy
 from .base import BaseAPIView
+from .pagination import KeysetPagination
+
+
+class QuestionSearchPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
 
 
 class QuestionListView(generics.ListAPIView):
     authentication_classes = [JWTAuthentication]  # اضافه شد
     permission_classes = [IsAuthenticated]
     serializer_class = QuestionListSerializer
+    keyset_ordering = ('-created_at', '-id')
 
+    @property
+    def pagination_class(self):
+        # نتایج جستجو به ترتیب رتبه هستند و keyset روی آن‌ها ممکن نیست
+        if self.request.query_params.get('search'):
+            return QuestionSearchPagination
+        return KeysetPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -27,7 +49,7 @@ class QuestionListView(generics.ListAPIView):
             return Question.objects.none()
 
         teacher = user.teacher_profile
-        queryset = Question.objects.filter(teacher=teacher, is_active=True)
+        queryset = Question.objects.filter(teacher=teacher, is_active=True).select_related('grade', 'subject')
 
         # فیلتر بر اساس پایه
         grade_id = self.request.query_params.get('grade_id')
@@ -49,6 +71,11 @@ class QuestionListView(generics.ListAPIView):
         if difficulty:
             queryset = queryset.filter(difficulty=difficulty)
 
+        # جستجو در متن و توضیح سوال (به ترتیب رتبه)
+        search = self.request.query_params.get('search')
+        if search:
+            queryset = search_questions(queryset, search)
+
         return queryset
 
 
@@ -79,7 +106,11 @@ class QuestionCreateView(BaseAPIView):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
 
-        question = serializer.save()
+        with transaction.atomic():
+            question = serializer.save()
+            question_counters.record_question_change(None, question_counters.question_state(question))
+        invalidate_teacher_pool(question.teacher_id)
+        invalidate_taxonomy()
         response_serializer = QuestionSerializer(question)
 
         return self.success_response(
@@ -89,13 +120,56 @@ class QuestionCreateView(BaseAPIView):
         )
 
 
+class QuestionImportView(BaseAPIView):
+    """ورود دسته‌ای سوالات از فایل CSV یا JSON-lines (فقط معلم)"""
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not hasattr(request.user, 'teacher_profile'):
+            return self.error_response(
+                message="فقط معلمان می‌توانند سوال ایجاد کنند",
+                status_code=status.HTTP_403_FORBIDDEN
+            )
+
+        upload = request.FILES.get('file')
+        if not upload:
+            return self.error_response(message="فایل سوالات ارسال نشده است")
+
+        fmt = request.data.get('format') or question_import.detect_format(upload.name)
+        if fmt not in question_import.FORMATS:
+            return self.error_response(message="فرمت فایل باید csv یا jsonl باشد")
+
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true')
+        try:
+            report = question_import.import_questions(
+                request.user.teacher_profile,
+                question_import.iter_rows(question_import.open_text(upload.file), fmt),
+                dry_run=dry_run,
+                max_rows=question_import.MAX_UPLOAD_ROWS,
+            )
+        except (UnicodeDecodeError, csv.Error):
+            return self.error_response(message="فایل قابل خواندن نیست (کدگذاری باید UTF-8 باشد)")
+
+        if report['failed'] and not report['created']:
+            return self.error_response(message="هیچ سوال معتبری در فایل یافت نشد", errors=report)
+
+        return self.success_response(
+            data=report,
+            message=f"{report['created']} سوال معتبر است" if dry_run else f"{report['created']} سوال وارد شد",
+            status_code=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED
+        )
+
+
 class QuestionDetailView(BaseAPIView):
     authentication_classes = [JWTAuthentication]  # اضافه شد
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
         try:
-            question = Question.objects.get(pk=pk, is_active=True)
+            question = Question.objects.select_related('teacher', 'grade', 'subject', 'chapter').prefetch_related(
+                'options'
+            ).get(pk=pk, is_active=True)
         except Question.DoesNotExist:
             return self.error_response(message="سوال یافت نشد", status_code=status.HTTP_404_NOT_FOUND)
 
@@ -130,7 +204,14 @@ class QuestionUpdateView(BaseAPIView):
         if not serializer.is_valid():
             return self.error_response(errors=serializer.errors)
 
-        question = serializer.save()
+        with transaction.atomic():
+            # قفل ردیف سوال تا وضعیت قبلی برای شمارنده‌ها با ویرایش همزمان عوض نشود
+            before = question_counters.question_state(Question.objects.select_for_update().get(pk=question.pk))
+            question = serializer.save()
+            question_counters.record_question_change(before, question_counters.question_state(question))
+        invalidate_teacher_pool(question.teacher_id)
+        invalidate_taxonomy()
+        answer_buffer.forget_question(question.id)
         response_serializer = QuestionSerializer(question)
 
         return self.success_response(
@@ -153,7 +234,12 @@ class QuestionDeleteView(BaseAPIView):
         if not hasattr(request.user, 'teacher_profile') or question.teacher != request.user.teacher_profile:
             return self.error_response(message="شما به این سوال دسترسی ندارید", status_code=status.HTTP_403_FORBIDDEN)
 
-        question.is_active = False
-        question.save()
+        with transaction.atomic():
+            before = question_counters.question_state(Question.objects.select_for_update().get(pk=question.pk))
+            question.is_active = False
+            question.save()
+            question_counters.record_question_change(before, None)
+        invalidate_teacher_pool(question.teacher_id)
+        invalidate_taxonomy()
 
         return self.success_response(message="سوال با موفقیت حذف شد")
\ No newline at end of file
@@ -4,11 +4,21 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.utils import timezone
-from django.db import transaction
-from django.core.cache import cache
+from django.db import transaction, IntegrityError
 from ..models import Exam, Student, ExamAttempt, StudentAnswer, Question, QuestionOption, ExamQuestionSelection, Grade, \
     Subject
-from ..serializers import ExamSerializer
+from ..serializers import SubmitAnswersBatchSerializer
+from ..services import answer_buffer
+from ..services.batch_answers import STATUS_SAVED, submit_answers
+from ..services import compact_answers
+from ..services import question_counters
+from ..services.dashboard import get_student_dashboard, invalidate_student_dashboard
+from ..services.exam_statistics import record_attempt_completed, record_attempt_started
+from ..services.paper_generation import build_selection_rows, load_attempt_paper
+from ..services.scoring import add_correct_answer
+from ..services.seeded_selection import get_pool_snapshot, new_seed, seeded_question_ids
+from ..services.question_payload import get_payloads_for_questions, get_question_payloads, option_ids, render_question
+from ..services.question_pool import get_question_pool, sample_question_ids
 from .base import BaseAPIView
 import random
 
@@ -52,86 +62,8 @@ class StudentDashboardView(BaseAPIView):
                 status_code=status.HTTP_403_FORBIDDEN
             )
 
-        now = timezone.now()
-
-        # دریافت تمام آزمون‌هایی که دانش‌آموز به آنها دعوت شده
-        all_invited_exams = student.invited_exams.filter(is_published=True)
-
-        # دریافت ID آزمون‌های تکمیل شده با جزئیات نمره
-        completed_attempts = ExamAttempt.objects.filter(
-            student=student,
-            status='completed'
-        ).select_related('exam')
-
-        completed_exam_ids = [attempt.exam_id for attempt in completed_attempts]
-
-        # دسته‌بندی آزمون‌ها
-        available_exams = []  # آزمون‌های قابل شرکت (زمانش رسیده و کامل نشده)
-        waiting_exams = []  # آزمون‌هایی که هنوز شروع نشده
-        expired_exams = []  # آزمون‌هایی که زمانشان تمام شده
-        completed_exams_data = []  # آزمون‌هایی که تکمیل شده با نمره
-
-        for exam in all_invited_exams:
-            exam_data = {
-                'id': exam.id,
-                'title': exam.title,
-                'description': exam.description,
-                'duration_minutes': exam.duration_minutes,
-                'total_questions_count': exam.total_questions_count,
-                'allowed_entry_start': exam.allowed_entry_start,
-                'allowed_entry_end': exam.allowed_entry_end,
-                'created_at': exam.created_at,
-            }
-
-            # بررسی تکمیل شده
-            if exam.id in completed_exam_ids:
-                attempt = next((a for a in completed_attempts if a.exam_id == exam.id), None)
-                if attempt:
-                    max_score = attempt.total_questions * 10
-                    percentage = (attempt.score / max_score * 100) if max_score > 0 else 0
-                    completed_exams_data.append({
-                        **exam_data,
-                        'attempt_id': attempt.id,
-                        'score': attempt.score,
-                        'max_score': max_score,
-                        'percentage': round(percentage, 2),
-                        'correct_count': attempt.total_correct,
-                        'wrong_count': attempt.total_questions - attempt.total_correct,
-                        'completed_at': attempt.end_time
-                    })
-            # بررسی زمان
-            elif now < exam.allowed_entry_start:
-                waiting_exams.append(exam_data)
-            elif now > exam.allowed_entry_end:
-                expired_exams.append(exam_data)
-            else:
-                available_exams.append(exam_data)
-
-        # سریالایزر برای آزمون‌های فعال
-        serializer = ExamSerializer(available_exams, many=True)
-
         return self.success_response(
-            data={
-                "student": {
-                    "id": student.id,
-                    "name": f"{student.first_name} {student.last_name}",
-                    "first_name": student.first_name,
-                    "last_name": student.last_name,
-                    "mobile": student.mobile,
-                },
-                "available_exams": serializer.data,
-                "waiting_exams": waiting_exams,
-                "expired_exams": expired_exams,
-                "completed_exams": completed_exams_data,
-                # آمار کلی
-                "stats": {
-                    "total": all_invited_exams.count(),
-                    "available": len(available_exams),
-                    "waiting": len(waiting_exams),
-                    "expired": len(expired_exams),
-                    "completed": len(completed_exams_data)
-                }
-            },
+            data=get_student_dashboard(student),
             message="اطلاعات با موفقیت دریافت شد"
         )
 
@@ -208,84 +140,37 @@ class StartQuizView(BaseAPIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
-    def _get_lock_key(self, student_id, exam_id):
-        return f"exam_start_lock_{student_id}_{exam_id}"
+    def _lock_invitation(self, exam, student):
+        """قفل سطری روی دعوت (student, exam)؛ اگر دانش‌آموز دعوت نشده باشد False"""
+        invitation = Exam.invited_students.through.objects.select_for_update().filter(
+            exam_id=exam.id, student_id=student.id
+        )
+        return invitation.exists()
 
     def _select_questions(self, exam, student):
-        """انتخاب سوالات بر اساس شرایط آزمون"""
-        print(f"\n=== Selecting Questions ===")
-        print(f"Exam Grade: {exam.grade_id}, Subject: {exam.subject_id}, Chapter: {exam.chapter_id}")
-        print(f"Student Grade: {student.grade_id}")
-
-        # ساخت query پایه - سوالات معلم که فعال هستند
-        questions = Question.objects.filter(
-            teacher=exam.teacher,
-            is_active=True
+        """انتخاب سوالات بر اساس شرایط آزمون (از روی ایندکس کش شده بانک سوالات)"""
+        # فیلتر بر اساس پایه (از exam یا student)، درس و فصل
+        target_grade_id = exam.grade_id or student.grade_id
+        pool = get_question_pool(
+            exam.teacher_id,
+            grade_id=target_grade_id,
+            subject_id=exam.subject_id,
+            chapter_id=exam.chapter_id
         )
 
-        print(f"Total teacher questions: {questions.count()}")
-
-        # فیلتر بر اساس پایه (از exam یا student)
-        target_grade = exam.grade or student.grade
-        if target_grade:
-            questions = questions.filter(grade=target_grade)
-            print(f"After grade filter ({target_grade.name}): {questions.count()}")
-
-        # فیلتر بر اساس درس (از exam)
-        if exam.subject:
-            questions = questions.filter(subject=exam.subject)
-            print(f"After subject filter ({exam.subject.name}): {questions.count()}")
-
-        # فیلتر بر اساس فصل (اگر انتخاب شده باشد)
-        if exam.chapter:
-            questions = questions.filter(chapter=exam.chapter)
-            print(f"After chapter filter ({exam.chapter.name}): {questions.count()}")
-
-        if questions.count() == 0:
-            print("No questions found!")
+        if not any(pool.values()):
             return []
 
-        # دریافت توزیع سوالات
-        distribution = exam.get_question_distribution()
-        print(
-            f"Distribution: easy={distribution['easy']}, medium={distribution['medium']}, hard={distribution['hard']}")
-
-        selected_questions = []
-        used_ids = set()
-
-        # انتخاب سوالات بر اساس درجه سختی
-        for difficulty, needed in distribution.items():
-            if needed <= 0:
-                continue
-
-            available = list(questions.filter(difficulty=difficulty).exclude(id__in=used_ids))
-            print(f"{difficulty}: available={len(available)}, needed={needed}")
-
-            if len(available) >= needed:
-                selected = random.sample(available, needed)
-                selected_questions.extend(selected)
-                used_ids.update([q.id for q in selected])
-            else:
-                selected_questions.extend(available)
-                used_ids.update([q.id for q in available])
-
-        # اگر به تعداد کافی سوال نداریم، از بقیه سوالات پر کن
-        if len(selected_questions) < exam.total_questions_count:
-            remaining = exam.total_questions_count - len(selected_questions)
-            other_questions = list(questions.exclude(id__in=used_ids))
-            if other_questions:
-                extra = random.sample(other_questions, min(remaining, len(other_questions)))
-                selected_questions.extend(extra)
-                print(f"Added {len(extra)} extra questions from other difficulties")
-
-        # رندوم کردن ترتیب
-        if exam.randomize_questions:
-            random.shuffle(selected_questions)
-
-        final = selected_questions[:exam.total_questions_count]
-        print(f"Final selected: {len(final)} questions")
+        selected_ids = sample_question_ids(
+            pool,
+            exam.get_question_distribution(),
+            exam.total_questions_count,
+            shuffle=exam.randomize_questions
+        )
 
-        return final
+        # فقط سوالات انتخاب شده از دیتابیس خوانده می‌شوند
+        questions = Question.objects.filter(is_active=True).in_bulk(selected_ids)
+        return [questions[qid] for qid in selected_ids if qid in questions]
 
     @transaction.atomic
     def post(self, request):
@@ -308,49 +193,60 @@ class StartQuizView(BaseAPIView):
 
         student = user.student_profile
 
-        # قفل برای جلوگیری از درخواست همزمان
-        lock_key = self._get_lock_key(student.id, exam_id)
-        if cache.get(lock_key):
-            print("Another request is processing, waiting...")
-            import time
-            time.sleep(1)
-            existing = ExamAttempt.objects.filter(
-                student=student, exam_id=exam_id, status='in_progress'
-            ).first()
-            if existing:
-                return self._continue_exam(existing)
+        # پیدا کردن آزمون
+        try:
+            exam = Exam.objects.get(id=exam_id, is_published=True)
+        except Exam.DoesNotExist:
+            return self.error_response(message="آزمون یافت نشد")
 
-        cache.set(lock_key, True, timeout=10)
+        # بررسی دعوت شدن و قفل ردیف دعوت تا پایان تراکنش؛ درخواست‌های همزمان همین دانش‌آموز
+        # برای این آزمون پشت قفل منتظر می‌مانند و سپس همان تلاش ساخته شده را دریافت می‌کنند
+        if not self._lock_invitation(exam, student):
+            return self.error_response(message="شما به این آزمون دعوت نشده‌اید")
 
-        try:
-            # پیدا کردن آزمون
-            try:
-                exam = Exam.objects.get(id=exam_id, is_published=True)
-            except Exam.DoesNotExist:
-                return self.error_response(message="آزمون یافت نشد")
-
-            # بررسی دعوت شدن
-            if not exam.invited_students.filter(id=student.id).exists():
-                return self.error_response(message="شما به این آزمون دعوت نشده‌اید")
-
-            # بررسی زمان
-            now = timezone.now()
-            if now < exam.allowed_entry_start:
-                return self.error_response(message="زمان شروع آزمون فرا نرسیده است")
-            if now > exam.allowed_entry_end:
-                return self.error_response(message="زمان مجاز شرکت در آزمون به پایان رسیده است")
-
-            # بررسی تکمیل شده
-            if ExamAttempt.objects.filter(student=student, exam=exam, status='completed').exists():
-                return self.error_response(message="شما قبلاً در این آزمون شرکت کرده‌اید")
-
-            # بررسی در حال انجام
-            in_progress = ExamAttempt.objects.filter(
-                student=student, exam=exam, status='in_progress'
-            ).first()
-
-            if in_progress:
-                return self._continue_exam(in_progress)
+        # بررسی زمان
+        now = timezone.now()
+        if now < exam.allowed_entry_start:
+            return self.error_response(message="زمان شروع آزمون فرا نرسیده است")
+        if now > exam.allowed_entry_end:
+            return self.error_response(message="زمان مجاز شرکت در آزمون به پایان رسیده است")
+
+        # بررسی تکمیل شده (یا پایان یافته به دلیل اتمام زمان)
+        if ExamAttempt.objects.filter(student=student, exam=exam, status__in=['completed', 'timeout']).exists():
+            return self.error_response(message="شما قبلاً در این آزمون شرکت کرده‌اید")
+
+        # بررسی در حال انجام
+        in_progress = ExamAttempt.objects.filter(
+            student=student, exam=exam, status='in_progress'
+        ).select_related('exam', 'pool_snapshot').first()
+
+        if in_progress:
+            return self._continue_exam(in_progress)
+
+        if exam.selection_mode == 'seeded':
+            return self._start_seeded(exam, student)
+
+        # سوالات از پیش ساخته شده هنگام انتشار آزمون
+        selections = list(
+            ExamQuestionSelection.objects.filter(exam=exam, student=student)
+            .order_by('order')
+            .values_list('question_id', 'option_order', 'question__updated_at')
+        )
+
+        if selections:
+            payloads = get_question_payloads({qid: updated_at for qid, _, updated_at in selections})
+            question_ids = [qid for qid, _, _ in selections if qid in payloads]
+            option_orders = {qid: option_order for qid, option_order, _ in selections}
+        else:
+            # اگر طبق شمارنده‌ها معلم اصلاً سوال کافی ندارد، بدون ساخت ایندکس بانک سوالات رد می‌شود
+            available = question_counters.available_question_bound(
+                exam.teacher_id, subject_id=exam.subject_id, chapter_id=exam.chapter_id
+            )
+            if available < exam.total_questions_count:
+                return self.error_response(
+                    message=f"تعداد سوالات موجود ({available}) کمتر از تعداد مورد نیاز ({exam.total_questions_count}) است",
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
 
             # انتخاب سوالات
             selected_questions = self._select_questions(exam, student)
@@ -361,101 +257,107 @@ class StartQuizView(BaseAPIView):
                     status_code=status.HTTP_400_BAD_REQUEST
                 )
 
-            # ایجاد تلاش جدید
-            attempt = ExamAttempt.objects.create(
-                student=student,
-                exam=exam,
-                total_questions=len(selected_questions),
-                status='in_progress'
-            )
+            # داده سوالات و گزینه‌ها از کش (سوالات جدید با یک کوئری)
+            payloads = get_payloads_for_questions(selected_questions)
+            question_ids = [q.id for q in selected_questions]
+            option_orders = {qid: option_ids(payloads[qid]) for qid in question_ids}
 
-            # ذخیره سوالات
-            for idx, q in enumerate(selected_questions):
-                ExamQuestionSelection.objects.create(
-                    exam=exam,
-                    student=student,
-                    question=q,
-                    order=idx + 1
-                )
+            # ذخیره سوالات به صورت دسته‌ای
+            rows = build_selection_rows(exam, student.id, question_ids, option_orders)
+            ExamQuestionSelection.objects.bulk_create(rows)
+            option_orders = {row.question_id: row.option_order for row in rows}
 
-            # آماده‌سازی پاسخ
-            questions_data = []
-            for q in selected_questions:
-                options = list(q.options.all())
-                if exam.randomize_options:
-                    random.shuffle(options)
-
-                questions_data.append({
-                    'id': q.id,
-                    'text': q.text,
-                    'estimated_time': q.estimated_time,
-                    'image_url': q.image.url if q.image else None,
-                    'options': [
-                        {
-                            'id': opt.id,
-                            'text': opt.text,
-                            'image_url': opt.image.url if opt.image else None,
-                            'order': idx + 1
-                        }
-                        for idx, opt in enumerate(options)
-                    ]
-                })
-
-            return self.success_response(
-                data={
-                    'attempt_id': attempt.id,
-                    'exam_title': exam.title,
-                    'duration_minutes': exam.duration_minutes,
-                    'total_questions': len(selected_questions),
-                    'questions': questions_data
-                },
-                message="آزمون شروع شد"
+        # ایجاد تلاش جدید
+        attempt = ExamAttempt.objects.create(
+            student=student,
+            exam=exam,
+            total_questions=len(question_ids),
+            status='in_progress'
+        )
+        record_attempt_started(exam.id)
+
+        # آماده‌سازی پاسخ
+        questions_data = [
+            render_question(payloads[qid], option_orders.get(qid))
+            for qid in question_ids
+        ]
+
+        return self.success_response(
+            data={
+                'attempt_id': attempt.id,
+                'exam_title': exam.title,
+                'duration_minutes': exam.duration_minutes,
+                'total_questions': len(questions_data),
+                'questions': questions_data
+            },
+            message="آزمون شروع شد"
+        )
+
+    def _start_seeded(self, exam, student):
+        """شروع آزمون در حالت seeded (فقط seed و نسخه بانک سوالات ذخیره می‌شود)"""
+        snapshot = get_pool_snapshot(exam, student.grade_id)
+        seed = new_seed()
+        question_ids = seeded_question_ids(exam, snapshot, seed)
+
+        if len(question_ids) < exam.total_questions_count:
+            return self.error_response(
+                message=f"تعداد سوالات موجود ({len(question_ids)}) کمتر از تعداد مورد نیاز ({exam.total_questions_count}) است",
+                status_code=status.HTTP_400_BAD_REQUEST
             )
 
-        finally:
-            cache.delete(lock_key)
+        attempt = ExamAttempt.objects.create(
+            student=student,
+            exam=exam,
+            total_questions=len(question_ids),
+            status='in_progress',
+            selection_seed=seed,
+            pool_snapshot=snapshot
+        )
+        record_attempt_started(exam.id)
+
+        questions_data = [
+            render_question(payload, option_order)
+            for payload, option_order in load_attempt_paper(attempt)
+        ]
+
+        return self.success_response(
+            data={
+                'attempt_id': attempt.id,
+                'exam_title': exam.title,
+                'duration_minutes': exam.duration_minutes,
+                'total_questions': len(questions_data),
+                'questions': questions_data
+            },
+            message="آزمون شروع شد"
+        )
 
     def _continue_exam(self, attempt):
         """ادامه آزمون نیمه‌کاره"""
         print(f"\n=== Continuing exam attempt {attempt.id} ===")
 
         exam = attempt.exam
-        student = attempt.student
 
-        selections = ExamQuestionSelection.objects.filter(
-            exam=exam,
-            student=student
-        ).order_by('order')
+        # سوالات، گزینه‌ها و ترتیب ذخیره شده (با تعداد کوئری ثابت)
+        paper = load_attempt_paper(attempt)
 
-        # پیدا کردن سوالات پاسخ داده شده
-        answered_q_ids = StudentAnswer.objects.filter(
-            attempt=attempt
-        ).values_list('question_id', flat=True)
+        # پیدا کردن سوالات پاسخ داده شده (دیتابیس + بافر پاسخ‌ها)
+        answered_q_ids = set(
+            StudentAnswer.objects.filter(attempt=attempt).values_list('question_id', flat=True)
+        )
+        if answer_buffer.is_enabled():
+            answered_q_ids |= answer_buffer.buffered_question_ids(attempt.id, [p['id'] for p, _ in paper])
 
         questions_data = []
-        for selection in selections:
-            q = selection.question
-            is_answered = q.id in answered_q_ids
+        for payload, option_order in paper:
+            is_answered = payload['id'] in answered_q_ids
 
-            options = list(q.options.all())
-            if exam.randomize_options and not is_answered:
-                random.shuffle(options)
+            if not option_order and exam.randomize_options and not is_answered:
+                option_order = option_ids(payload)
+                random.shuffle(option_order)
 
             questions_data.append({
-                'id': q.id,
-                'text': q.text,
-                'estimated_time': q.estimated_time,
-                'image_url': q.image.url if q.image else None,
+                **render_question(payload, option_order),
                 'is_answered': is_answered,
-                'options': [
-                    {
-                        'id': opt.id,
-                        'text': opt.text,
-                        'image_url': opt.image.url if opt.image else None,
-                        'order': idx + 1
-                    }
-                    for idx, opt in enumerate(options)
-                ]
             })
 
         return self.success_response(
@@ -490,6 +392,9 @@ class SubmitQuizAnswerView(BaseAPIView):
 
         student = user.student_profile
 
+        if answer_buffer.is_enabled():
+            return self._submit_buffered(student, attempt_id, question_id, option_id)
+
         try:
             attempt = ExamAttempt.objects.get(id=attempt_id, student=student, status='in_progress')
             question = Question.objects.get(id=question_id)
@@ -497,23 +402,23 @@ class SubmitQuizAnswerView(BaseAPIView):
         except (ExamAttempt.DoesNotExist, Question.DoesNotExist, QuestionOption.DoesNotExist):
             return self.error_response(message="اطلاعات نامعتبر")
 
-        if StudentAnswer.objects.filter(attempt=attempt, question=question).exists():
-            return self.error_response(message="پاسخ این سوال قبلاً ثبت شده است")
-
         is_correct = option.is_correct
         points_earned = 10 if is_correct else 0
 
-        StudentAnswer.objects.create(
-            attempt=attempt,
-            question=question,
-            selected_option=option,
-            is_correct=is_correct
-        )
+        # محدودیت یکتایی (attempt, question) از ثبت پاسخ تکراری جلوگیری می‌کند
+        try:
+            with transaction.atomic():
+                StudentAnswer.objects.create(
+                    attempt=attempt,
+                    question=question,
+                    selected_option=option,
+                    is_correct=is_correct
+                )
+        except IntegrityError:
+            return self.error_response(message="پاسخ این سوال قبلاً ثبت شده است")
 
         if is_correct:
-            attempt.score += points_earned
-            attempt.total_correct += 1
-            attempt.save()
+            add_correct_answer(attempt.id, points_earned)
 
         return self.success_response(
             data={
@@ -524,6 +429,67 @@ class SubmitQuizAnswerView(BaseAPIView):
             message="پاسخ ثبت شد"
         )
 
+    def _submit_buffered(self, student, attempt_id, question_id, option_id):
+        """ثبت پاسخ در بافر (بدون نوشتن در دیتابیس)"""
+        try:
+            attempt_id, question_id, option_id = int(attempt_id), int(question_id), int(option_id)
+        except (TypeError, ValueError):
+            return self.error_response(message="اطلاعات نامعتبر")
+
+        attempt_context = answer_buffer.get_attempt_context(attempt_id)
+        answer_key = answer_buffer.get_question_answer_key(question_id)
+        if (not attempt_context or attempt_context['student_id'] != student.id
+                or not answer_key or option_id not in answer_key['options']):
+            return self.error_response(message="اطلاعات نامعتبر")
+
+        is_correct = answer_key['options'][option_id]
+        if not answer_buffer.record_answer(attempt_id, question_id, option_id, is_correct):
+            return self.error_response(message="پاسخ این سوال قبلاً ثبت شده است")
+
+        return self.success_response(
+            data={
+                'is_correct': is_correct,
+                'points_earned': 10 if is_correct else 0,
+                'explanation': answer_key['explanation'] if attempt_context['show_answer_key'] else None
+            },
+            message="پاسخ ثبت شد"
+        )
+
+
+class SubmitQuizAnswersBatchView(BaseAPIView):
+    """ثبت دسته‌ای پاسخ‌ها (برای پاسخ‌هایی که در دستگاه دانش‌آموز صف شده‌اند)"""
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @transaction.atomic
+    def post(self, request):
+        user = request.user
+        if not hasattr(user, 'student_profile'):
+            return self.error_response(message="شما دسترسی لازم را ندارید")
+
+        serializer = SubmitAnswersBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return self.error_response(errors=serializer.errors)
+
+        data = serializer.validated_data
+        try:
+            attempt = ExamAttempt.objects.select_related('exam', 'pool_snapshot').get(
+                id=data['attempt_id'], student=user.student_profile, status='in_progress'
+            )
+        except ExamAttempt.DoesNotExist:
+            return self.error_response(message="تلاش یافت نشد یا قبلاً پایان یافته است")
+
+        results = submit_answers(attempt, data['answers'])
+
+        return self.success_response(
+            data={
+                'attempt_id': attempt.id,
+                'saved_count': sum(1 for result in results if result['status'] == STATUS_SAVED),
+                'results': results
+            },
+            message="پاسخ‌ها ثبت شد"
+        )
+
 
 class FinishQuizView(BaseAPIView):
     """پایان آزمون"""
@@ -544,13 +510,23 @@ class FinishQuizView(BaseAPIView):
         student = user.student_profile
 
         try:
-            attempt = ExamAttempt.objects.get(id=attempt_id, student=student, status='in_progress')
+            attempt = ExamAttempt.objects.select_for_update().get(id=attempt_id, student=student, status='in_progress')
         except ExamAttempt.DoesNotExist:
             return self.error_response(message="تلاش یافت نشد یا قبلاً پایان یافته است")
 
+        # ذخیره پاسخ‌های بافر شده قبل از محاسبه نتیجه
+        if answer_buffer.is_enabled():
+            if answer_buffer.flush_attempt(attempt.id):
+                attempt.refresh_from_db(fields=['score', 'total_correct'])
+            answer_buffer.forget_attempt(attempt.id)
+
         attempt.end_time = timezone.now()
         attempt.status = 'completed'
         attempt.save()
+        if compact_answers.is_enabled():
+            compact_answers.pack_attempt(attempt)
+        record_attempt_completed(attempt)
+        invalidate_student_dashboard(student.id)
 
         max_score = attempt.total_questions * 10
         percentage = (attempt.score / max_score * 100) if max_score > 0 else 0
@@ -588,17 +564,15 @@ class QuizResultView(BaseAPIView):
         except ExamAttempt.DoesNotExist:
             return self.error_response(message="نتیجه‌ای یافت نشد")
 
-        answers = StudentAnswer.objects.filter(attempt=attempt).select_related('question', 'selected_option')
-
         questions_data = []
-        for answer in answers:
-            correct_option = answer.question.options.filter(is_correct=True).first()
+        for answer in compact_answers.load_answer_sheet(attempt):
+            correct_option = answer['correct_option']
             questions_data.append({
-                'question_text': answer.question.text,
-                'selected_option_text': answer.selected_option.text if answer.selected_option else None,
-                'is_correct': answer.is_correct,
+                'question_text': answer['question'].text,
+                'selected_option_text': answer['selected_option'].text if answer['selected_option'] else None,
+                'is_correct': answer['is_correct'],
                 'correct_option_text': correct_option.text if correct_option else None,
-                'explanation': answer.question.explanation
+                'explanation': answer['question'].explanation
             })
 
         max_score = attempt.total_questions * 10
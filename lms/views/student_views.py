@@ -1,17 +1,23 @@
 # lms/views/student_views.py - نسخه ساده بدون ایجاد کاربر
+import csv
+
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.contrib.auth import get_user_model
 from django.db import IntegrityError
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from ..models import Student, Grade
+from ..models import Exam, Student, Grade
 from ..serializers import (
     StudentSerializer,
     StudentListSerializer,
     StudentRegistrationSerializer,
 )
+from ..services import roster_import
+from ..services.exam_statistics import forget_exam_statistics
+from ..services.question_import import open_text
 from .base import BaseAPIView
+from .pagination import KeysetPagination
 
 MyUser = get_user_model()
 
@@ -130,9 +136,62 @@ class StudentProfileView(BaseAPIView):
         )
 
 
+class StudentImportView(BaseAPIView):
+    """ثبت دسته‌ای دانش‌آموزان از فایل CSV و دعوت اختیاری آنها به یک آزمون (فقط معلم)"""
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not hasattr(request.user, 'teacher_profile'):
+            return self.error_response(
+                message="فقط معلمان می‌توانند دانش‌آموز اضافه کنند",
+                status_code=status.HTTP_403_FORBIDDEN
+            )
+        teacher = request.user.teacher_profile
+
+        upload = request.FILES.get('file')
+        if not upload:
+            return self.error_response(message="فایل دانش‌آموزان ارسال نشده است")
+
+        exam = None
+        exam_id = request.data.get('exam_id')
+        if exam_id:
+            exam = Exam.objects.filter(pk=exam_id).first() if str(exam_id).isdigit() else None
+            if exam is None:
+                return self.error_response(message="آزمون یافت نشد", status_code=status.HTTP_404_NOT_FOUND)
+            if exam.teacher_id != teacher.id:
+                return self.error_response(message="شما به این آزمون دسترسی ندارید",
+                                           status_code=status.HTTP_403_FORBIDDEN)
+            if exam.is_published:
+                return self.error_response(message="آزمون منتشر شده قابل ویرایش نیست")
+
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true')
+        try:
+            report = roster_import.import_roster(
+                teacher,
+                roster_import.iter_rows(open_text(upload.file)),
+                exam=exam,
+                dry_run=dry_run,
+                max_rows=roster_import.MAX_UPLOAD_ROWS,
+            )
+        except (UnicodeDecodeError, csv.Error):
+            return self.error_response(message="فایل قابل خواندن نیست (کدگذاری باید UTF-8 باشد)")
+
+        saved = report['created'] + report['updated']
+        if report['failed'] and not saved:
+            return self.error_response(message="هیچ دانش‌آموز معتبری در فایل یافت نشد", errors=report)
+
+        return self.success_response(
+            data=report,
+            message=f"{saved} دانش‌آموز معتبر است" if dry_run else f"{saved} دانش‌آموز ثبت شد",
+            status_code=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED
+        )
+
+
 class StudentListView(BaseAPIView):
     authentication_classes = [JWTAuthentication]  # اضافه شد
     permission_classes = [IsAuthenticated]
+    keyset_ordering = ('-registered_at', '-id')
 
     def get(self, request):
         user = self.request.user
@@ -140,30 +199,27 @@ class StudentListView(BaseAPIView):
 
         # اگر معلم است - فقط دانش‌آموزانی که خودش اضافه کرده را نشان بده
         if hasattr(user, 'teacher_profile'):
-            teacher = user.teacher_profile
-            students = Student.objects.filter(created_by=teacher)
-
+            students = Student.objects.filter(created_by=user.teacher_profile)
             if mobile:
                 students = students.filter(mobile=mobile)
 
-            serializer = StudentListSerializer(students, many=True)
-            return self.success_response(data=serializer.data)
-
         # اگر ادمین است - همه دانش‌آموزان را نشان بده
-        if user.is_superuser:
+        elif user.is_superuser:
             students = Student.objects.all()
             if mobile:
                 students = students.filter(mobile=mobile)
-            serializer = StudentListSerializer(students, many=True)
-            return self.success_response(data=serializer.data)
 
         # اگر خود دانش‌آموز است
-        if hasattr(user, 'student_profile'):
+        elif hasattr(user, 'student_profile'):
             students = Student.objects.filter(id=user.student_profile.id)
-            serializer = StudentListSerializer(students, many=True)
-            return self.success_response(data=serializer.data)
 
-        return self.success_response(data=[])
+        else:
+            students = Student.objects.none()
+
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(students.select_related('grade'), request, view=self)
+        serializer = StudentListSerializer(page, many=True)
+        return self.success_response(data=paginator.get_page_data(serializer.data))
 
 class StudentDetailView(BaseAPIView):
     authentication_classes = [JWTAuthentication]  # اضافه شد
@@ -218,6 +274,8 @@ class StudentDeleteView(BaseAPIView):
                 status_code=status.HTTP_404_NOT_FOUND
             )
 
+        # تلاش‌های دانش‌آموز حذف می‌شوند، پس آمار آزمون‌های مربوط باید دوباره ساخته شود
+        forget_exam_statistics(student.attempts.values_list('exam_id', flat=True))
         student.delete()
 
         return self.success_response(message="دانش‌آموز با موفقیت حذف شد")
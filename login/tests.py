@@ -1,3 +1,55 @@
 from django.test import TestCase
 
-# Create your tests here.
+from asnaf.query_budget import Call, QueryBudgetMixin
+from login.models import MyUser, Follow, Address
+
+
+class LoginQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """endpointهای پروفایل و آدرس با تعداد کوئری ثابت نسبت به تعداد فالوور و آدرس"""
+
+    urls_module = 'login.urls'
+    budgets = {
+        'is-following': 4,
+        'user-details-following': 4,
+        'address-list-create-v1': 1,
+        'address-detail-v1': 1,
+        'profile-info-v1': 2,
+        'edit-profile-user': 0,
+    }
+    exempt = {
+        'send-otp': 'ارسال پیامک OTP به سرویس خارجی',
+        'send-otp-v1': 'ارسال پیامک OTP به سرویس خارجی',
+        'verify-mob': 'بررسی کد OTP یک کاربر',
+        'verify': 'بررسی کد OTP یک کاربر',
+        'verify-name-api': 'ثبت نام یک کاربر',
+        'check-otp-status': 'وضعیت OTP یک کاربر',
+        'check-token': 'اعتبارسنجی توکن (کتابخانه simplejwt)',
+        'check-token-v1': 'اعتبارسنجی توکن (کتابخانه simplejwt)',
+        'token_obtain_pair': 'کتابخانه simplejwt',
+        'token_refresh': 'کتابخانه simplejwt',
+        'set-image-user': 'آپلود تصویر یک کاربر',
+        'logout-v1': 'باطل کردن توکن یک کاربر',
+        'follow': 'ثبت یک فالو (تک ردیفی)',
+        'unfollow': 'حذف یک فالو (تک ردیفی)',
+        'get-info': 'MyUserSerializer فیلد product_count را بدون get_product_count تعریف کرده است',
+    }
+
+    def build_calls(self, size):
+        user = MyUser.objects.create_user(mobile=f'0912{size:07d}', first_name='نام', last_name='خانوادگی')
+        others = MyUser.objects.bulk_create([MyUser(mobile=f'0913{size:03d}{i:04d}') for i in range(size)])
+        Follow.objects.bulk_create([Follow(follower=other, followed=user) for other in others])
+        Follow.objects.bulk_create([Follow(follower=user, followed=other) for other in others])
+        addresses = Address.objects.bulk_create([
+            Address(user=user, receiver_name='گیرنده', address='تهران', postal_code='1234567890',
+                    phone='02100000000', city='تهران', sub_city=f'منطقه {i}')
+            for i in range(size)
+        ])
+
+        return [
+            Call('is-following', {'user_id': others[0].pk}, user=user),
+            Call('user-details-following', {'user_id': others[0].pk}, user=user),
+            Call('address-list-create-v1', user=user),
+            Call('address-detail-v1', {'pk': addresses[0].pk}, user=user),
+            Call('profile-info-v1', user=user),
+            Call('edit-profile-user', user=user),
+        ]
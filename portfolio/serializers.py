@@ -75,10 +75,10 @@ class ProjectListSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Project
-        fields = ['id', 'name_fa', 'name_en', 'description_fa', 'description_en', 'demo_link', 'order']
+        fields = ['id', 'name_fa', 'name_en', 'description_fa', 'description_en', 'demo_link', 'order', 'images']
 
     def get_images(self, obj):
-        first_image = obj.images.first()
+        first_image = next(iter(obj.images.all()), None)
         if first_image and first_image.image:
             request = self.context.get('request')
             return request.build_absolute_uri(first_image.image.url) if request else first_image.image.url
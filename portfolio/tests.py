@@ -1,3 +1,38 @@
 from django.test import TestCase
 
-# Create your tests here.
+from asnaf.query_budget import Call, QueryBudgetMixin
+from .models import Project, ProjectImage, ProjectFeature
+
+
+class PortfolioQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """تصاویر و ویژگی‌های پروژه‌ها باید با prefetch خوانده شوند نه یک کوئری برای هر پروژه"""
+
+    urls_module = 'portfolio.urls'
+    budgets = {
+        'api-root': 0,
+        'project-list': 2,
+        'project-detail': 3,
+        'project-by-language': 3,
+    }
+
+    def build_calls(self, size):
+        projects = Project.objects.bulk_create([
+            Project(name_fa=f'پروژه {i}', name_en=f'Project {i}', description_fa='توضیح',
+                    description_en='Description', order=i)
+            for i in range(size)
+        ])
+        ProjectImage.objects.bulk_create([
+            ProjectImage(project=project, image=f'portfolio/{project.pk}/{order}.jpg', order=order)
+            for project in projects for order in range(2)
+        ])
+        ProjectFeature.objects.bulk_create([
+            ProjectFeature(project=project, title_fa='ویژگی', title_en='Feature', order=order)
+            for project in projects for order in range(2)
+        ])
+
+        return [
+            Call('api-root'),
+            Call('project-list'),
+            Call('project-detail', {'pk': projects[0].pk}),
+            Call('project-by-language', params={'lang': 'en'}),
+        ]
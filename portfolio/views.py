@@ -11,6 +11,12 @@ class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Project.objects.filter(is_active=True)
     permission_classes = [permissions.AllowAny]  # برای مشاهده عمومی
 
+    def get_queryset(self):
+        # تصاویر (و در جزئیات، ویژگی‌ها) با یک کوئری برای همه پروژه‌ها خوانده می‌شوند
+        if self.action == 'list':
+            return self.queryset.prefetch_related('images')
+        return self.queryset.prefetch_related('images', 'features')
+
     def get_serializer_class(self):
         if self.action == 'list':
             return ProjectListSerializer
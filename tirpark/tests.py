@@ -1,3 +1,51 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+
+from asnaf.query_budget import Call, QueryBudgetMixin
+from .models import CustomsProcedure, Driver, LoadType, TruckPlate, ParkingQueue, SyncHistory
+
+MyUser = get_user_model()
+
+
+class TirparkQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """لیست صف با select_related و آمار با تعداد کوئری ثابت"""
+
+    urls_module = 'tirpark.urls'
+    url_namespace = 'tirpark'
+    budgets = {
+        'tirpark:api_list': 2,
+        'tirpark:api_history': 1,
+        'tirpark:api_stats': 2,
+    }
+    exempt = {
+        'tirpark:api_sync': 'درخواست به سرویس خارجی tirpark.ir',
+    }
+
+    def build_calls(self, size):
+        user = MyUser.objects.create_user(mobile=f'0919{size:07d}')
+        procedure = CustomsProcedure.objects.create(code=size, name=f'procedure-{size}', title='ترانزیت')
+        now = timezone.now()
+        queues = []
+        for i in range(size):
+            load_type = LoadType.objects.create(load_id=f'{size}-{i}', title='بار')
+            plate = TruckPlate.objects.create(
+                location_section='11', serial_section='123', letter_section='ع', code_section='45',
+                full_plate=f'{size}-{i}'
+            )
+            driver = Driver.objects.create(full_name=f'راننده {size}-{i}')
+            queues.append(ParkingQueue(
+                id=size * 1000 + i, receipt_number=f'R{i}', customs_procedure=procedure, load_type=load_type,
+                truck_plate=plate, driver=driver, entry_date_time=now - timedelta(hours=i),
+                entry_jdate='1404/01/01', entry_gdate='2025-03-21', load_id=load_type.load_id, load_title='بار'
+            ))
+        ParkingQueue.objects.bulk_create(queues)
+        SyncHistory.objects.bulk_create([SyncHistory(status='success') for _ in range(min(size, 30))])
 
-# Create your tests here.
+        return [
+            Call('tirpark:api_list', user=user, params={'per_page': 100}),
+            Call('tirpark:api_history', user=user),
+            Call('tirpark:api_stats', user=user),
+        ]
@@ -105,22 +105,24 @@ def get_parking_stats(request):
     """
     دریافت آمار پارکینگ
     """
+    from datetime import timedelta
     from django.utils import timezone
 
-    today = timezone.now().date()
-
-    stats = {
-        'total_in_queue': ParkingQueue.objects.filter(status='in').count(),
-        'today_entries': ParkingQueue.objects.filter(entry_date_time__date=today).count(),
-        'today_exits': ParkingQueue.objects.filter(exit_date_time__date=today).count(),
-        'overdue_count': ParkingQueue.objects.filter(status='in').extra(
-            where=["EXTRACT(EPOCH FROM (now() - entry_date_time))/3600 > 24"]
-        ).count(),
-        'by_procedure': list(ParkingQueue.objects.filter(
-            status='in'
-        ).values('customs_procedure__title').annotate(
-            count=Count('id')
-        )),
-    }
+    now = timezone.now()
+    today = now.date()
+
+    # شمارش‌ها با یک کوئری aggregate (به جای یک کوئری برای هر عدد)
+    # شرط تاخیر همان ParkingQueue.is_overdue است و به SQL مخصوص PostgreSQL وابسته نیست
+    stats = ParkingQueue.objects.aggregate(
+        total_in_queue=Count('id', filter=Q(status='in')),
+        today_entries=Count('id', filter=Q(entry_date_time__date=today)),
+        today_exits=Count('id', filter=Q(exit_date_time__date=today)),
+        overdue_count=Count('id', filter=Q(status='in', entry_date_time__lt=now - timedelta(hours=24))),
+    )
+    stats['by_procedure'] = list(ParkingQueue.objects.filter(
+        status='in'
+    ).values('customs_procedure__title').annotate(
+        count=Count('id')
+    ))
 
     return Response(stats)
\ No newline at end of file